@@ -6,73 +6,152 @@ Accurate detection of AI-generated content using multiple methods
 import numpy as np
 from collections import Counter
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
+from functools import cached_property
 import nltk
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.probability import FreqDist
 from nltk.util import ngrams
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from sentence_transformers import SentenceTransformer
 import textstat
-from scipy import stats
 import math
+import os
 
-# Download required NLTK data
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('averaged_perceptron_tagger', quiet=True)
-    nltk.download('stopwords', quiet=True)
-except:
-    pass
+from batched_inference import DEFAULT_MODEL_NAME, get_inference_backend
+from services.model_registry import get_model_registry, ensure_nltk_data
+from utils.keyword_matcher import KeywordMatcher
 
-class RealAIDetector:
-    def __init__(self):
-        """Initialize AI detection models and resources"""
-        self.sentence_model = None
-        self.ai_classifier = None
-        self.tokenizer = None
-        self.initialize_models()
-        
-    def initialize_models(self):
-        """Load pre-trained models for AI detection"""
+
+def _load_sentence_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+
+def _load_ai_classifier():
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    tokenizer = AutoTokenizer.from_pretrained(DEFAULT_MODEL_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(DEFAULT_MODEL_NAME)
+    model.eval()
+    return tokenizer, model
+
+
+# Models load on the first analysis that needs them, not at import
+get_model_registry().register('sentence_model', _load_sentence_model, 'all-MiniLM-L6-v2 sentence embeddings')
+get_model_registry().register('ai_classifier', _load_ai_classifier, f"{DEFAULT_MODEL_NAME} tokenizer and classifier")
+
+# AI-typical phrases and transitions
+AI_PHRASE_MATCHER = KeywordMatcher({'ai_phrases': [
+    'it is important to note', 'it should be noted', 'it is worth noting',
+    'in conclusion', 'in summary', 'to summarize',
+    'furthermore', 'moreover', 'additionally', 'however',
+    'on the other hand', 'nevertheless', 'consequently',
+    'it is crucial', 'it is essential', 'it is vital',
+    'delve into', 'dive into', 'explore the depths',
+    'in today\'s world', 'in modern society', 'in the digital age',
+    'the fact that', 'the idea that', 'the notion that',
+    'shed light on', 'bring to light', 'highlight the importance'
+]})
+
+class TokenizedDocument:
+    """
+    Tokenization results for one text, built once per analysis and shared by
+    every feature extractor. Sentences and their tokens are computed eagerly;
+    POS tags and n-gram counts are computed on first use.
+    """
+    
+    def __init__(self, text: str):
+        ensure_nltk_data('punkt', 'averaged_perceptron_tagger', 'stopwords')
+        self.text = text
+        self.sentences = sent_tokenize(text)
+        # word_tokenize() sentence-splits internally, so tokenizing each sentence
+        # once yields both the per-sentence lists and the flat token list
+        self.sentence_tokens = [word_tokenize(s, preserve_line=True) for s in self.sentences]
+        self.tokens = [token for sentence in self.sentence_tokens for token in sentence]
+        self.lower_tokens = [token.lower() for token in self.tokens]
+        self.lower_sentence_tokens = [[token.lower() for token in sentence] for sentence in self.sentence_tokens]
+    
+    @cached_property
+    def pos_tags(self) -> List[Tuple[str, str]]:
+        return nltk.pos_tag(self.tokens)
+    
+    @cached_property
+    def bigram_counts(self) -> FreqDist:
+        return FreqDist(ngrams(self.lower_tokens, 2))
+    
+    @cached_property
+    def trigram_counts(self) -> FreqDist:
+        return FreqDist(ngrams(self.lower_tokens, 3))
+    
+    @cached_property
+    def content_words(self) -> List[str]:
+        """Lowercased alphabetic tokens with English stopwords removed"""
+        from nltk.corpus import stopwords
         try:
-            # Load sentence transformer for embeddings
-            self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-            
-            # Load AI detection model (you can use different models)
-            model_name = "Hello-SimpleAI/chatgpt-detector-roberta"
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.ai_classifier = AutoModelForSequenceClassification.from_pretrained(model_name)
-            
-            print("✓ AI detection models loaded successfully")
-        except Exception as e:
-            print(f"⚠ Warning: Could not load ML models: {e}")
-            print("  Falling back to statistical methods only")
+            stop_words = set(stopwords.words('english'))
+            return [w for w in self.lower_tokens if w.isalpha() and w not in stop_words]
+        except:
+            return [w for w in self.lower_tokens if w.isalpha()]
+
+
+class RealAIDetector:
+    """
+    Statistical and ML-based AI text detection
+
+    Models come from the model registry and load on first use, shared by
+    every detector instance in the process; if a model cannot be loaded the
+    detector falls back to statistical methods only.
+    """
+    
+    @property
+    def sentence_model(self):
+        return get_model_registry().get('sentence_model')
+    
+    @property
+    def ai_classifier(self):
+        # With a sidecar inference server the classifier lives there,
+        # so workers don't each hold their own copy
+        if os.environ.get('AI_INFERENCE_ADDRESS'):
+            return None
+        loaded = get_model_registry().get('ai_classifier')
+        return loaded[1] if loaded else None
+    
+    @property
+    def tokenizer(self):
+        if os.environ.get('AI_INFERENCE_ADDRESS'):
+            return None
+        loaded = get_model_registry().get('ai_classifier')
+        return loaded[0] if loaded else None
+    
+    @property
+    def ml_available(self) -> bool:
+        """True when a local classifier or the shared inference server can score text"""
+        return bool(os.environ.get('AI_INFERENCE_ADDRESS') or self.ai_classifier)
     
     def analyze(self, text: str) -> Dict:
         """
         Perform comprehensive AI detection analysis
         Returns detailed metrics and final AI probability
         """
+        # Tokenize once; every extractor below reads from the same document
+        doc = TokenizedDocument(text)
+        
         # Basic text statistics
-        stats = self.calculate_text_statistics(text)
+        stats = self.calculate_text_statistics(doc)
         
         # Linguistic features
-        linguistic = self.analyze_linguistic_features(text)
+        linguistic = self.analyze_linguistic_features(doc)
         
         # Perplexity and burstiness
-        perplexity = self.calculate_perplexity(text)
-        burstiness = self.calculate_burstiness(text)
+        perplexity = self.calculate_perplexity(doc)
+        burstiness = self.calculate_burstiness(doc)
         
         # N-gram analysis
-        ngram_score = self.analyze_ngram_patterns(text)
+        ngram_score = self.analyze_ngram_patterns(doc)
         
         # Repetition and pattern analysis
-        patterns = self.detect_ai_patterns(text)
+        patterns = self.detect_ai_patterns(doc)
         
         # ML-based detection if available
-        ml_score = self.ml_based_detection(text) if self.ai_classifier else None
+        ml_score = self.ml_based_detection(text) if self.ml_available else None
         
         # Calculate final AI probability
         ai_probability = self.calculate_final_probability(
@@ -95,13 +174,20 @@ class RealAIDetector:
             'confidence': self.calculate_confidence(perplexity, burstiness, ml_score)
         }
     
-    def calculate_text_statistics(self, text: str) -> Dict:
+    @staticmethod
+    def _as_document(text: Union[str, TokenizedDocument]) -> TokenizedDocument:
+        """Accept raw text or an already tokenized document"""
+        return text if isinstance(text, TokenizedDocument) else TokenizedDocument(text)
+    
+    def calculate_text_statistics(self, text: Union[str, TokenizedDocument]) -> Dict:
         """Calculate basic text statistics"""
-        sentences = sent_tokenize(text)
-        words = word_tokenize(text)
+        doc = self._as_document(text)
+        text = doc.text
+        sentences = doc.sentences
+        words = doc.tokens
         
         # Sentence length statistics
-        sentence_lengths = [len(word_tokenize(s)) for s in sentences]
+        sentence_lengths = [len(tokens) for tokens in doc.sentence_tokens]
         
         # Word length statistics
         word_lengths = [len(w) for w in words if w.isalpha()]
@@ -126,21 +212,21 @@ class RealAIDetector:
             'unique_word_ratio': len(unique_words) / len(words) if words else 0
         }
     
-    def calculate_perplexity(self, text: str) -> float:
+    def calculate_perplexity(self, text: Union[str, TokenizedDocument]) -> float:
         """
         Calculate perplexity score
         Lower perplexity indicates more predictable text (AI-like)
         """
-        words = word_tokenize(text.lower())
+        doc = self._as_document(text)
+        words = doc.lower_tokens
         if len(words) < 3:
             return 100.0
         
-        # Calculate bigram and trigram frequencies
-        bigrams = list(ngrams(words, 2))
+        # Bigram and trigram frequencies (shared with other extractors)
         trigrams = list(ngrams(words, 3))
         
-        bigram_freq = FreqDist(bigrams)
-        trigram_freq = FreqDist(trigrams)
+        bigram_freq = doc.bigram_counts
+        trigram_freq = doc.trigram_counts
         
         # Calculate conditional probabilities
         perplexity_score = 0
@@ -163,17 +249,17 @@ class RealAIDetector:
         
         return normalized
     
-    def calculate_burstiness(self, text: str) -> float:
+    def calculate_burstiness(self, text: Union[str, TokenizedDocument]) -> float:
         """
         Calculate burstiness (variance in sentence lengths)
         Human text tends to be more bursty
         """
-        sentences = sent_tokenize(text)
-        if len(sentences) < 2:
+        doc = self._as_document(text)
+        if len(doc.sentences) < 2:
             return 50.0
         
         # Get sentence lengths
-        lengths = [len(word_tokenize(s)) for s in sentences]
+        lengths = [len(tokens) for tokens in doc.sentence_tokens]
         
         # Calculate mean and variance
         mean_length = np.mean(lengths)
@@ -188,13 +274,14 @@ class RealAIDetector:
         # Normalize to 0-100 scale
         return min(100, burstiness * 5)
     
-    def analyze_linguistic_features(self, text: str) -> Dict:
+    def analyze_linguistic_features(self, text: Union[str, TokenizedDocument]) -> Dict:
         """Analyze linguistic features that distinguish human vs AI text"""
-        words = word_tokenize(text)
-        sentences = sent_tokenize(text)
+        doc = self._as_document(text)
+        words = doc.tokens
+        sentences = doc.sentences
         
         # Part-of-speech analysis
-        pos_tags = nltk.pos_tag(words)
+        pos_tags = doc.pos_tags
         pos_dist = FreqDist(tag for word, tag in pos_tags)
         
         # Calculate linguistic diversity
@@ -202,7 +289,7 @@ class RealAIDetector:
         adverb_ratio = (pos_dist['RB'] + pos_dist['RBR'] + pos_dist['RBS']) / len(words)
         
         # Passive voice detection (simplified)
-        passive_count = sum(1 for s in sentences if self._is_passive(s))
+        passive_count = sum(1 for tokens in doc.lower_sentence_tokens if self._is_passive(tokens))
         passive_ratio = passive_count / len(sentences) if sentences else 0
         
         # Contraction usage (human indicator)
@@ -222,10 +309,10 @@ class RealAIDetector:
             'pos_diversity': len(pos_dist) / len(set(pos_tags)) if pos_tags else 0
         }
     
-    def _is_passive(self, sentence: str) -> bool:
-        """Simple passive voice detection"""
+    def _is_passive(self, sentence: Union[str, List[str]]) -> bool:
+        """Simple passive voice detection (accepts a sentence or its lowercased tokens)"""
         passive_indicators = ['was', 'were', 'been', 'being', 'is', 'are', 'am']
-        words = word_tokenize(sentence.lower())
+        words = word_tokenize(sentence.lower()) if isinstance(sentence, str) else sentence
         
         for i, word in enumerate(words[:-1]):
             if word in passive_indicators:
@@ -235,20 +322,13 @@ class RealAIDetector:
                     return True
         return False
     
-    def analyze_ngram_patterns(self, text: str) -> float:
+    def analyze_ngram_patterns(self, text: Union[str, TokenizedDocument]) -> float:
         """
         Analyze n-gram patterns for AI detection
         AI text often has more predictable n-gram distributions
         """
-        words = word_tokenize(text.lower())
-        
         # Skip stopwords for better analysis
-        from nltk.corpus import stopwords
-        try:
-            stop_words = set(stopwords.words('english'))
-            words = [w for w in words if w.isalpha() and w not in stop_words]
-        except:
-            words = [w for w in words if w.isalpha()]
+        words = self._as_document(text).content_words
         
         if len(words) < 10:
             return 50.0
@@ -274,28 +354,16 @@ class RealAIDetector:
         
         return normalized_entropy
     
-    def detect_ai_patterns(self, text: str) -> Dict:
+    def detect_ai_patterns(self, text: Union[str, TokenizedDocument]) -> Dict:
         """Detect specific patterns common in AI-generated text"""
-        text_lower = text.lower()
-        
-        # AI-typical phrases and transitions
-        ai_phrases = [
-            'it is important to note', 'it should be noted', 'it is worth noting',
-            'in conclusion', 'in summary', 'to summarize',
-            'furthermore', 'moreover', 'additionally', 'however',
-            'on the other hand', 'nevertheless', 'consequently',
-            'it is crucial', 'it is essential', 'it is vital',
-            'delve into', 'dive into', 'explore the depths',
-            'in today\'s world', 'in modern society', 'in the digital age',
-            'the fact that', 'the idea that', 'the notion that',
-            'shed light on', 'bring to light', 'highlight the importance'
-        ]
+        doc = self._as_document(text)
+        text = doc.text
         
-        # Count AI phrase occurrences
-        ai_phrase_count = sum(1 for phrase in ai_phrases if phrase in text_lower)
+        # Count AI-typical phrases and transitions
+        ai_phrase_count = AI_PHRASE_MATCHER.category_counts(text).get('ai_phrases', 0)
         
         # Repetitive structure detection
-        sentences = sent_tokenize(text)
+        sentences = doc.sentences
         sentence_starters = [s.split()[0].lower() for s in sentences if s.split()]
         starter_freq = FreqDist(sentence_starters)
         
@@ -335,24 +403,18 @@ class RealAIDetector:
         return errors
     
     def ml_based_detection(self, text: str) -> float:
-        """Use pre-trained transformer model for AI detection"""
-        if not self.ai_classifier or not self.tokenizer:
+        """
+        Use pre-trained transformer model for AI detection
+        Requests are micro-batched with other concurrent requests, and long
+        texts are scored over sliding 512-token windows rather than truncated
+        """
+        backend = get_inference_backend(self.ai_classifier, self.tokenizer)
+        if backend is None:
             return None
         
         try:
-            # Tokenize and prepare input
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, 
-                                   max_length=512, padding=True)
-            
-            # Get model predictions
-            with torch.no_grad():
-                outputs = self.ai_classifier(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                
-            # Extract AI probability
-            ai_prob = predictions[0][1].item() * 100  # Assuming label 1 is AI
-            
-            return ai_prob
+            # Label 1 is AI; the backend returns its probability on a 0-100 scale
+            return backend.score(text)
             
         except Exception as e:
             print(f"ML detection error: {e}")
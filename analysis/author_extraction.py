@@ -5,10 +5,10 @@ Implements publisher-specific rules and intelligent fallbacks
 
 import re
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-import json
 from typing import Optional, List, Dict, Union
 
+from analysis.html_document import HTMLDocument
+
 class AuthorExtractor:
     def __init__(self):
         self.publisher_rules = self._initialize_publisher_rules()
@@ -137,21 +137,23 @@ class AuthorExtractor:
             }
         }
     
-    def extract_author(self, html: str, url: str) -> Optional[str]:
+    def extract_author(self, html: str, url: str, document: Optional[HTMLDocument] = None) -> Optional[str]:
         """
         Main extraction method that tries multiple strategies
+        
+        Pass the already parsed document to avoid parsing the page again.
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        document = document or HTMLDocument(html, url)
         domain = self._get_domain(url)
         
         # Try publisher-specific rules first
         if domain in self.publisher_rules:
-            author = self._apply_publisher_rules(soup, html, self.publisher_rules[domain])
+            author = self._apply_publisher_rules(document, self.publisher_rules[domain])
             if author:
                 return author
         
         # Fall back to generic extraction
-        return self._generic_extraction(soup, html)
+        return self._generic_extraction(document)
     
     def _get_domain(self, url: str) -> str:
         """Extract domain from URL"""
@@ -161,28 +163,34 @@ class AuthorExtractor:
             domain = domain[4:]
         return domain
     
-    def _apply_publisher_rules(self, soup: BeautifulSoup, html: str, rules: Dict) -> Optional[str]:
+    def _apply_publisher_rules(self, document: HTMLDocument, rules: Dict) -> Optional[str]:
         """Apply publisher-specific extraction rules"""
         
-        # 1. Try CSS selectors
+        # 1. Try CSS selectors (meta selectors read the precomputed meta map)
         if 'selectors' in rules:
             for selector in rules['selectors']:
-                elements = soup.find_all(**selector)
-                for element in elements:
-                    author = self._extract_from_element(element, rules.get('content_property'))
+                if selector.get('name') == 'meta':
+                    key = next(iter(selector.get('attrs', {}).values()), None)
+                    candidates = document.meta_values(key) if key else []
+                else:
+                    candidates = [
+                        self._extract_from_element(element, rules.get('content_property'))
+                        for element in document.soup.find_all(**selector)
+                    ]
+                for author in candidates:
                     if author and self._validate_author(author, rules):
                         return author
         
         # 2. Try JSON-LD structured data
         if 'json_ld_paths' in rules:
-            author = self._extract_from_json_ld(soup, rules['json_ld_paths'])
+            author = self._extract_from_json_ld(document, rules['json_ld_paths'])
             if author and self._validate_author(author, rules):
                 return author
         
         # 3. Try regex patterns on text
         if 'patterns' in rules:
             # Look in first 1000 characters for byline
-            text_start = soup.get_text()[:1000]
+            text_start = document.head_text(1000)
             for pattern in rules['patterns']:
                 matches = re.findall(pattern, text_start, re.MULTILINE)
                 for match in matches:
@@ -200,18 +208,13 @@ class AuthorExtractor:
         else:
             return element.get_text(strip=True)
     
-    def _extract_from_json_ld(self, soup: BeautifulSoup, paths: List[str]) -> Optional[str]:
+    def _extract_from_json_ld(self, document: HTMLDocument, paths: List[str]) -> Optional[str]:
         """Extract author from JSON-LD structured data"""
-        scripts = soup.find_all('script', type='application/ld+json')
-        for script in scripts:
-            try:
-                data = json.loads(script.string)
-                for path in paths:
-                    author = self._get_nested_value(data, path)
-                    if author:
-                        return author
-            except json.JSONDecodeError:
-                continue
+        for data in document.json_ld:
+            for path in paths:
+                author = self._get_nested_value(data, path)
+                if author:
+                    return author
         return None
     
     def _get_nested_value(self, data: Dict, path: str) -> Optional[str]:
@@ -270,43 +273,38 @@ class AuthorExtractor:
         
         return True
     
-    def _generic_extraction(self, soup: BeautifulSoup, html: str) -> Optional[str]:
+    def _generic_extraction(self, document: HTMLDocument) -> Optional[str]:
         """Generic extraction methods when publisher-specific rules fail"""
         
         # Common meta tags
         meta_names = ['author', 'dc.creator', 'byl', 'sailthru.author']
         for name in meta_names:
-            meta = soup.find('meta', attrs={'name': name})
-            if meta and meta.get('content'):
-                author = meta['content']
-                if self._validate_author(author, {}):
-                    return author
+            author = document.meta_content(name)
+            if author and self._validate_author(author, {}):
+                return author
         
-        # Common class names
-        class_names = ['author', 'byline', 'by-line', 'writer', 'journalist']
-        for class_name in class_names:
-            elements = soup.find_all(class_=re.compile(class_name, re.I))
-            for element in elements:
-                text = element.get_text(strip=True)
-                # Try to extract name from byline text
-                match = re.search(r'By\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+){1,3})', text)
-                if match and self._validate_author(match.group(1), {}):
-                    return match.group(1)
+        # Byline elements (author/byline/writer/journalist classes)
+        for text in document.byline_texts:
+            # Try to extract name from byline text
+            match = re.search(r'By\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+){1,3})', text)
+            if match and self._validate_author(match.group(1), {}):
+                return match.group(1)
         
         return None
 
 
 # Integration function for use in news_analysis.py
-def extract_author_enhanced(html: str, url: str) -> Optional[str]:
+def extract_author_enhanced(html: str, url: str, document: Optional[HTMLDocument] = None) -> Optional[str]:
     """
     Enhanced author extraction with publisher-specific rules
     
     Args:
         html: The HTML content of the article
         url: The URL of the article
+        document: Already parsed HTMLDocument for this page, if any
         
     Returns:
         Author name if found, None otherwise
     """
     extractor = AuthorExtractor()
-    return extractor.extract_author(html, url)
+    return extractor.extract_author(html, url, document)
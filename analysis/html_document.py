@@ -0,0 +1,170 @@
+"""
+HTML Document Model for Facts & Fakes AI
+Parses a fetched page once (lxml) and precomputes what every extractor needs
+"""
+
+import re
+import json
+from urllib.parse import urlparse
+from typing import Optional, List, Dict, Any
+from bs4 import BeautifulSoup
+
+# lxml is a hard requirement in production; html.parser keeps local runs working
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Elements never holding article text
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'button']
+
+ARTICLE_TYPES = {'NewsArticle', 'Article', 'BlogPosting', 'ReportageNewsArticle', 'AnalysisNewsArticle',
+                 'OpinionNewsArticle'}
+
+BYLINE_CLASS_PATTERN = re.compile(r'author|byline|by-line|writer|reporter|journalist|correspondent', re.I)
+
+
+class HTMLDocument:
+    """
+    One parsed page shared by the title, author, date and content extractors
+
+    JSON-LD blocks, meta tags and byline candidates are captured at parse
+    time, before any extractor strips scripts or page chrome, so they stay
+    available no matter which extractor runs first. `soup` is the single
+    parse tree; `content_soup` is the same tree with boilerplate removed
+    (done once, in place).
+    """
+
+    def __init__(self, html: str, url: Optional[str] = None):
+        self.html = html
+        self.url = url
+        self.domain = urlparse(url).netloc.lower().replace('www.', '') if url else ''
+        self.soup = BeautifulSoup(html, HTML_PARSER)
+
+        self.json_ld_raw: List[Any] = []
+        self.json_ld: List[Dict] = []
+        self._parse_json_ld()
+        self.meta: Dict[str, List[str]] = self._parse_meta()
+        self.byline_texts: List[str] = self._collect_bylines()
+
+        self._head_text: Dict[int, str] = {}
+        self._content_stripped = False
+        self._text_blocks = None
+
+    @classmethod
+    def for_page(cls, page, url: Optional[str] = None) -> 'HTMLDocument':
+        """Return the document for a fetched page, parsing it on first use"""
+        document = getattr(page, 'document', None)
+        if document is None:
+            document = cls(page.text, url or page.url)
+            page.document = document
+        return document
+
+    # Precomputed lookups
+
+    def meta_content(self, *keys: str) -> Optional[str]:
+        """First non-empty content among meta tags named (name/property/itemprop) by keys, in order"""
+        for key in keys:
+            values = self.meta.get(key.lower())
+            if values:
+                return values[0]
+        return None
+
+    def meta_values(self, key: str) -> List[str]:
+        return self.meta.get(key.lower(), [])
+
+    def article_json_ld(self) -> List[Dict]:
+        """JSON-LD nodes typed as an article"""
+        articles = []
+        for item in self.json_ld:
+            item_type = item.get('@type')
+            types = item_type if isinstance(item_type, list) else [item_type]
+            if any(t in ARTICLE_TYPES for t in types):
+                articles.append(item)
+        return articles
+
+    def head_text(self, limit: int = 1000) -> str:
+        """
+        The first `limit` characters of visible text, without rendering the
+        whole tree to a string
+        """
+        if limit not in self._head_text:
+            parts = []
+            total = 0
+            for string in self.soup.strings:
+                if string.parent is not None and string.parent.name in ('script', 'style', 'noscript'):
+                    continue
+                parts.append(string)
+                total += len(string)
+                if total >= limit:
+                    break
+            self._head_text[limit] = ''.join(parts)[:limit]
+        return self._head_text[limit]
+
+    @property
+    def content_soup(self) -> BeautifulSoup:
+        """The parse tree with boilerplate elements removed"""
+        if not self._content_stripped:
+            for element in self.soup(BOILERPLATE_TAGS):
+                element.decompose()
+            self._content_stripped = True
+        return self.soup
+
+    @property
+    def text_blocks(self) -> List[str]:
+        """Paragraph texts (over 20 chars) from the content tree, in document order"""
+        if self._text_blocks is None:
+            self._text_blocks = [
+                text for text in (p.get_text().strip() for p in self.content_soup.find_all('p'))
+                if len(text) > 20
+            ]
+        return self._text_blocks
+
+    # Parse-time extraction
+
+    def _parse_json_ld(self):
+        for script in self.soup.find_all('script', type='application/ld+json'):
+            try:
+                data = json.loads(script.string or '')
+            except (ValueError, TypeError):
+                continue
+            self.json_ld_raw.append(data)
+
+            items = data if isinstance(data, list) else [data]
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                self.json_ld.append(item)
+                graph = item.get('@graph')
+                if isinstance(graph, list):
+                    self.json_ld.extend(node for node in graph if isinstance(node, dict))
+
+    def _parse_meta(self) -> Dict[str, List[str]]:
+        meta = {}
+        for tag in self.soup.find_all('meta'):
+            content = tag.get('content')
+            if not content or not content.strip():
+                continue
+            for attr in ('property', 'name', 'itemprop'):
+                key = tag.get(attr)
+                if key:
+                    meta.setdefault(key.lower(), []).append(content.strip())
+        return meta
+
+    def _collect_bylines(self) -> List[str]:
+        texts = []
+        seen = set()
+        candidates = (
+            self.soup.find_all(attrs={'class': BYLINE_CLASS_PATTERN}, limit=40)
+            + self.soup.find_all(attrs={'rel': 'author'}, limit=10)
+            + self.soup.find_all(attrs={'itemprop': 'author'}, limit=10)
+        )
+        for element in candidates:
+            if element.name == 'meta':
+                continue
+            text = element.get_text(' ', strip=True)
+            if text and len(text) < 200 and text not in seen:
+                seen.add(text)
+                texts.append(text)
+        return texts
@@ -1,16 +1,215 @@
 """
 Image analysis module - Deepfake and manipulation detection
 """
+import os
 import numpy as np
 import math
 import base64
 import io
+import threading
 from PIL import Image
 from datetime import datetime
 import traceback
 
 # Import CV modules if available
 from utils.cv_utils import CV_AVAILABLE, cv2, scipy, skimage, stats, feature, filters, morphology, fftpack
+from services.stage_executor import Stage, StageExecutor
+
+# Analysis resolution policy. Block/JPEG forensics need the original 8x8 grid,
+# so they run at native resolution (center-cropped, grid-aligned, above
+# NATIVE_MAX_PIXELS); texture and frequency statistics run on a downsampled
+# working copy of at most WORKING_MAX_PIXELS.
+WORKING_MAX_PIXELS = int(os.environ.get('IMAGE_ANALYSIS_WORKING_MAX_PIXELS', 2000000))
+NATIVE_MAX_PIXELS = int(os.environ.get('IMAGE_ANALYSIS_NATIVE_MAX_PIXELS', 12000000))
+
+DETECTOR_SCALES = {
+    'compression': 'native',
+    'jpeg_ghosts': 'native',
+    'benford': 'native',
+    'benford_block': 'native',
+    'noise': 'native',
+    'chromatic_aberration': 'native',
+    'frequency': 'working',
+    'edges': 'working',
+    'color': 'working',
+    'texture': 'working',
+    'lighting': 'working',
+    'reflection': 'working',
+    'gan': 'working',
+    'diffusion': 'working',
+    'ai_generation': 'working',
+    'deepfake': 'working'
+}
+
+# Detector execution: 'parallel' fans detectors out across a thread pool
+# (OpenCV/NumPy release the GIL), 'sequential' runs them inline
+IMAGE_DETECTOR_MODE = os.environ.get('IMAGE_DETECTOR_MODE', 'parallel')
+IMAGE_DETECTOR_TIMEOUT = float(os.environ.get('IMAGE_DETECTOR_TIMEOUT', 30))
+
+# Detectors the scoring cannot do without; any other detector that fails or
+# times out is reported as None instead of failing the whole analysis
+REQUIRED_DETECTORS = {
+    'metadata', 'compression', 'noise', 'frequency', 'edges', 'color',
+    'texture', 'benford', 'gan', 'diffusion', 'ai_generation'
+}
+
+_detector_executor = None
+_detector_executor_lock = threading.Lock()
+
+def get_detector_executor():
+    """
+    Return the process-wide image detector pool, creating it on first use
+    
+    Kept separate from the request stage pool so an image analysis running
+    as a stage never waits on workers it is itself occupying.
+    """
+    global _detector_executor
+    if _detector_executor is None:
+        with _detector_executor_lock:
+            if _detector_executor is None:
+                _detector_executor = StageExecutor(
+                    max_workers=int(os.environ.get('IMAGE_DETECTOR_MAX_WORKERS', os.cpu_count() or 4)),
+                    default_timeout=IMAGE_DETECTOR_TIMEOUT
+                )
+    return _detector_executor
+
+class ImageFeatureContext:
+    """
+    Per-request cache of derived image features shared by the detectors
+    
+    Each feature (grayscale, FFT, Laplacian, edges, LBP...) is computed on
+    first access and reused, so detectors that need the same transform of
+    the same image no longer each recompute it.
+    """
+    
+    def __init__(self, img_array, img_gray=None):
+        self.img_array = img_array
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        if img_gray is not None:
+            self._cache['gray'] = img_gray
+    
+    def _memo(self, key, compute):
+        # Per-feature locks: detectors running in parallel wait for a feature
+        # another detector is already computing instead of duplicating it
+        if key in self._cache:
+            return self._cache[key]
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+        return self._cache[key]
+    
+    def _to_gray(self):
+        img = self.img_array
+        if len(img.shape) == 2:
+            return img
+        if img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY)
+        return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    
+    @property
+    def gray(self):
+        """8-bit grayscale image"""
+        return self._memo('gray', self._to_gray)
+    
+    @property
+    def gray_float32(self):
+        return self._memo('gray_float32', lambda: np.float32(self.gray))
+    
+    @property
+    def fft_shifted(self):
+        """Centered 2D FFT of the grayscale image"""
+        return self._memo('fft_shifted', lambda: np.fft.fftshift(np.fft.fft2(self.gray_float32)))
+    
+    @property
+    def magnitude_spectrum(self):
+        """Log-magnitude of the centered FFT"""
+        return self._memo('magnitude_spectrum', lambda: np.log(np.abs(self.fft_shifted) + 1))
+    
+    @property
+    def laplacian(self):
+        return self._memo('laplacian', lambda: cv2.Laplacian(self.gray, cv2.CV_64F))
+    
+    def canny(self, low=50, high=150):
+        """OpenCV Canny edge map"""
+        return self._memo(('canny', low, high), lambda: cv2.Canny(self.gray, low, high))
+    
+    def skimage_canny(self, sigma=1.0):
+        """scikit-image Canny edge map (boolean)"""
+        return self._memo(('skimage_canny', sigma), lambda: feature.canny(self.gray, sigma=sigma))
+    
+    def lbp(self, radius):
+        """Uniform local binary pattern with 8 * radius sampling points"""
+        return self._memo(
+            ('lbp', radius),
+            lambda: feature.local_binary_pattern(self.gray, 8 * radius, radius, method='uniform')
+        )
+
+class ImagePyramid:
+    """
+    Native and working-resolution copies of an image, each with its own
+    ImageFeatureContext
+    
+    Without OpenCV nothing is resampled: the working level is the full image
+    and img_gray is passed through as is, for the detectors' fallbacks.
+    """
+    
+    def __init__(self, img_array, img_gray=None, working_max_pixels=WORKING_MAX_PIXELS,
+                 native_max_pixels=NATIVE_MAX_PIXELS):
+        height, width = img_array.shape[:2]
+        self.original_size = (width, height)
+        self.levels = {}
+        self.info = {}
+        
+        # Native level: full resolution, or a centered crop aligned to the
+        # 8x8 JPEG grid when the image is larger than the native budget
+        if native_max_pixels > 0 and width * height > native_max_pixels:
+            shrink = math.sqrt(native_max_pixels / float(width * height))
+            crop_w = max(8, int(width * shrink) // 8 * 8)
+            crop_h = max(8, int(height * shrink) // 8 * 8)
+            x0 = (width - crop_w) // 2 // 8 * 8
+            y0 = (height - crop_h) // 2 // 8 * 8
+            native_array = img_array[y0:y0 + crop_h, x0:x0 + crop_w]
+            native_gray = img_gray[y0:y0 + crop_h, x0:x0 + crop_w] if img_gray is not None else None
+            self.levels['native'] = ImageFeatureContext(native_array, native_gray)
+            self.info['native'] = {
+                'resolution': f"{crop_w}x{crop_h}",
+                'factor': 1.0,
+                'crop': [x0, y0, crop_w, crop_h]
+            }
+        else:
+            self.levels['native'] = ImageFeatureContext(img_array, img_gray)
+            self.info['native'] = {'resolution': f"{width}x{height}", 'factor': 1.0, 'crop': None}
+        
+        # Working level: whole frame, area-downsampled to the working budget
+        if cv2 is not None and working_max_pixels > 0 and width * height > working_max_pixels:
+            factor = math.sqrt(working_max_pixels / float(width * height))
+            size = (max(1, int(round(width * factor))), max(1, int(round(height * factor))))
+            working_array = cv2.resize(img_array, size, interpolation=cv2.INTER_AREA)
+            self.levels['working'] = ImageFeatureContext(working_array)
+            self.info['working'] = {'resolution': f"{size[0]}x{size[1]}", 'factor': round(factor, 4), 'crop': None}
+        else:
+            self.levels['working'] = ImageFeatureContext(img_array, img_gray)
+            self.info['working'] = {'resolution': f"{width}x{height}", 'factor': 1.0, 'crop': None}
+    
+    def level(self, scale):
+        """Return the ImageFeatureContext for 'native' or 'working'"""
+        return self.levels[scale]
+    
+    def for_detector(self, name):
+        """Return the ImageFeatureContext at the scale the detector declares"""
+        return self.levels[DETECTOR_SCALES.get(name, 'native')]
+    
+    def describe(self, detectors):
+        """Scale metadata for the response: which level each detector used"""
+        return {
+            'original_resolution': f"{self.original_size[0]}x{self.original_size[1]}",
+            'levels': self.info,
+            'detectors': {name: DETECTOR_SCALES.get(name, 'native') for name in detectors}
+        }
 
 def prepare_image_for_analysis(image_data):
     """Prepare image for various analysis methods"""
@@ -34,7 +233,10 @@ def prepare_image_for_analysis(image_data):
     else:
         img_cv2 = img_array
     
-    return image, img_array, img_cv2, file_size
+    # Native/working resolution levels, built once and shared by every detector
+    pyramid = ImagePyramid(img_array, img_cv2)
+    
+    return image, img_array, img_cv2, file_size, pyramid
 
 def extract_real_metadata(image):
     """Extract actual metadata from image"""
@@ -76,6 +278,21 @@ def extract_real_metadata(image):
     
     return metadata
 
+def block_view(img, block_size=8):
+    """
+    View a 2D image as a (rows, cols, block_size, block_size) grid of blocks
+    without copying; partial blocks at the right/bottom edges are dropped
+    """
+    h, w = img.shape[:2]
+    rows, cols = h // block_size, w // block_size
+    cropped = img[:rows * block_size, :cols * block_size]
+    return cropped.reshape(rows, block_size, cols, block_size).swapaxes(1, 2)
+
+def blockwise_dct(img_gray, block_size=8):
+    """Level-shifted 2D DCT-II of every block_size x block_size block"""
+    blocks = block_view(np.asarray(img_gray, dtype=np.float32) - 128.0, block_size)
+    return fftpack.dct(fftpack.dct(blocks, axis=-1, norm='ortho'), axis=-2, norm='ortho')
+
 def analyze_compression_artifacts(img_gray):
     """Analyze JPEG compression artifacts and quality"""
     if not CV_AVAILABLE:
@@ -87,22 +304,19 @@ def analyze_compression_artifacts(img_gray):
             'block_artifacts_detected': False
         }
     
-    # DCT-based analysis for JPEG artifacts
-    dct = fftpack.dct(fftpack.dct(img_gray.T, norm='ortho').T, norm='ortho')
-    
-    # Check for 8x8 block artifacts (JPEG signature)
+    # Blockwise 8x8 DCT, as JPEG computes it, over every block at once
     block_size = 8
-    h, w = img_gray.shape
-    block_artifacts = 0
+    dct_blocks = blockwise_dct(img_gray, block_size)
     
-    for i in range(0, h - block_size, block_size):
-        for j in range(0, w - block_size, block_size):
-            block = dct[i:i+block_size, j:j+block_size]
-            # Check if high frequencies are zeroed (JPEG compression)
-            if np.sum(np.abs(block[4:, 4:])) < np.sum(np.abs(block[:4, :4])) * 0.1:
-                block_artifacts += 1
+    # High-to-low frequency energy per block; JPEG quantization zeroes the
+    # high frequencies, so compressed blocks have very little high energy
+    low_energy = np.abs(dct_blocks[..., :4, :4]).sum(axis=(-2, -1))
+    high_energy = np.abs(dct_blocks[..., 4:, 4:]).sum(axis=(-2, -1))
+    energy_ratio = high_energy / (low_energy + 1e-10)
+    artifact_heatmap = energy_ratio < 0.1
     
-    total_blocks = (h // block_size) * (w // block_size)
+    total_blocks = artifact_heatmap.size
+    block_artifacts = int(np.count_nonzero(artifact_heatmap))
     artifact_ratio = block_artifacts / max(total_blocks, 1)
     
     # Estimate quality based on artifacts
@@ -121,10 +335,13 @@ def analyze_compression_artifacts(img_gray):
         'artifact_ratio': artifact_ratio,
         'description': f'JPEG quality: {quality}',
         'error_level': error_level,
-        'block_artifacts_detected': artifact_ratio > 0.3
+        'block_artifacts_detected': artifact_ratio > 0.3,
+        # Per-block maps (rows x cols of 8x8 blocks) for overlay rendering
+        'artifact_heatmap': artifact_heatmap,
+        'energy_ratio_map': energy_ratio.astype(np.float32)
     }
 
-def analyze_noise_patterns(img_gray):
+def analyze_noise_patterns(img_gray, ctx=None):
     """Analyze noise patterns in the image"""
     if not CV_AVAILABLE:
         return {
@@ -135,8 +352,10 @@ def analyze_noise_patterns(img_gray):
             'is_natural': True
         }
     
+    ctx = ctx or ImageFeatureContext(img_gray, img_gray)
+    
     # Calculate noise using Laplacian variance
-    laplacian_var = cv2.Laplacian(img_gray, cv2.CV_64F).var()
+    laplacian_var = ctx.laplacian.var()
     
     # Analyze noise distribution
     noise = img_gray - cv2.GaussianBlur(img_gray, (5, 5), 0)
@@ -163,7 +382,7 @@ def analyze_noise_patterns(img_gray):
         'is_natural': noise_uniformity > 3.5 and laplacian_var > 50
     }
 
-def analyze_frequency_domain(img_gray):
+def analyze_frequency_domain(img_gray, ctx=None):
     """Analyze frequency domain characteristics"""
     if not CV_AVAILABLE:
         return {
@@ -173,10 +392,9 @@ def analyze_frequency_domain(img_gray):
             'num_peaks': 20
         }
     
-    # Compute 2D FFT
-    f_transform = fftpack.fft2(img_gray)
-    f_shift = fftpack.fftshift(f_transform)
-    magnitude_spectrum = np.log(np.abs(f_shift) + 1)
+    # 2D FFT log-magnitude (shared with the GAN/diffusion detectors)
+    ctx = ctx or ImageFeatureContext(img_gray, img_gray)
+    magnitude_spectrum = ctx.magnitude_spectrum
     
     # Analyze frequency distribution
     center = (magnitude_spectrum.shape[0] // 2, magnitude_spectrum.shape[1] // 2)
@@ -201,7 +419,7 @@ def analyze_frequency_domain(img_gray):
         'num_peaks': len(peaks)
     }
 
-def analyze_edges_and_boundaries(img_gray):
+def analyze_edges_and_boundaries(img_gray, ctx=None):
     """Analyze edge characteristics"""
     if not CV_AVAILABLE:
         return {
@@ -211,8 +429,10 @@ def analyze_edges_and_boundaries(img_gray):
             'unnatural_edges': False
         }
     
+    ctx = ctx or ImageFeatureContext(img_gray, img_gray)
+    
     # Multiple edge detection methods
-    edges_canny = feature.canny(img_gray, sigma=1.0)
+    edges_canny = ctx.skimage_canny(1.0)
     edges_sobel = filters.sobel(img_gray)
     
     # Calculate edge density
@@ -270,7 +490,7 @@ def analyze_color_distribution(img_array):
             'natural_distribution': True
         }
 
-def analyze_texture_patterns(img_gray):
+def analyze_texture_patterns(img_gray, ctx=None):
     """Analyze texture patterns using GLCM and other methods"""
     if not CV_AVAILABLE:
         return {
@@ -280,10 +500,10 @@ def analyze_texture_patterns(img_gray):
             'is_natural_texture': True
         }
     
+    ctx = ctx or ImageFeatureContext(img_gray, img_gray)
+    
     # Local Binary Patterns for texture analysis
-    radius = 3
-    n_points = 8 * radius
-    lbp = feature.local_binary_pattern(img_gray, n_points, radius, method='uniform')
+    lbp = ctx.lbp(3)
     
     # Calculate LBP histogram
     n_bins = int(lbp.max() + 1)
@@ -308,10 +528,34 @@ def analyze_texture_patterns(img_gray):
 # ADVANCED DETECTION FUNCTIONS
 # ============================================================================
 
-def analyze_benford_law(img_array):
+def leading_digit_histogram(values):
+    """
+    Count first significant digits (1-9) of the non-zero magnitudes in values
+    using log10/floor instead of per-value string conversion
+    """
+    magnitudes = np.abs(np.asarray(values, dtype=np.float64)).ravel()
+    magnitudes = magnitudes[magnitudes > 0]
+    if magnitudes.size == 0:
+        return np.zeros(9)
+    
+    # Mantissa in [1, 10): 10 ** frac(log10(x)); computed in place to limit temporaries
+    np.log10(magnitudes, out=magnitudes)
+    magnitudes -= np.floor(magnitudes)
+    np.power(10.0, magnitudes, out=magnitudes)
+    
+    # Small epsilon absorbs rounding just below an integer (e.g. 2.9999999 for 3)
+    digits = np.floor(magnitudes + 1e-9).astype(np.int64)
+    np.clip(digits, 1, 9, out=digits)
+    
+    return np.bincount(digits, minlength=10)[1:10].astype(np.float64)
+
+def analyze_benford_law(img_array, block_mode=False, ctx=None):
     """
     Apply Benford's Law analysis to detect statistical anomalies
     Natural images follow Benford's Law in their DCT coefficients
+    
+    With block_mode=True the test runs on the AC coefficients of the 8x8
+    blockwise DCT, as in JPEG forensics, instead of a whole-image DCT.
     """
     if not CV_AVAILABLE:
         # Fallback values
@@ -322,34 +566,19 @@ def analyze_benford_law(img_array):
             'digit_distribution': [0.301, 0.176, 0.125, 0.097, 0.079, 0.067, 0.058, 0.051, 0.046]
         }
     
-    # Convert to grayscale if needed
-    if len(img_array.shape) == 3:
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    ctx = ctx or ImageFeatureContext(img_array)
+    gray = ctx.gray
+    
+    if block_mode:
+        # Blockwise DCT; drop each block's DC term, which doesn't follow Benford
+        dct_blocks = blockwise_dct(gray)
+        coefficients = dct_blocks.reshape(-1, 64)[:, 1:]
     else:
-        gray = img_array
-    
-    # Apply DCT
-    dct = cv2.dct(np.float32(gray))
-    
-    # Get the leading digits of DCT coefficients
-    dct_flat = np.abs(dct.flatten())
-    dct_flat = dct_flat[dct_flat > 0]  # Remove zeros
-    
-    # Extract leading digits
-    leading_digits = []
-    for val in dct_flat:
-        # Get the first non-zero digit
-        str_val = str(val)
-        for char in str_val:
-            if char.isdigit() and char != '0':
-                leading_digits.append(int(char))
-                break
-    
-    # Count digit frequencies
-    digit_counts = np.zeros(9)
-    for digit in leading_digits:
-        if 1 <= digit <= 9:
-            digit_counts[digit - 1] += 1
+        # Apply DCT
+        coefficients = cv2.dct(ctx.gray_float32)
+    
+    # Count leading-digit frequencies of the DCT coefficients
+    digit_counts = leading_digit_histogram(coefficients)
     
     # Normalize to get distribution
     total = np.sum(digit_counts)
@@ -359,13 +588,10 @@ def analyze_benford_law(img_array):
         observed_dist = np.zeros(9)
     
     # Benford's Law expected distribution
-    benford_dist = np.array([np.log10(1 + 1/d) for d in range(1, 10)])
+    benford_dist = np.log10(1 + 1 / np.arange(1, 10))
     
     # Calculate chi-square test
-    chi_square = 0
-    for i in range(9):
-        if benford_dist[i] > 0:
-            chi_square += ((observed_dist[i] - benford_dist[i]) ** 2) / benford_dist[i]
+    chi_square = np.sum((observed_dist - benford_dist) ** 2 / benford_dist)
     
     # Calculate mean absolute deviation
     deviation = np.mean(np.abs(observed_dist - benford_dist))
@@ -376,8 +602,9 @@ def analyze_benford_law(img_array):
     return {
         'benford_deviation': float(deviation),
         'chi_square': float(chi_square),
-        'follows_benford': follows_benford,
-        'digit_distribution': observed_dist.tolist()
+        'follows_benford': bool(follows_benford),
+        'digit_distribution': observed_dist.tolist(),
+        'mode': 'block' if block_mode else 'global'
     }
 
 def analyze_chromatic_aberration(img_array):
@@ -457,7 +684,7 @@ def analyze_chromatic_aberration(img_array):
         'is_natural': is_natural
     }
 
-def detect_jpeg_ghosts(img_array):
+def detect_jpeg_ghosts(img_array, ctx=None):
     """
     JPEG Ghost detection - finds traces of multiple compressions
     """
@@ -469,11 +696,7 @@ def detect_jpeg_ghosts(img_array):
             'double_compressed': False
         }
     
-    # Convert to grayscale if needed
-    if len(img_array.shape) == 3:
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-    else:
-        gray = img_array
+    gray = (ctx or ImageFeatureContext(img_array)).gray
     
     ghost_maps = []
     quality_levels = [50, 60, 70, 80, 90, 95]
@@ -511,7 +734,7 @@ def detect_jpeg_ghosts(img_array):
         'double_compressed': compression_levels > 1
     }
 
-def analyze_lighting_consistency(img_array):
+def analyze_lighting_consistency(img_array, ctx=None):
     """
     Analyze lighting consistency using simple 3D estimation
     """
@@ -524,7 +747,7 @@ def analyze_lighting_consistency(img_array):
         }
     
     # Convert to grayscale
-    gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
+    gray = (ctx or ImageFeatureContext(img_array)).gray
     
     # Estimate lighting direction using gradient analysis
     # Calculate gradients
@@ -588,7 +811,7 @@ def analyze_lighting_consistency(img_array):
         'anomaly_regions': anomaly_regions[:5]  # Limit to 5 regions
     }
 
-def detect_gan_artifacts_advanced(img_array):
+def detect_gan_artifacts_advanced(img_array, ctx=None):
     """
     Advanced GAN artifact detection focusing on specific patterns
     """
@@ -601,17 +824,12 @@ def detect_gan_artifacts_advanced(img_array):
             'mode_collapse_indicators': False
         }
     
-    # Convert to grayscale if needed
-    if len(img_array.shape) == 3:
-        gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = img_array
+    ctx = ctx or ImageFeatureContext(img_array)
+    gray = ctx.gray
     
     # 1. Checkerboard artifact detection (common in transposed convolutions)
-    # Apply FFT and look for regular grid patterns
-    f_transform = np.fft.fft2(gray)
-    f_shift = np.fft.fftshift(f_transform)
-    magnitude_spectrum = np.log(np.abs(f_shift) + 1)
+    # Look for regular grid patterns in the shared FFT magnitude spectrum
+    magnitude_spectrum = ctx.magnitude_spectrum
     
     # Look for peaks at regular intervals (checkerboard pattern in frequency domain)
     peaks = feature.peak_local_max(magnitude_spectrum, min_distance=20, num_peaks=20)
@@ -635,7 +853,7 @@ def detect_gan_artifacts_advanced(img_array):
     # 2. Color bleeding detection (GAN sometimes bleeds colors across boundaries)
     if len(img_array.shape) == 3:
         # Check color consistency at edges
-        edges = cv2.Canny(gray, 50, 150)
+        edges = ctx.canny(50, 150)
         edge_coords = np.where(edges > 0)
         
         color_variance = 0
@@ -658,9 +876,7 @@ def detect_gan_artifacts_advanced(img_array):
     
     # 3. Texture regularity (GANs often produce overly regular textures)
     # Use Local Binary Patterns
-    radius = 1
-    n_points = 8 * radius
-    lbp = feature.local_binary_pattern(gray, n_points, radius, method='uniform')
+    lbp = ctx.lbp(1)
     
     # Calculate LBP histogram
     hist, _ = np.histogram(lbp, bins=int(lbp.max() + 1), density=True)
@@ -710,7 +926,7 @@ def detect_gan_artifacts_advanced(img_array):
         'mode_collapse_indicators': mode_collapse
     }
 
-def analyze_diffusion_artifacts(img_array):
+def analyze_diffusion_artifacts(img_array, ctx=None):
     """
     Detect artifacts specific to diffusion models
     """
@@ -722,11 +938,8 @@ def analyze_diffusion_artifacts(img_array):
             'high_frequency_anomalies': False
         }
     
-    # Convert to grayscale
-    if len(img_array.shape) == 3:
-        gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = img_array
+    ctx = ctx or ImageFeatureContext(img_array)
+    gray = ctx.gray
     
     # 1. Analyze noise consistency across scales
     noise_scores = []
@@ -744,8 +957,7 @@ def analyze_diffusion_artifacts(img_array):
     
     # 2. Analyze blur patterns
     # Diffusion models sometimes have characteristic blur
-    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-    blur_variance = laplacian.var()
+    blur_variance = ctx.laplacian.var()
     
     if blur_variance < 100:
         blur_patterns = 'Excessive blur (possible diffusion)'
@@ -756,8 +968,7 @@ def analyze_diffusion_artifacts(img_array):
     
     # 3. High-frequency analysis
     # Diffusion models may lack proper high-frequency details
-    f_transform = np.fft.fft2(gray)
-    f_shift = np.fft.fftshift(f_transform)
+    f_shift = ctx.fft_shifted
     
     # Analyze high-frequency components
     h, w = gray.shape
@@ -789,7 +1000,7 @@ def analyze_diffusion_artifacts(img_array):
         'high_frequency_anomalies': high_frequency_anomalies
     }
 
-def enhanced_deepfake_detection(img_cv2):
+def enhanced_deepfake_detection(img_cv2, ctx=None):
     """
     Enhanced deepfake detection with facial landmark analysis
     """
@@ -805,6 +1016,9 @@ def enhanced_deepfake_detection(img_cv2):
         }
     
     try:
+        if ctx is not None:
+            img_cv2 = ctx.gray
+        
         # Load face cascade
         face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
@@ -920,7 +1134,7 @@ def enhanced_deepfake_detection(img_cv2):
             'confidence': 0.9
         }
 
-def analyze_reflection_consistency(img_array):
+def analyze_reflection_consistency(img_array, ctx=None):
     """
     Check for reflection and shadow consistency
     """
@@ -931,7 +1145,7 @@ def analyze_reflection_consistency(img_array):
             'anomalies': []
         }
     
-    gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
+    gray = (ctx or ImageFeatureContext(img_array)).gray
     
     # Find potential reflective surfaces (bright smooth areas)
     _, bright = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)
@@ -987,15 +1201,17 @@ def analyze_reflection_consistency(img_array):
     }
 
 # Update the main detection functions
-def detect_ai_generation_patterns(img_gray, compression, noise, frequency, edges, colors):
+def detect_ai_generation_patterns(img_gray, compression, noise, frequency, edges, colors, ctx=None,
+                                  benford=None, gan_advanced=None, diffusion=None):
     """Enhanced AI detection with new algorithms"""
     # Get results from existing analysis
     model_scores = {}
+    ctx = ctx or ImageFeatureContext(img_gray, img_gray)
     
-    # Perform additional advanced analysis
-    benford = analyze_benford_law(img_gray)
-    gan_advanced = detect_gan_artifacts_advanced(img_gray)
-    diffusion = analyze_diffusion_artifacts(img_gray)
+    # Perform additional advanced analysis (reuse results if already computed)
+    benford = benford or analyze_benford_law(img_gray, ctx=ctx)
+    gan_advanced = gan_advanced or detect_gan_artifacts_advanced(img_gray, ctx=ctx)
+    diffusion = diffusion or analyze_diffusion_artifacts(img_gray, ctx=ctx)
     
     # DALL-E detection (enhanced)
     dalle_score = 0
@@ -1216,28 +1432,79 @@ def perform_realistic_image_analysis(image_data, is_pro=False):
     """
     try:
         # Decode and prepare image
-        image, img_array, img_cv2, file_size = prepare_image_for_analysis(image_data)
+        image, img_array, img_cv2, file_size, pyramid = prepare_image_for_analysis(image_data)
         
         # Get image properties
         width, height = image.size
         format = image.format or 'Unknown'
         mode = image.mode
         
-        # Perform various analyses (existing)
-        metadata = extract_real_metadata(image)
-        compression_analysis = analyze_compression_artifacts(img_cv2)
-        noise_analysis = analyze_noise_patterns(img_cv2)
-        frequency_analysis = analyze_frequency_domain(img_cv2)
-        edge_analysis = analyze_edges_and_boundaries(img_cv2)
-        color_analysis = analyze_color_distribution(img_array)
-        texture_analysis = analyze_texture_patterns(img_cv2)
+        # Each detector runs at the scale it declares in DETECTOR_SCALES;
+        # derived features (grayscale, FFT, Laplacian, edges, LBP) are
+        # computed once per level and shared
+        detectors_run = []
+        
+        def level_for(detector):
+            detectors_run.append(detector)
+            return pyramid.for_detector(detector)
         
-        # Add new advanced analyses
-        benford_analysis = analyze_benford_law(img_array)
-        chromatic_aberration = analyze_chromatic_aberration(img_array)
-        jpeg_ghosts = detect_jpeg_ghosts(img_array)
-        lighting_consistency = analyze_lighting_consistency(img_array)
-        reflection_analysis = analyze_reflection_consistency(img_array)
+        # Independent detectors run concurrently; AI generation scoring waits
+        # for the analyses it combines
+        stages = [
+            Stage('metadata', lambda _: extract_real_metadata(image)),
+            Stage('compression', lambda _, c=level_for('compression'): analyze_compression_artifacts(c.gray)),
+            Stage('noise', lambda _, c=level_for('noise'): analyze_noise_patterns(c.gray, ctx=c)),
+            Stage('frequency', lambda _, c=level_for('frequency'): analyze_frequency_domain(c.gray, ctx=c)),
+            Stage('edges', lambda _, c=level_for('edges'): analyze_edges_and_boundaries(c.gray, ctx=c)),
+            Stage('color', lambda _, c=level_for('color'): analyze_color_distribution(c.img_array)),
+            Stage('texture', lambda _, c=level_for('texture'): analyze_texture_patterns(c.gray, ctx=c)),
+            Stage('benford', lambda _, c=level_for('benford'): analyze_benford_law(c.img_array, ctx=c)),
+            Stage('chromatic_aberration',
+                  lambda _, c=level_for('chromatic_aberration'): analyze_chromatic_aberration(c.img_array)),
+            Stage('jpeg_ghosts', lambda _, c=level_for('jpeg_ghosts'): detect_jpeg_ghosts(c.img_array, ctx=c)),
+            Stage('lighting', lambda _, c=level_for('lighting'): analyze_lighting_consistency(c.img_array, ctx=c)),
+            Stage('reflection',
+                  lambda _, c=level_for('reflection'): analyze_reflection_consistency(c.img_array, ctx=c)),
+            Stage('gan', lambda _, c=level_for('gan'): detect_gan_artifacts_advanced(c.gray, ctx=c)),
+            Stage('diffusion', lambda _, c=level_for('diffusion'): analyze_diffusion_artifacts(c.gray, ctx=c)),
+            Stage('ai_generation',
+                  lambda r, c=level_for('ai_generation'): detect_ai_generation_patterns(
+                      c.gray, r['compression'], r['noise'], r['frequency'], r['edges'], r['color'],
+                      ctx=c, benford=r['benford'], gan_advanced=r['gan'], diffusion=r['diffusion']
+                  ),
+                  depends_on=['compression', 'noise', 'frequency', 'edges', 'color', 'benford', 'gan', 'diffusion'])
+        ]
+        if is_pro:
+            stages.append(Stage('benford_block', lambda _, c=level_for('benford_block'):
+                                analyze_benford_law(c.img_array, block_mode=True, ctx=c)))
+            stages.append(Stage('deepfake', lambda _, c=level_for('deepfake'):
+                                enhanced_deepfake_detection(c.gray, ctx=c)))
+        
+        detector_results = get_detector_executor().run_all(stages, parallel=IMAGE_DETECTOR_MODE == 'parallel')
+        
+        def outcome(name):
+            result = detector_results.get(name)
+            if result is None:
+                return None
+            if result['status'] == 'completed':
+                return result['result']
+            if name in REQUIRED_DETECTORS:
+                raise RuntimeError(f"Image detector {name} {result['status']}: {result['error']}")
+            return None
+        
+        metadata = outcome('metadata')
+        compression_analysis = outcome('compression')
+        noise_analysis = outcome('noise')
+        frequency_analysis = outcome('frequency')
+        edge_analysis = outcome('edges')
+        texture_analysis = outcome('texture')
+        benford_analysis = outcome('benford')
+        benford_block_analysis = outcome('benford_block')
+        chromatic_aberration = outcome('chromatic_aberration')
+        jpeg_ghosts = outcome('jpeg_ghosts')
+        lighting_consistency = outcome('lighting')
+        reflection_analysis = outcome('reflection')
+        ai_detection = outcome('ai_generation')
         
         # Enhanced compression analysis with JPEG ghosts
         compression_analysis['jpeg_ghosts'] = jpeg_ghosts
@@ -1245,12 +1512,6 @@ def perform_realistic_image_analysis(image_data, is_pro=False):
         # Enhanced edge analysis with chromatic aberration
         edge_analysis['chromatic_aberration'] = chromatic_aberration
         
-        # AI detection using multiple methods (enhanced)
-        ai_detection = detect_ai_generation_patterns(
-            img_cv2, compression_analysis, noise_analysis, 
-            frequency_analysis, edge_analysis, color_analysis
-        )
-        
         # Calculate manipulation score based on all analyses (enhanced)
         manipulation_indicators = calculate_manipulation_indicators(
             compression_analysis, noise_analysis, frequency_analysis, 
@@ -1261,9 +1522,7 @@ def perform_realistic_image_analysis(image_data, is_pro=False):
         authenticity_score = 100 - manipulation_score
         
         # Enhanced deepfake analysis
-        deepfake_results = None
-        if is_pro:
-            deepfake_results = enhanced_deepfake_detection(img_cv2)
+        deepfake_results = outcome('deepfake') if is_pro else None
         
         # Build comprehensive response
         analysis_result = {
@@ -1302,6 +1561,7 @@ def perform_realistic_image_analysis(image_data, is_pro=False):
             } if is_pro else None,
             'advanced_forensics': {
                 'benford_law_analysis': benford_analysis,
+                'benford_law_block_analysis': benford_block_analysis,
                 'chromatic_aberration': chromatic_aberration,
                 'lighting_consistency': lighting_consistency,
                 'reflection_analysis': reflection_analysis
@@ -1314,6 +1574,15 @@ def perform_realistic_image_analysis(image_data, is_pro=False):
                 'aspect_ratio': f"{width//math.gcd(width, height)}:{height//math.gcd(width, height)}",
                 'dpi': image.info.get('dpi', (72, 72))[0] if image.info.get('dpi') else 72
             },
+            'analysis_resolution': pyramid.describe(detectors_run),
+            'detector_execution': {
+                'mode': IMAGE_DETECTOR_MODE,
+                'timings_ms': {name: result['duration_ms'] for name, result in detector_results.items()},
+                'errors': {
+                    name: f"{result['status']}: {result['error']}"
+                    for name, result in detector_results.items() if result['status'] != 'completed'
+                }
+            },
             'confidence_metrics': {
                 'overall_confidence': calculate_analysis_confidence(manipulation_indicators, ai_detection),
                 'model_agreement': ai_detection['model_agreement'],
@@ -9,15 +9,21 @@ import os
 import json
 import logging
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import re
 import time
+import threading
 
 # CORRECT OpenAI import for version 0.28.1
 import openai
 
+from analysis.html_document import HTMLDocument
+from services.claim_store import get_claim_store, FACT_CHECK_ORIGINS
+from services.fact_check_client import get_fact_check_client
+from services.http_fetcher import get_http_fetcher
+from services.page_cache import get_page_cache
+from utils.keyword_matcher import KeywordMatcher
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -37,6 +43,21 @@ except ImportError as e:
 except Exception as e:
     logger.error(f"✗ Unexpected error importing playwright_extractor: {str(e)}")
 
+# Domains whose articles usually need a real browser; the Playwright render is
+# started alongside the plain fetch instead of after it fails
+PLAYWRIGHT_RACE_DOMAINS = {
+    domain.strip() for domain in os.environ.get('PLAYWRIGHT_RACE_DOMAINS', 'politico.com,axios.com').split(',')
+    if domain.strip()
+}
+
+# Keyword groups for fallback_analysis
+FALLBACK_KEYWORD_MATCHER = KeywordMatcher({
+    'left': ['progressive', 'liberal', 'democrat', 'left-wing', 'socialist', 'equity', 'climate crisis'],
+    'right': ['conservative', 'republican', 'right-wing', 'traditional', 'libertarian', 'freedom', 'patriot'],
+    'sensational': ['breaking', 'urgent', 'alert', 'shocking', 'bombshell'],
+    'us_vs_them': ['they', 'them', 'elites', 'establishment']
+})
+
 # Helper functions for extraction
 def _extract_text_from_object(obj):
     """Helper to extract text from nested objects/arrays"""
@@ -154,7 +175,7 @@ def extract_generic_simple(url, domain=None):
             'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1'
         ]
         
-        session = requests.Session()
+        fetcher = get_http_fetcher()
         
         for user_agent in user_agents:
             try:
@@ -167,30 +188,18 @@ def extract_generic_simple(url, domain=None):
                     'Cache-Control': 'no-cache'
                 }
                 
-                response = session.get(url, headers=headers, timeout=10, allow_redirects=True)
+                response = fetcher.fetch(url, headers=headers, timeout=10)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Remove unwanted elements
-                    for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'form', 'button']):
-                        element.decompose()
+                    document = HTMLDocument.for_page(response, url)
                     
                     # STRATEGY 1: Look for JSON-LD structured data (works for many modern sites)
-                    json_ld_data = None
-                    for script in soup.find_all('script', type='application/ld+json'):
-                        try:
-                            data = json.loads(script.string)
-                            if isinstance(data, dict) and data.get('@type') in ['NewsArticle', 'Article', 'BlogPosting']:
-                                json_ld_data = data
-                                break
-                            elif isinstance(data, list):
-                                for item in data:
-                                    if isinstance(item, dict) and item.get('@type') in ['NewsArticle', 'Article', 'BlogPosting']:
-                                        json_ld_data = item
-                                        break
-                        except:
-                            continue
+                    # (captured at parse time, before scripts are stripped below)
+                    articles = document.article_json_ld()
+                    json_ld_data = articles[0] if articles else None
+                    
+                    # Remove unwanted elements
+                    soup = document.content_soup
                     
                     # Extract from JSON-LD if found
                     if json_ld_data:
@@ -412,7 +421,8 @@ class NewsAnalyzer:
     """Main class for analyzing news articles"""
     
     def __init__(self):
-        self.session = requests.Session()
+        # Backed by the shared keep-alive connection pool
+        self.session = get_http_fetcher().new_session()
         # Enhanced headers to avoid being blocked
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -557,92 +567,91 @@ class NewsAnalyzer:
         fact_check_results = []
         
         try:
-            # Google Fact Check API endpoint
-            base_url = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+            # Claims a fact-checker already resolved (or a near-identical
+            # paraphrase) skip the API; model verdicts from speech checks don't count
+            claim_store = get_claim_store()
+            known = {}
+            for claim in claims[:5]:
+                match = claim_store.match(claim, origins=FACT_CHECK_ORIGINS)
+                if match:
+                    known[claim] = match
+            
+            # Check the rest concurrently; the shared client rate-limits,
+            # deduplicates and caches verdicts
+            lookups = iter(get_fact_check_client().lookup([claim for claim in claims[:5] if claim not in known]))
             
-            # Check each claim (limit to first 5 to avoid rate limits)
             for claim in claims[:5]:
-                try:
-                    # Make API request
-                    params = {
-                        'key': GOOGLE_FACT_CHECK_API_KEY,
-                        'query': claim,
-                        'languageCode': 'en'
-                    }
+                if claim in known:
+                    match = known[claim]
+                    fact_check_results.append({
+                        'claim': claim,
+                        'verdict': match['verdict'],
+                        'explanation': match['explanation'],
+                        'source': match['source'],
+                        'matched_claim': match['matched_claim'],
+                        'similarity': match['similarity']
+                    })
+                    continue
+                
+                lookup = next(lookups)
+                
+                if lookup['status'] == 'found':
+                    # Get the most relevant fact check
+                    top_result = lookup['top_claim']
                     
-                    response = self.session.get(base_url, params=params, timeout=5)
+                    # Extract verdict from the first review
+                    verdict = 'unverified'
+                    explanation = 'No fact check found'
+                    source = 'Unknown'
                     
-                    if response.status_code == 200:
-                        data = response.json()
+                    if 'claimReview' in top_result and top_result['claimReview']:
+                        review = top_result['claimReview'][0]
                         
-                        # Process fact check results
-                        if 'claims' in data and data['claims']:
-                            # Get the most relevant fact check
-                            top_result = data['claims'][0]
-                            
-                            # Extract verdict from the first review
-                            verdict = 'unverified'
-                            explanation = 'No fact check found'
-                            source = 'Unknown'
-                            
-                            if 'claimReview' in top_result and top_result['claimReview']:
-                                review = top_result['claimReview'][0]
-                                
-                                # Get the rating
-                                if 'textualRating' in review:
-                                    rating = review['textualRating'].lower()
-                                    
-                                    # Map ratings to simple verdicts
-                                    if any(word in rating for word in ['false', 'incorrect', 'wrong', 'misleading']):
-                                        verdict = 'false'
-                                    elif any(word in rating for word in ['true', 'correct', 'accurate']):
-                                        verdict = 'true'
-                                    elif any(word in rating for word in ['partly', 'mixed', 'partially']):
-                                        verdict = 'partially_true'
-                                    else:
-                                        verdict = 'unverified'
-                                
-                                # Get explanation
-                                if 'title' in review:
-                                    explanation = review['title']
-                                
-                                # Get source
-                                if 'publisher' in review and 'name' in review['publisher']:
-                                    source = review['publisher']['name']
+                        # Get the rating
+                        if 'textualRating' in review:
+                            rating = review['textualRating'].lower()
                             
-                            fact_check_results.append({
-                                'claim': claim,
-                                'verdict': verdict,
-                                'explanation': explanation,
-                                'source': source,
-                                'api_response': top_result  # Include full response for debugging
-                            })
-                        else:
-                            # No fact check found for this claim
-                            fact_check_results.append({
-                                'claim': claim,
-                                'verdict': 'unverified',
-                                'explanation': 'No fact check available for this claim',
-                                'source': 'Google Fact Check API'
-                            })
-                    else:
-                        logger.warning(f"Google Fact Check API error: {response.status_code}")
-                        fact_check_results.append({
-                            'claim': claim,
-                            'verdict': 'unverified',
-                            'explanation': 'Fact check service unavailable',
-                            'source': 'Error'
-                        })
-                    
-                    # Small delay to avoid rate limiting
-                    time.sleep(0.5)
+                            # Map ratings to simple verdicts
+                            if any(word in rating for word in ['false', 'incorrect', 'wrong', 'misleading']):
+                                verdict = 'false'
+                            elif any(word in rating for word in ['true', 'correct', 'accurate']):
+                                verdict = 'true'
+                            elif any(word in rating for word in ['partly', 'mixed', 'partially']):
+                                verdict = 'partially_true'
+                            else:
+                                verdict = 'unverified'
+                        
+                        # Get explanation
+                        if 'title' in review:
+                            explanation = review['title']
+                        
+                        # Get source
+                        if 'publisher' in review and 'name' in review['publisher']:
+                            source = review['publisher']['name']
                     
-                except Exception as e:
-                    logger.error(f"Error checking claim: {str(e)}")
+                    fact_check_results.append({
+                        'claim': claim,
+                        'verdict': verdict,
+                        'explanation': explanation,
+                        'source': source,
+                        'api_response': top_result  # Include full response for debugging
+                    })
+                    claim_store.record(claim, verdict, source=source, explanation=explanation,
+                                       origin='google_fact_check')
+                elif lookup['status'] == 'not_found':
+                    # No fact check found for this claim
                     fact_check_results.append({
                         'claim': claim,
                         'verdict': 'unverified',
-                        'explanation': 'Error during fact checking',
+                        'explanation': 'No fact check available for this claim',
+                        'source': 'Google Fact Check API'
+                    })
+                else:
+                    logger.warning(f"Google Fact Check API error: {lookup.get('error')}")
+                    fact_check_results.append({
+                        'claim': claim,
+                        'verdict': 'unverified',
+                        'explanation': 'Fact check service unavailable',
                         'source': 'Error'
                     })
             
@@ -804,6 +813,21 @@ class NewsAnalyzer:
             domain = urlparse(url).netloc.replace('www.', '')
             logger.info(f"Domain: {domain}")
             
+            # Trending URLs: a fresh cached extraction skips network and parsing
+            page_cache = get_page_cache()
+            cached = page_cache.lookup(url, 'news_analyzer')
+            if cached:
+                logger.info(f"Using cached extraction for {url}")
+                return cached
+            
+            # Race the browser render against the plain fetch for domains that
+            # usually need it
+            playwright_future = None
+            playwright_cancel = threading.Event()
+            if PLAYWRIGHT_AVAILABLE and extract_with_playwright and domain in PLAYWRIGHT_RACE_DOMAINS:
+                logger.info(f"Starting Playwright extraction for {domain} in parallel")
+                playwright_future = get_http_fetcher().submit(extract_with_playwright, url, playwright_cancel)
+            
             # Try standard extraction first
             response = None
             article_text = ""
@@ -817,12 +841,21 @@ class NewsAnalyzer:
                     logger.error(f"Extraction exceeded time limit for {url}")
                     return None
                 
-                # Set a connection timeout and read timeout
-                response = self.session.get(url, timeout=(3, 5), allow_redirects=True)
+                # Set a connection timeout and read timeout (conditional GET
+                # when a cached copy exists)
+                response = page_cache.fetch(url, timeout=(3, 5))
+                
+                # Unchanged page - reuse the extraction made from it
+                cached = page_cache.get_extraction(response, 'news_analyzer')
+                if cached:
+                    # Frees the browser slot even if the render has started
+                    playwright_cancel.set()
+                    return cached
                 
                 if response.status_code == 200:
-                    # Parse with BeautifulSoup
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    # Parse once; reused by every selector below
+                    document = HTMLDocument.for_page(response, url)
+                    soup = document.soup
                     
                     # Extract title - try multiple methods
                     title_selectors = [
@@ -856,8 +889,7 @@ class NewsAnalyzer:
                     article_text = ""
                     
                     # Remove script, style, and other non-content elements
-                    for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'form', 'button']):
-                        element.decompose()
+                    soup = document.content_soup
                     
                     # Site-specific selectors for major news sites
                     site_specific_selectors = {
@@ -1084,7 +1116,8 @@ class NewsAnalyzer:
                     # If we got good content, return it
                     if article_text and len(article_text) > 200:
                         logger.info(f"Successfully extracted {len(article_text)} chars from {domain}")
-                        return {
+                        playwright_cancel.set()
+                        result = {
                             'url': url,
                             'domain': domain,
                             'title': title,
@@ -1092,6 +1125,8 @@ class NewsAnalyzer:
                             'publish_date': publish_date,
                             'author': author
                         }
+                        page_cache.store_extraction(url, 'news_analyzer', result, response)
+                        return result
                         
             except Exception as e:
                 logger.info(f"Standard extraction failed: {str(e)}")
@@ -1103,11 +1138,19 @@ class NewsAnalyzer:
             if PLAYWRIGHT_AVAILABLE and extract_with_playwright:
                 logger.info(f"Attempting Playwright extraction for {domain}")
                 try:
-                    playwright_result = extract_with_playwright(url)
+                    if playwright_future is not None:
+                        # Already rendering since the start of extraction
+                        playwright_result = playwright_future.result(
+                            timeout=max(1, max_duration - (time.time() - start_time))
+                        )
+                    else:
+                        playwright_result = extract_with_playwright(url)
                     if playwright_result:
                         logger.info(f"Playwright extraction successful for {domain}")
+                        page_cache.store_extraction(url, 'news_analyzer', playwright_result)
                         return playwright_result
                 except Exception as e:
+                    playwright_cancel.set()
                     logger.error(f"Playwright extraction error: {str(e)}")
             
             # Try simple extractor as final fallback
@@ -1116,6 +1159,7 @@ class NewsAnalyzer:
                 simple_result = extract_generic_simple(url, domain)
                 if simple_result:
                     logger.info(f"Simple extractor succeeded for {domain}")
+                    page_cache.store_extraction(url, 'news_analyzer', simple_result)
                     return simple_result
             except Exception as e:
                 logger.error(f"Simple extractor error: {str(e)}")
@@ -1236,12 +1280,9 @@ class NewsAnalyzer:
         
         # Basic bias detection
         bias_score = 0
-        left_keywords = ['progressive', 'liberal', 'democrat', 'left-wing', 'socialist', 'equity', 'climate crisis']
-        right_keywords = ['conservative', 'republican', 'right-wing', 'traditional', 'libertarian', 'freedom', 'patriot']
-        
-        text_lower = text.lower()
-        left_count = sum(1 for keyword in left_keywords if keyword in text_lower)
-        right_count = sum(1 for keyword in right_keywords if keyword in text_lower)
+        keyword_hits = FALLBACK_KEYWORD_MATCHER.category_counts(text)
+        left_count = keyword_hits.get('left', 0)
+        right_count = keyword_hits.get('right', 0)
         
         if left_count > right_count * 1.5:
             bias_score = -0.5
@@ -1267,9 +1308,9 @@ class NewsAnalyzer:
             manipulation_tactics.append('Excessive capitalization')
         if len(re.findall(r'!{2,}', text)) > 0:
             manipulation_tactics.append('Multiple exclamation marks')
-        if any(word in text_lower for word in ['breaking', 'urgent', 'alert', 'shocking', 'bombshell']):
+        if keyword_hits.get('sensational'):
             manipulation_tactics.append('Sensational language')
-        if any(word in text_lower for word in ['they', 'them', 'elites', 'establishment']) and not article_data.get('title'):
+        if keyword_hits.get('us_vs_them') and not article_data.get('title'):
             manipulation_tactics.append('Us vs. them rhetoric')
         
         # Extract key claims (simple extraction)
@@ -1320,6 +1361,23 @@ class NewsAnalyzer:
             'type': 'Unknown'
         })
 
+_shared_analyzer = None
+_shared_analyzer_lock = threading.Lock()
+
+def get_news_analyzer():
+    """
+    Return the process-wide NewsAnalyzer
+    
+    The analyzer keeps no per-request state, so one instance (and its pooled
+    session) is shared by every request and worker thread.
+    """
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        with _shared_analyzer_lock:
+            if _shared_analyzer is None:
+                _shared_analyzer = NewsAnalyzer()
+    return _shared_analyzer
+
 def analyze_news_route(content, is_pro=True):
     """
     Route function for Flask endpoint
@@ -1331,7 +1389,7 @@ def analyze_news_route(content, is_pro=True):
     Returns:
         dict: Analysis results
     """
-    analyzer = NewsAnalyzer()
+    analyzer = get_news_analyzer()
     
     # Determine content type
     content_type = 'url' if content.startswith(('http://', 'https://')) else 'text'
@@ -1342,5 +1400,5 @@ def analyze_news_route(content, is_pro=True):
 # NEW: Additional utility functions for trending news
 def get_trending_news_route(country='us', category='general'):
     """Get trending news articles"""
-    analyzer = NewsAnalyzer()
+    analyzer = get_news_analyzer()
     return analyzer.get_trending_news(country, category)
@@ -1,14 +1,53 @@
 """
 Speech analysis module - Fact-checking and transcript processing
 """
+import os
 import re
+import json
+import hashlib
 import secrets
+import threading
+from collections import deque
 from datetime import datetime
-from flask import request, jsonify
+from flask import request, jsonify, Response, stream_with_context
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
+from utils.keyword_matcher import KeywordMatcher
 from utils.text_utils import extract_youtube_video_id
-from analysis.news_analysis import NewsAnalyzer
+from analysis.news_analysis import get_news_analyzer
+from services.claim_store import get_claim_store
+from services.fact_check_client import normalize_claim
+from services.stage_executor import Stage, StageExecutor
+
+SPEECH_FACTCHECK_TIMEOUT = float(os.environ.get('SPEECH_FACTCHECK_TIMEOUT', 30))
+SPEECH_FACTCHECK_BATCH_LIMIT = int(os.environ.get('SPEECH_FACTCHECK_BATCH_LIMIT', 10))
+# How long a claim may wait for a free worker; a full stream of claims takes
+# several rounds of the pool
+SPEECH_FACTCHECK_QUEUE_WAIT = float(os.environ.get('SPEECH_FACTCHECK_QUEUE_WAIT', 120))
+
+# Live transcript streaming
+STREAM_WINDOW_WORDS = int(os.environ.get('SPEECH_STREAM_WINDOW_WORDS', 40))
+STREAM_OVERLAP_WORDS = int(os.environ.get('SPEECH_STREAM_OVERLAP_WORDS', 8))
+STREAM_MAX_CLAIMS = int(os.environ.get('SPEECH_STREAM_MAX_CLAIMS', 50))
+STREAM_SEEN_LIMIT = 500
+STREAM_MAX_CARRY_CHARS = 4000
+SENTENCE_END = re.compile(r'[.!?]+(?=\s|$)')
+
+# Claim indicators for speech
+SPEECH_CLAIM_MATCHER = KeywordMatcher({
+    'statistics': [
+        re.compile(r'\d+\.?\d*\s*(?:percent|%)', re.IGNORECASE),
+        re.compile(r'\d+\.?\d*\s*(?:million|billion|trillion)', re.IGNORECASE),
+    ],
+    'comparisons': ['more than', 'less than', 'increased', 'decreased', 'doubled', 'tripled'],
+    'absolutes': ['always', 'never', 'every', 'none', 'all', 'no one'],
+    'citations': ['according to', 'studies show', 'research indicates', 'data shows'],
+    'temporal': ['first', 'last', 'newest', 'oldest', 'recently', 'historically'],
+    'records': ['highest', 'lowest', 'biggest', 'smallest', 'record', 'unprecedented']
+})
+
+_factcheck_executor = None
+_factcheck_executor_lock = threading.Lock()
 
 def extract_claims_from_speech(text, mode='balanced'):
     """
@@ -16,33 +55,24 @@ def extract_claims_from_speech(text, mode='balanced'):
     More aggressive than news analysis for real-time checking
     """
     claims = []
-    sentences = re.split(r'[.!?]+', text)
-    
-    # Claim indicators for speech
-    indicators = {
-        'statistics': [r'\d+\.?\d*\s*(?:percent|%)', r'\d+\.?\d*\s*(?:million|billion|trillion)'],
-        'comparisons': ['more than', 'less than', 'increased', 'decreased', 'doubled', 'tripled'],
-        'absolutes': ['always', 'never', 'every', 'none', 'all', 'no one'],
-        'citations': ['according to', 'studies show', 'research indicates', 'data shows'],
-        'temporal': ['first', 'last', 'newest', 'oldest', 'recently', 'historically'],
-        'records': ['highest', 'lowest', 'biggest', 'smallest', 'record', 'unprecedented']
-    }
+    sentences = [sentence.strip() for sentence in re.split(r'[.!?]+', text)]
+    sentences = [sentence for sentence in sentences if len(sentence.split()) >= 5]  # Skip very short sentences
     
+    # Score every sentence in one scan; NUL keeps matches inside their sentence
+    spans = []
+    offset = 0
     for sentence in sentences:
-        sentence = sentence.strip()
-        if len(sentence.split()) < 5:  # Skip very short sentences
-            continue
-            
-        # Check for claim indicators
-        claim_score = 0
-        for category, patterns in indicators.items():
-            for pattern in patterns:
-                if isinstance(pattern, str):
-                    if pattern.lower() in sentence.lower():
-                        claim_score += 1
-                else:  # regex pattern
-                    if re.search(pattern, sentence, re.IGNORECASE):
-                        claim_score += 2
+        spans.append((offset, offset + len(sentence)))
+        offset += len(sentence) + 1
+    hits = SPEECH_CLAIM_MATCHER.span_terms('\0'.join(sentences), spans)
+    
+    for sentence, terms in zip(sentences, hits):
+        # Keywords score 1, regex patterns 2
+        claim_score = sum(
+            2 if term in SPEECH_CLAIM_MATCHER.pattern_terms else 1
+            for category_terms in terms.values()
+            for term in category_terms
+        )
         
         # Add claim based on mode
         if mode == 'aggressive' and claim_score > 0:
@@ -51,8 +81,11 @@ def extract_claims_from_speech(text, mode='balanced'):
             claims.append(sentence)
         elif mode == 'conservative' and claim_score > 2:
             claims.append(sentence)
+        
+        if len(claims) >= 20:  # Limit to prevent overload
+            break
     
-    return claims[:20]  # Limit to prevent overload
+    return claims
 
 def speech_to_text():
     """
@@ -77,99 +110,385 @@ def speech_to_text():
         print(f"Speech to text error: {e}")
         return jsonify({'error': 'Speech processing failed'}), 500
 
+class TranscriptStream:
+    """
+    Incremental claim detection over a transcript that arrives in pieces
+    
+    Only text that has not been scanned yet is run through
+    extract_claims_from_speech: completed sentences are scanned once and the
+    unfinished tail is carried to the next chunk. Unpunctuated captions are
+    cut into rolling windows of STREAM_WINDOW_WORDS, overlapping by
+    STREAM_OVERLAP_WORDS so a claim straddling a cut is still seen whole.
+    Claims already reported are remembered by hash and never re-emitted.
+    
+    The state is small (carried text, counters, claim hashes) and is
+    returned to the client after every chunk, so the next chunk can be
+    served by any worker.
+    """
+    
+    def __init__(self, stream_id=None, mode='balanced', carry='', seen=None, claims_detected=0, words_scanned=0):
+        self.stream_id = stream_id or secrets.token_urlsafe(16)
+        self.mode = mode
+        self.carry = carry
+        self.seen = deque(seen or [], maxlen=STREAM_SEEN_LIMIT)
+        self._seen_set = set(self.seen)
+        self.claims_detected = claims_detected
+        self.words_scanned = words_scanned
+    
+    @classmethod
+    def from_state(cls, state, mode='balanced'):
+        """Resume a stream from the state returned with the previous chunk"""
+        state = state if isinstance(state, dict) else {}
+        return cls(
+            stream_id=state.get('stream_id'),
+            mode=state.get('mode', mode),
+            carry=str(state.get('carry', ''))[:STREAM_MAX_CARRY_CHARS],
+            seen=[str(key) for key in state.get('seen', [])][-STREAM_SEEN_LIMIT:],
+            claims_detected=int(state.get('claims_detected', 0)),
+            words_scanned=int(state.get('words_scanned', 0))
+        )
+    
+    def state(self):
+        return {
+            'stream_id': self.stream_id,
+            'mode': self.mode,
+            'carry': self.carry,
+            'seen': list(self.seen),
+            'claims_detected': self.claims_detected,
+            'words_scanned': self.words_scanned
+        }
+    
+    def feed(self, text, start=None):
+        """Add transcript text; return the claims completed by it"""
+        self.carry = f"{self.carry} {text}".strip() if text else self.carry
+        return self._detect(self._take_units(final=False), start)
+    
+    def flush(self, start=None):
+        """Scan whatever is left at the end of the transcript"""
+        return self._detect(self._take_units(final=True), start)
+    
+    def _take_units(self, final):
+        units = []
+        
+        # Everything up to the last sentence terminator is complete
+        last_end = None
+        for match in SENTENCE_END.finditer(self.carry):
+            last_end = match.end()
+        if last_end:
+            units.append(self.carry[:last_end])
+            self.carry = self.carry[last_end:].strip()
+        
+        # Captions rarely carry punctuation; scan them in overlapping windows
+        words = self.carry.split()
+        while len(words) >= STREAM_WINDOW_WORDS:
+            units.append(' '.join(words[:STREAM_WINDOW_WORDS]))
+            words = words[STREAM_WINDOW_WORDS - STREAM_OVERLAP_WORDS:]
+        self.carry = ' '.join(words)
+        
+        if final and self.carry:
+            units.append(self.carry)
+            self.carry = ''
+        return units
+    
+    def _detect(self, units, start):
+        claims = []
+        for unit in units:
+            self.words_scanned += len(unit.split())
+            for claim in extract_claims_from_speech(unit, self.mode):
+                key = hashlib.sha1(normalize_claim(claim).encode('utf-8')).hexdigest()[:12]
+                if key in self._seen_set:
+                    continue
+                if len(self.seen) == self.seen.maxlen:
+                    self._seen_set.discard(self.seen[0])
+                self.seen.append(key)
+                self._seen_set.add(key)
+                claims.append({'index': self.claims_detected, 'claim': claim, 'start': start})
+                self.claims_detected += 1
+        return claims
+
 def stream_transcript():
     """
-    Handle streaming audio transcription
-    This would typically use WebSockets in production
+    Incrementally fact-check a live transcript over server-sent events
+    
+    POST either a YouTube "url" (its caption segments are fed in order) or
+    transcript "chunks" (whole words or caption segments, joined with a
+    space; strings or {"text", "start"} objects, optionally
+    with the "state" returned for the previous chunk and "final": true on
+    the last one). Events: "claim" as soon as a claim is detected,
+    "verdict" as each fact-check completes, then "state" and "complete".
+    Each claim's fact-check has its own deadline, counted from when it
+    starts on the fact-check pool.
     """
     try:
-        data = request.get_json()
-        stream_url = data.get('stream_url')
+        data = request.get_json() or {}
+        mode = data.get('mode', 'balanced')
+        stream = TranscriptStream.from_state(data.get('state'), mode=mode)
+        final = bool(data.get('final', False))
         
-        # Placeholder for stream processing
-        return jsonify({
-            'success': True,
-            'message': 'Stream processing started',
-            'stream_id': secrets.token_urlsafe(16)
-        })
+        if data.get('url'):
+            video_id = extract_youtube_video_id(data['url'])
+            if not video_id:
+                return jsonify({'error': 'Invalid YouTube URL'}), 400
+            transcript = find_youtube_transcript(video_id, data.get('language', 'en'))
+            if not transcript:
+                return jsonify({'error': 'No transcript available for this video'}), 404
+            pieces = [(segment['text'], segment['start']) for segment in transcript.fetch()]
+            final = True
+        else:
+            chunks = data.get('chunks')
+            if chunks is None:
+                chunks = [data.get('text', '')]
+            pieces = [
+                (chunk.get('text', ''), chunk.get('start')) if isinstance(chunk, dict) else (str(chunk), None)
+                for chunk in chunks
+            ]
+        
+        def event(payload):
+            payload['stream_id'] = stream.stream_id
+            return f"data: {json.dumps(payload)}\n\n"
+        
+        def generate():
+            analyzer = get_news_analyzer()
+            checking = {}  # stage name -> claim
+            stages = []
+            checked = 0
+            
+            def dispatch(claims):
+                # Claims are reported as soon as they are detected; scanning
+                # takes milliseconds, so the checks run once it is done
+                for claim in claims:
+                    check = len(stages) < STREAM_MAX_CLAIMS
+                    yield event(dict(claim, type='claim', checking=check))
+                    if check:
+                        name = f"claim_{claim['index']}"
+                        checking[name] = claim
+                        stages.append(Stage(name, lambda _inputs, text=claim['claim']: factcheck_claim(text, analyzer)))
+            
+            try:
+                for text, start in pieces:
+                    yield from dispatch(stream.feed(text, start))
+                if final:
+                    yield from dispatch(stream.flush())
+                
+                for stage_result in get_factcheck_executor().run(stages):
+                    claim = checking[stage_result['stage']]
+                    if stage_result['status'] == 'completed':
+                        result = stage_result['result']
+                    else:
+                        result = _unverified_result(claim['claim'], stage_result['error'])
+                    if stage_result['status'] != 'timeout':
+                        checked += 1
+                    yield event({'type': 'verdict', 'index': claim['index'], 'start': claim['start'],
+                                 'result': result})
+                
+                yield event({'type': 'state', 'state': stream.state()})
+                yield event({'type': 'complete', 'claims_detected': stream.claims_detected,
+                             'verdicts': checked, 'final': final,
+                             'timestamp': datetime.utcnow().isoformat()})
+            except Exception as e:
+                print(f"Stream processing error: {e}")
+                yield event({'type': 'error', 'message': 'Stream processing failed'})
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
         
     except Exception as e:
         print(f"Stream processing error: {e}")
         return jsonify({'error': 'Stream processing failed'}), 500
 
+def get_factcheck_executor():
+    """
+    Return the process-wide claim fact-check pool, creating it on first use
+    
+    Separate from the request stage pool so a speech analysis running as a
+    stage never waits on workers it is itself occupying.
+    """
+    global _factcheck_executor
+    if _factcheck_executor is None:
+        with _factcheck_executor_lock:
+            if _factcheck_executor is None:
+                _factcheck_executor = StageExecutor(
+                    max_workers=int(os.environ.get('SPEECH_FACTCHECK_MAX_WORKERS', 8)),
+                    default_timeout=SPEECH_FACTCHECK_TIMEOUT,
+                    max_queue_wait=SPEECH_FACTCHECK_QUEUE_WAIT
+                )
+    return _factcheck_executor
+
+def _unverified_result(claim, error=None):
+    result = {
+        'claim': claim,
+        'verdict': 'unverified',
+        'confidence': 0.5,
+        'credibility_score': 50,
+        'sources': [],
+        'bias': 'unknown',
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    if error:
+        result['error'] = error
+    return result
+
+def factcheck_claim(claim, analyzer=None):
+    """
+    Fact-check a single claim: earlier verdicts first, then a full analysis
+    """
+    claim_store = get_claim_store()
+    
+    # Recurring talking points are answered from earlier verdicts
+    match = claim_store.match(claim)
+    if match:
+        confidence = match.get('confidence') or 0.5
+        if match['verdict'] == 'true':
+            credibility = int(confidence * 100)
+        elif match['verdict'] == 'false':
+            credibility = int((1 - confidence) * 100)
+        else:
+            credibility = 50
+        return {
+            'claim': claim,
+            'verdict': match['verdict'],
+            'confidence': confidence,
+            'credibility_score': credibility,
+            'sources': [{'claim': match['matched_claim'], 'status': match['verdict'],
+                         'source': match['source']}],
+            'bias': 'unknown',
+            'matched_claim': match['matched_claim'],
+            'similarity': match['similarity'],
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    # Use the shared news analyzer
+    analyzer = analyzer or get_news_analyzer()
+    analysis_result = analyzer.analyze(claim, content_type='text', is_pro=True)
+    
+    # Extract results from the new format
+    if not analysis_result.get('success'):
+        # Fallback if analysis fails
+        return _unverified_result(claim)
+    
+    analysis = analysis_result.get('results', {})
+    
+    # Extract key fact-check data
+    credibility = analysis.get('credibility', 50)
+    
+    # Determine verdict based on credibility
+    if credibility > 80:
+        verdict = 'true'
+        confidence = credibility / 100
+    elif credibility < 40:
+        verdict = 'false'
+        confidence = (100 - credibility) / 100
+    else:
+        verdict = 'unverified'
+        confidence = 0.5
+    
+    # Get bias info
+    bias_info = analysis.get('bias', {})
+    political_bias = bias_info.get('label', 'unknown') if isinstance(bias_info, dict) else 'unknown'
+    
+    # Get sources
+    sources = []
+    if 'claims' in analysis:
+        # Extract sources from fact-checked claims
+        for checked_claim in analysis.get('claims', []):
+            if checked_claim.get('status'):
+                sources.append({
+                    'claim': checked_claim.get('claim', ''),
+                    'status': checked_claim.get('status', ''),
+                    'confidence': checked_claim.get('confidence', 0)
+                })
+    
+    claim_store.record(claim, verdict, source='AI analysis', confidence=confidence,
+                       origin='speech_batch_factcheck')
+    
+    return {
+        'claim': claim,
+        'verdict': verdict,
+        'confidence': confidence,
+        'credibility_score': credibility,
+        'sources': sources[:3],  # Limit sources
+        'bias': political_bias,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def iter_factcheck(claims, limit=None):
+    """
+    Fact-check claims concurrently, yielding (index, result) as each verdict
+    completes. Repeated claims are checked once and reported at every index.
+    """
+    claims = claims[:limit or SPEECH_FACTCHECK_BATCH_LIMIT]
+    analyzer = get_news_analyzer()
+    
+    positions = {}  # normalized claim -> indexes in the batch
+    owners = {}  # stage name -> normalized claim
+    stages = []
+    for index, claim in enumerate(claims):
+        key = normalize_claim(claim)
+        if key not in positions:
+            positions[key] = []
+            name = f"claim_{index}"
+            owners[name] = key
+            stages.append(Stage(name, lambda _inputs, claim=claim: factcheck_claim(claim, analyzer)))
+        positions[key].append(index)
+    
+    for stage_result in get_factcheck_executor().run(stages):
+        key = owners[stage_result['stage']]
+        for index in positions[key]:
+            if stage_result['status'] == 'completed':
+                result = dict(stage_result['result'], claim=claims[index])
+            else:
+                result = _unverified_result(claims[index], stage_result['error'])
+            yield index, result
+
+def factcheck_claims(claims, limit=None):
+    """Fact-check claims concurrently and return the results in claim order"""
+    claims = claims[:limit or SPEECH_FACTCHECK_BATCH_LIMIT]
+    results = [None] * len(claims)
+    for index, result in iter_factcheck(claims, limit=len(claims)):
+        results[index] = result
+    return results
+
 def batch_factcheck():
     """
     Perform batch fact-checking on multiple claims
     Optimized for real-time speech fact-checking
+    
+    Claims are checked in parallel. With "stream": true each verdict is sent
+    as a server-sent event as soon as it completes.
     """
     try:
         data = request.get_json()
         claims = data.get('claims', [])
         priority = data.get('priority', 'balanced')
         
-        results = []
-        
-        # Create analyzer instance
-        analyzer = NewsAnalyzer()
-        
-        for claim in claims[:10]:  # Limit to 10 claims per batch
-            # Use the new news analyzer
-            analysis_result = analyzer.analyze(claim, content_type='text', is_pro=True)
+        if data.get('stream'):
+            def generate():
+                processed = 0
+                try:
+                    for index, result in iter_factcheck(claims):
+                        processed += 1
+                        yield f"data: {json.dumps({'type': 'verdict', 'index': index, 'result': result})}\n\n"
+                    yield f"data: {json.dumps({'type': 'complete', 'processed': processed, 'timestamp': datetime.utcnow().isoformat()})}\n\n"
+                except Exception as e:
+                    print(f"Batch fact-check stream error: {e}")
+                    yield f"data: {json.dumps({'type': 'error', 'message': 'Batch fact-check failed'})}\n\n"
             
-            # Extract results from the new format
-            if analysis_result.get('success'):
-                analysis = analysis_result.get('results', {})
-                
-                # Extract key fact-check data
-                credibility = analysis.get('credibility', 50)
-                
-                # Determine verdict based on credibility
-                if credibility > 80:
-                    verdict = 'true'
-                    confidence = credibility / 100
-                elif credibility < 40:
-                    verdict = 'false'
-                    confidence = (100 - credibility) / 100
-                else:
-                    verdict = 'unverified'
-                    confidence = 0.5
-                
-                # Get bias info
-                bias_info = analysis.get('bias', {})
-                political_bias = bias_info.get('label', 'unknown') if isinstance(bias_info, dict) else 'unknown'
-                
-                # Get sources
-                sources = []
-                if 'claims' in analysis:
-                    # Extract sources from fact-checked claims
-                    for checked_claim in analysis.get('claims', []):
-                        if checked_claim.get('status'):
-                            sources.append({
-                                'claim': checked_claim.get('claim', ''),
-                                'status': checked_claim.get('status', ''),
-                                'confidence': checked_claim.get('confidence', 0)
-                            })
-                
-                results.append({
-                    'claim': claim,
-                    'verdict': verdict,
-                    'confidence': confidence,
-                    'credibility_score': credibility,
-                    'sources': sources[:3],  # Limit sources
-                    'bias': political_bias,
-                    'timestamp': datetime.utcnow().isoformat()
-                })
-            else:
-                # Fallback if analysis fails
-                results.append({
-                    'claim': claim,
-                    'verdict': 'unverified',
-                    'confidence': 0.5,
-                    'credibility_score': 50,
-                    'sources': [],
-                    'bias': 'unknown',
-                    'timestamp': datetime.utcnow().isoformat()
-                })
+            return Response(
+                stream_with_context(generate()),
+                mimetype="text/event-stream",
+                headers={
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no'
+                }
+            )
+        
+        results = factcheck_claims(claims)
         
         return jsonify({
             'success': True,
@@ -182,6 +501,25 @@ def batch_factcheck():
         print(f"Batch fact-check error: {e}")
         return jsonify({'error': 'Batch fact-check failed'}), 500
 
+def find_youtube_transcript(video_id, language='en'):
+    """
+    Pick the best transcript for a video: manual captions in the language,
+    then any captions in the language, then whatever is available
+    """
+    transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+    
+    transcript = None
+    try:
+        transcript = transcript_list.find_manually_created_transcript([language.split('-')[0]])
+    except:
+        try:
+            transcript = transcript_list.find_transcript([language.split('-')[0]])
+        except:
+            for t in transcript_list:
+                transcript = t
+                break
+    return transcript
+
 def get_youtube_transcript():
     """
     Extract transcript from YouTube video
@@ -201,19 +539,7 @@ def get_youtube_transcript():
         
         try:
             # Get transcript
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            
-            # Try to find a transcript
-            transcript = None
-            try:
-                transcript = transcript_list.find_manually_created_transcript([language.split('-')[0]])
-            except:
-                try:
-                    transcript = transcript_list.find_transcript([language.split('-')[0]])
-                except:
-                    for t in transcript_list:
-                        transcript = t
-                        break
+            transcript = find_youtube_transcript(video_id, language)
             
             if not transcript:
                 return jsonify({'error': 'No transcript available for this video'}), 404
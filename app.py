@@ -17,6 +17,8 @@ import logging
 import traceback
 import time
 import hashlib
+import base64
+from io import BytesIO
 from datetime import datetime, timedelta
 from functools import wraps
 from urllib.parse import urlparse
@@ -83,22 +85,29 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_talisman import Talisman
 from flask_seasurf import SeaSurf
+import click
 
 # NEW: Service architecture imports
 from services.registry import ServiceRegistry
+from services.stage_executor import Stage, get_stage_executor
+from services.job_queue import get_job_queue
+from services.copyleaks_scans import get_scan_manager
+from services.duplicate_index import get_duplicate_index
+from services.result_cache import content_hash
+from services.model_registry import get_model_registry, lazy_function
 from config.validator import ConfigurationValidator
 
 # Existing service imports
 from services.database import db, User, Analysis, UsageLog, APIHealth, Contact, BetaSignup
 
-# Analysis modules (keep existing for non-unified endpoints)
-from analysis.news_analysis import analyze_news_route
+# Analysis modules (keep existing for non-unified endpoints). News, image and
+# speech analysis pull in OpenAI, OpenCV/scikit-image and the YouTube client,
+# so they are imported on their first request instead of at worker boot
 from analysis.text_analysis import perform_realistic_unified_text_analysis, perform_basic_text_analysis
-from analysis.image_analysis import perform_realistic_image_analysis, perform_basic_image_analysis
-from analysis.speech_analysis import (
-    extract_claims_from_speech, speech_to_text, batch_factcheck, 
-    get_youtube_transcript, export_speech_report
-)
+analyze_news_route = lazy_function('analysis.news_analysis', 'analyze_news_route')
+perform_realistic_image_analysis = lazy_function('analysis.image_analysis', 'perform_realistic_image_analysis')
+perform_basic_image_analysis = lazy_function('analysis.image_analysis', 'perform_basic_image_analysis')
+batch_factcheck = lazy_function('analysis.speech_analysis', 'batch_factcheck')
 
 # Other imports
 import config
@@ -255,7 +264,11 @@ def initialize_services():
             'openai_model': 'gpt-4',
             'openai_fallback_model': 'gpt-3.5-turbo',
             'max_text_length': 3000,
-            'confidence_threshold': 70
+            'confidence_threshold': 70,
+            'cache_enabled': os.environ.get('ENABLE_CACHING', 'true').lower() == 'true',
+            'cache_ttl': int(os.environ.get('REDIS_CACHE_TIMEOUT', 3600)),
+            'cache_max_entries': int(os.environ.get('AI_CACHE_MAX_ENTRIES', 512)),
+            'redis_url': os.environ.get('REDIS_URL', '')
         }
         
         success = service_registry.initialize_service('ai_analysis', ai_config)
@@ -506,13 +519,124 @@ def stream_progress(generator_func):
         )
     return wrapper
 
+# Near-duplicate index for plagiarism checks
+def analysis_owner():
+    """Id of the signed-in user for ownership checks, None for anonymous requests"""
+    if current_user and current_user.is_authenticated:
+        return current_user.get_id()
+    return None
+
+def index_analyzed_content(content):
+    """
+    Add saved analysis text to the near-duplicate index used by plagiarism
+    checks, keyed by content hash so resubmissions share one entry; the
+    submitting user is recorded so their own texts never match themselves
+    """
+    if not content:
+        return
+    try:
+        get_duplicate_index().add(content, source='analysis', ref=content_hash(content), owner=analysis_owner())
+    except Exception as e:
+        logger.error(f"Duplicate index update error: {str(e)}")
+
+# Background jobs for long analyses
+def wants_async_job():
+    """True when the client asked for a job id instead of a blocking response"""
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '').lower()
+
+def snapshot_request():
+    """Capture the current request as a JSON-serializable job payload"""
+    files = []
+    for field, storage in request.files.items(multi=True):
+        files.append({
+            'field': field,
+            'filename': storage.filename,
+            'content_type': storage.content_type,
+            'data': base64.b64encode(storage.read()).decode('ascii')
+        })
+        # Rewind so the view can still read the upload if it runs inline
+        storage.seek(0)
+    
+    return {
+        'path': request.path,
+        'method': request.method,
+        'query': request.query_string.decode('utf-8', errors='ignore'),
+        'form': [[name, value] for name, value in request.form.items(multi=True)],
+        'json': request.get_json(silent=True) if request.is_json else None,
+        'files': files,
+        'user_id': current_user.get_id() if current_user and current_user.is_authenticated else None
+    }
+
+def replay_request_job(view_func, payload):
+    """
+    Run a view function inside a request context rebuilt from a snapshot
+    and return its (JSON body, status code)
+    """
+    if payload['json'] is not None:
+        request_kwargs = {'json': payload['json']}
+    else:
+        data = {}
+        for name, value in payload['form']:
+            data.setdefault(name, []).append(value)
+        for upload in payload['files']:
+            data.setdefault(upload['field'], []).append(
+                (BytesIO(base64.b64decode(upload['data'])), upload['filename'], upload['content_type'])
+            )
+        request_kwargs = {'data': data}
+    
+    # Drop the async flag so the view runs its normal blocking path
+    query = '&'.join(part for part in payload['query'].split('&') if part and not part.startswith('async='))
+    
+    with app.test_request_context(payload['path'], method=payload['method'], query_string=query, **request_kwargs):
+        if payload['user_id'] is not None:
+            user = load_user(payload['user_id'])
+            if user is not None:
+                login_user(user)
+        response = app.make_response(view_func())
+        return response.get_json(silent=True), response.status_code
+
+def async_job(kind):
+    """
+    Let an analysis endpoint run as a background job
+
+    With ?async=1 or a "Prefer: respond-async" header the request is queued
+    and the endpoint answers 202 with a job id; results are polled from
+    /api/jobs/<id>. Other requests run inline as before, and so do async
+    requests when the queue is unavailable (no Redis), since a job held in
+    one worker's memory could not be polled from the others.
+    """
+    def decorator(f):
+        get_job_queue().register(kind, lambda payload: replay_request_job(f, payload))
+        
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not wants_async_job() or not get_job_queue().available:
+                return f(*args, **kwargs)
+            
+            try:
+                job = get_job_queue().enqueue(kind, snapshot_request())
+            except Exception as e:
+                logger.error(f"Failed to queue {kind} job, running inline: {str(e)}")
+                return f(*args, **kwargs)
+            
+            return jsonify({
+                'success': True,
+                'job_id': job['id'],
+                'status': job['status'],
+                'status_url': url_for('api_job_status', job_id=job['id'])
+            }), 202
+        return decorated_function
+    return decorator
+
 # Helper function to extract article content from URL
 def extract_article_content(url):
     """Extract article content from URL using BeautifulSoup"""
     try:
-        import requests
         from bs4 import BeautifulSoup
         from urllib.parse import urlparse
+        from services.http_fetcher import get_http_fetcher
         
         # Add headers to avoid being blocked
         headers = {
@@ -520,7 +644,7 @@ def extract_article_content(url):
         }
         
         # Fetch the page
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_http_fetcher().fetch(url, headers=headers, timeout=10)
         response.raise_for_status()
         
         # Parse HTML
@@ -600,6 +724,174 @@ def extract_article_content(url):
         logger.error(f"Error extracting article content: {str(e)}")
         return None
 
+# Per-stage deadlines (seconds) for the unified analysis stage graph
+UNIFIED_STAGE_TIMEOUTS = {
+    'ai_analysis': 60,
+    'ai_fallback': 30,
+    'plagiarism': 90,
+    'quality': 5,
+    'source_metadata': 5
+}
+
+def calculate_quality_metrics(content):
+    """Build the basic content quality section for unified analysis"""
+    word_count = len(content.split())
+    sentence_count = len([s for s in content.split('.') if s.strip()])
+    avg_sentence_length = word_count / max(sentence_count, 1)
+    
+    return {
+        'title': 'Content Quality Analysis',
+        'metrics': {
+            'word_count': word_count,
+            'sentence_count': sentence_count,
+            'avg_sentence_length': round(avg_sentence_length, 1),
+            'readability': 'Good' if avg_sentence_length < 20 else 'Complex'
+        },
+        'status': 'completed'
+    }
+
+def build_source_metadata(url, article_data):
+    """Build source metadata for URL-based analysis"""
+    return {
+        'url': url,
+        'domain': urlparse(url).netloc.replace('www.', ''),
+        'title': article_data.get('title', ''),
+        'author': article_data.get('author', ''),
+        'publish_date': article_data.get('publish_date', '')
+    }
+
+def build_unified_stages(content, is_pro, url=None, article_data=None, ai_fallback=False):
+    """
+    Build the stage graph for unified analysis
+    
+    AI detection, plagiarism, quality metrics and source metadata only share
+    the input text, so they have no dependencies and run concurrently.
+    """
+    stages = []
+    
+    ai_service = service_registry.get_service('ai_analysis') if service_registry else None
+    if ai_service and ai_service.is_available:
+        stages.append(Stage(
+            'ai_analysis',
+            lambda upstream: ai_service.analyze(content, use_openai=is_pro),
+            timeout=UNIFIED_STAGE_TIMEOUTS['ai_analysis']
+        ))
+    elif ai_fallback:
+        stages.append(Stage(
+            'ai_fallback',
+            lambda upstream: perform_realistic_unified_text_analysis(content),
+            timeout=UNIFIED_STAGE_TIMEOUTS['ai_fallback']
+        ))
+    
+    plagiarism_service = service_registry.get_service('plagiarism') if service_registry else None
+    if plagiarism_service and plagiarism_service.is_available:
+        # Read in the request thread; stages run on executor threads
+        owner = analysis_owner()
+        stages.append(Stage(
+            'plagiarism',
+            lambda upstream: plagiarism_service.check_plagiarism(content, use_real_apis=is_pro, owner=owner),
+            timeout=UNIFIED_STAGE_TIMEOUTS['plagiarism']
+        ))
+    
+    stages.append(Stage(
+        'quality',
+        lambda upstream: calculate_quality_metrics(content),
+        timeout=UNIFIED_STAGE_TIMEOUTS['quality']
+    ))
+    
+    if url and article_data:
+        stages.append(Stage(
+            'source_metadata',
+            lambda upstream: build_source_metadata(url, article_data),
+            timeout=UNIFIED_STAGE_TIMEOUTS['source_metadata']
+        ))
+    
+    return stages
+
+def apply_unified_stage_result(results, stage_result):
+    """
+    Merge one finished stage into the unified results
+    
+    Returns the analysis section key the stage filled in, or None.
+    """
+    name = stage_result['stage']
+    value = stage_result['result']
+    results['metadata'].setdefault('stage_timings', {})[name] = stage_result['duration_ms']
+    
+    if stage_result['status'] != 'completed':
+        results['metadata'].setdefault('stage_errors', {})[name] = stage_result['status']
+        return None
+    
+    if name == 'ai_analysis' and value.get('success'):
+        data = value.get('data', {})
+        results['ai_probability'] = data.get('ai_probability', 0)
+        results['analysis_sections']['ai_detection'] = {
+            'title': 'AI Content Detection',
+            'content': data.get('analysis', 'Analysis completed'),
+            'confidence': data.get('confidence', 0.5),
+            'details': data.get('details', {}),
+            'probability': data.get('ai_probability', 0),
+            'ai_probability': data.get('ai_probability', 0),
+            'human_probability': 100 - data.get('ai_probability', 0),
+            'patterns': data.get('detected_patterns', {}).get('ai_phrases', 0),
+            'status': 'completed'
+        }
+        results['metadata']['services_used'].append('ai_analysis')
+        
+        # Adjust trust score based on AI probability
+        if data.get('ai_probability', 0) > 70:
+            results['trust_score'] -= int(data.get('confidence', 0.5) * 30)
+        return 'ai_detection'
+    
+    if name == 'ai_fallback':
+        results['ai_probability'] = value.get('ai_probability', 0)
+        results['analysis_sections']['ai_detection'] = {
+            'title': 'AI Content Detection',
+            'content': 'AI service unavailable - using pattern analysis',
+            'probability': value.get('ai_probability', 0),
+            'ai_probability': value.get('ai_probability', 0),
+            'human_probability': value.get('human_probability', 100),
+            'patterns': value.get('patterns_detected', []),
+            'status': 'fallback'
+        }
+        return 'ai_detection'
+    
+    if name == 'plagiarism' and value and value.get('error') and not value.get('services_used'):
+        # Nothing was actually checked - don't present it as a clean result
+        results['analysis_sections']['plagiarism'] = {
+            'title': 'Plagiarism Detection',
+            'content': value['error'],
+            'status': 'unavailable'
+        }
+        return 'plagiarism'
+    
+    if name == 'plagiarism' and value:
+        results['plagiarism_score'] = int(value.get('score', 0))
+        results['analysis_sections']['plagiarism'] = {
+            'title': 'Plagiarism Detection',
+            'content': f"Checked {value.get('sources_checked', 0)} sources",
+            'sources_found': len(value.get('matches', [])),
+            'similarity_score': value.get('score', 0) / 100,
+            'details': value.get('matches', []),
+            'matched_content': value.get('matches', []),
+            'status': 'completed'
+        }
+        results['metadata']['services_used'].append('plagiarism')
+        
+        # Adjust trust score based on plagiarism
+        if value.get('score', 0) > 50:
+            results['trust_score'] -= int(value.get('score', 0) * 0.25)
+        return 'plagiarism'
+    
+    if name == 'quality':
+        results['analysis_sections']['quality'] = value
+        return 'quality'
+    
+    if name == 'source_metadata':
+        results['metadata']['source'] = value
+    
+    return None
+
 # Routes
 
 @app.route('/')
@@ -1024,6 +1316,18 @@ def health_check():
             health_data['configuration'] = {'error': 'Configuration validator not initialized'}
             health_data['status'] = 'degraded'
         
+        # Warm browser pool used for protected-site extraction
+        try:
+            from playwright_extractor import get_browser_pool_health
+            health_data['browser_pool'] = get_browser_pool_health()
+        except ImportError:
+            health_data['browser_pool'] = {'available': False}
+        
+        health_data['job_queue'] = get_job_queue().get_stats()
+        health_data['copyleaks_scans'] = get_scan_manager().get_stats()
+        health_data['duplicate_index'] = get_duplicate_index().get_stats()
+        health_data['models'] = get_model_registry().get_stats()
+        
         return jsonify(health_data)
         
     except Exception as e:
@@ -1034,6 +1338,27 @@ def health_check():
             'timestamp': datetime.utcnow().isoformat()
         }), 500
 
+# Background job results
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """Return the status of a queued analysis, and its result once finished"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found or expired'}), 404
+    return jsonify(dict(job, success=True))
+
+# Copyleaks scan completion webhook
+@app.route('/api/copyleaks/webhook/<status>/<scan_id>', methods=['POST'])
+@csrf.exempt
+def api_copyleaks_webhook(status, scan_id):
+    """Wake the request or job waiting on a Copyleaks scan"""
+    scan_manager = get_scan_manager()
+    if not scan_manager.verify_webhook(scan_id, request.args.get('token', '')):
+        return jsonify({'success': False, 'error': 'Invalid webhook token'}), 403
+    
+    scan_manager.notify(scan_id, status)
+    return jsonify({'success': True})
+
 # YouTube transcript endpoint
 @app.route('/api/youtube-transcript', methods=['POST'])
 @csrf.exempt
@@ -1069,6 +1394,21 @@ def api_youtube_transcript():
         logger.error(f"YouTube transcript error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Live transcript fact-checking (server-sent events)
+@app.route('/api/stream-transcript', methods=['POST'])
+@csrf.exempt
+def api_stream_transcript():
+    """Incrementally fact-check transcript chunks or YouTube captions"""
+    from analysis.speech_analysis import stream_transcript
+    return stream_transcript()
+
+# Batch claim fact-checking
+@app.route('/api/batch-factcheck', methods=['POST'])
+@csrf.exempt
+def api_batch_factcheck():
+    """Fact-check a batch of claims in parallel"""
+    return batch_factcheck()
+
 def extract_youtube_info(url):
     """Extract basic YouTube video information"""
     try:
@@ -1170,7 +1510,7 @@ def api_analyze_speech():
             }), 400
         
         # Extract claims from transcript
-        from analysis.speech_analysis import extract_claims_from_speech, batch_factcheck
+        from analysis.speech_analysis import extract_claims_from_speech, factcheck_claims
         
         logger.info(f"Extracting claims from transcript of length: {len(transcript)}")
         claims = extract_claims_from_speech(transcript)
@@ -1185,13 +1525,13 @@ def api_analyze_speech():
         fact_check_results = []
         
         if is_pro:
-            # Professional analysis with full fact-checking
-            fact_check_results = batch_factcheck(claims, is_pro=True)
+            # Professional analysis with full fact-checking (claims run in parallel)
+            fact_check_results = factcheck_claims(claims, limit=len(claims))
         else:
             # Basic analysis with limited fact-checking
             # For basic tier, only check first 3 claims
             limited_claims = claims[:3]
-            fact_check_results = batch_factcheck(limited_claims, is_pro=False)
+            fact_check_results = factcheck_claims(limited_claims, limit=len(limited_claims))
             
             # Add placeholder results for remaining claims
             for claim in claims[3:]:
@@ -1204,9 +1544,9 @@ def api_analyze_speech():
         # Calculate trust score
         total_claims = len(fact_check_results)
         verified_claims = sum(1 for r in fact_check_results 
-                            if r.get('verdict') in ['TRUE', 'VERIFIED'])
+                            if str(r.get('verdict', '')).upper() in ['TRUE', 'VERIFIED'])
         false_claims = sum(1 for r in fact_check_results 
-                         if r.get('verdict') in ['FALSE', 'MISLEADING'])
+                         if str(r.get('verdict', '')).upper() in ['FALSE', 'MISLEADING'])
         
         # Calculate trust score (0-100)
         if total_claims > 0:
@@ -1252,6 +1592,7 @@ def api_analyze_speech():
             db.session.add(analysis)
             db.session.commit()
             results['analysis_id'] = analysis.id
+            index_analyzed_content(transcript)
         except Exception as e:
             logger.error(f"Database save error: {str(e)}")
             # Continue even if save fails
@@ -1309,24 +1650,53 @@ def analyze_unified_stream():
             content_type = request.args.get('type', 'text')
             is_pro = request.args.get('is_pro', 'true').lower() == 'true'
             
+            # Pacing: 'realtime' emits events as each stage actually finishes,
+            # 'staged' keeps the legacy fixed delays between events
+            pacing = request.args.get('pacing', app.config.get('STREAM_PACING_MODE', 'realtime')).lower()
+            stream_started = time.time()
+            
+            def progress_event(stage, progress, step):
+                """Build a progress event stamped with the time since the stream started"""
+                payload = {
+                    'type': 'progress',
+                    'stage': stage,
+                    'progress': progress,
+                    'step': step,
+                    'elapsed_ms': int((time.time() - stream_started) * 1000)
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+            
+            def stage_event(stage_id, duration_ms, status='completed'):
+                """Build an event reporting that a real pipeline stage has finished"""
+                payload = {
+                    'type': 'stage',
+                    'stage_id': stage_id,
+                    'status': status,
+                    'duration_ms': duration_ms,
+                    'elapsed_ms': int((time.time() - stream_started) * 1000)
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+            
+            def stage_pause(seconds):
+                """Legacy cosmetic delay, only applied in 'staged' pacing mode"""
+                if pacing == 'staged':
+                    time.sleep(seconds)
+            
             # Determine what content to analyze
+            article_data = None
             if content_type == 'url' and url:
                 # URL analysis - fetch content from URL first
-                yield f"data: {json.dumps({'type': 'progress', 'stage': 'Fetching content from URL...', 'progress': 5, 'step': 1})}\n\n"
-                time.sleep(0.8)  # Make it more realistic
-                
+                yield progress_event('Fetching content from URL...', 5, 1)
+                stage_pause(0.8)  # Make it more realistic
+
                 try:
                     # Extract content from URL
+                    fetch_started = time.time()
                     article_data = extract_article_content(url)
+                    fetch_ms = int((time.time() - fetch_started) * 1000)
+                    yield stage_event('url_fetch', fetch_ms, 'completed' if article_data else 'failed')
                     if article_data and article_data.get('content'):
                         content = article_data['content']
-                        # Include URL metadata in results
-                        url_metadata = {
-                            'url': url,
-                            'title': article_data.get('title', ''),
-                            'author': article_data.get('author', ''),
-                            'publish_date': article_data.get('publish_date', '')
-                        }
                     else:
                         yield f"data: {json.dumps({'type': 'error', 'message': 'Could not extract content from URL'})}\n\n"
                         return
@@ -1354,8 +1724,8 @@ def analyze_unified_stream():
             if not service_registry:
                 logger.warning("Service registry not available - using fallback analysis")
                 # Use fallback analysis
-                yield f"data: {json.dumps({'type': 'progress', 'stage': 'Using basic analysis mode...', 'progress': 10, 'step': 1})}\n\n"
-                time.sleep(0.5)
+                yield progress_event('Using basic analysis mode...', 10, 1)
+                stage_pause(0.5)
                 
                 # Perform basic text analysis as fallback
                 basic_results = perform_realistic_unified_text_analysis(content)
@@ -1387,7 +1757,7 @@ def analyze_unified_stream():
                     }
                 }
                 
-                yield f"data: {json.dumps({'type': 'progress', 'stage': 'Analysis complete!', 'progress': 100, 'step': 6})}\n\n"
+                yield progress_event('Analysis complete!', 100, 6)
                 yield f"data: {json.dumps({'type': 'complete', 'results': results})}\n\n"
                 return
             
@@ -1408,104 +1778,14 @@ def analyze_unified_stream():
                 }
             }
             
-            # Add URL metadata if available
-            if content_type == 'url' and 'url_metadata' in locals():
-                results['metadata']['source'] = url_metadata
-            
             # Stage 1: Initial processing
-            yield f"data: {json.dumps({'type': 'progress', 'stage': 'Initializing analysis engine...', 'progress': 10, 'step': 1})}\n\n"
-            time.sleep(1.2)  # More realistic timing
+            yield progress_event('Initializing analysis engine...', 10, 1)
+            stage_pause(1.2)  # More realistic timing
             
-            # Stage 2: AI Analysis
-            yield f"data: {json.dumps({'type': 'progress', 'stage': 'Detecting AI patterns...', 'progress': 20, 'step': 2})}\n\n"
-            time.sleep(0.8)
-            
-            ai_service = service_registry.get_service('ai_analysis')
-            if ai_service and ai_service.is_available:
-                logger.info("Running AI analysis...")
-                
-                # More detailed progress updates
-                yield f"data: {json.dumps({'type': 'progress', 'stage': 'Analyzing linguistic patterns...', 'progress': 30, 'step': 2})}\n\n"
-                time.sleep(1.5)  # Simulate analysis time
-                
-                ai_results = ai_service.analyze(content, use_openai=is_pro)
-                
-                if ai_results.get('success'):
-                    data = ai_results.get('data', {})
-                    results['ai_probability'] = data.get('ai_probability', 0)
-                    results['analysis_sections']['ai_detection'] = {
-                        'title': 'AI Content Detection',
-                        'content': data.get('analysis', 'Analysis completed'),
-                        'confidence': data.get('confidence', 0.5),
-                        'details': data.get('details', {}),
-                        'probability': data.get('ai_probability', 0),
-                        'ai_probability': data.get('ai_probability', 0),
-                        'human_probability': 100 - data.get('ai_probability', 0),
-                        'patterns': data.get('detected_patterns', {}).get('ai_phrases', 0),
-                        'status': 'completed'
-                    }
-                    results['metadata']['services_used'].append('ai_analysis')
-                    
-                    # Adjust trust score
-                    if data.get('ai_probability', 0) > 70:
-                        results['trust_score'] -= int(data.get('confidence', 0.5) * 30)
-                    
-                    # Send partial results
-                    yield f"data: {json.dumps({'type': 'partial', 'results': {'ai_detection': results['analysis_sections']['ai_detection']}})}\n\n"
-                
-                yield f"data: {json.dumps({'type': 'progress', 'stage': 'Calculating AI probability scores...', 'progress': 45, 'step': 3})}\n\n"
-                time.sleep(1.0)
-            else:
-                logger.warning("AI service not available - using basic analysis")
-                # Fallback to basic analysis
-                basic_results = perform_realistic_unified_text_analysis(content)
-                results['ai_probability'] = basic_results.get('ai_probability', 0)
-                results['analysis_sections']['ai_detection'] = {
-                    'title': 'AI Content Detection',
-                    'content': 'AI service unavailable - using pattern analysis',
-                    'probability': basic_results.get('ai_probability', 0),
-                    'ai_probability': basic_results.get('ai_probability', 0),
-                    'human_probability': basic_results.get('human_probability', 100),
-                    'patterns': basic_results.get('patterns_detected', []),
-                    'status': 'fallback'
-                }
-            
-            # Stage 3: Plagiarism Check
-            yield f"data: {json.dumps({'type': 'progress', 'stage': 'Checking for plagiarism...', 'progress': 50, 'step': 4})}\n\n"
-            time.sleep(0.8)
-            
-            plagiarism_service = service_registry.get_service('plagiarism')
-            if plagiarism_service and plagiarism_service.is_available and content:
-                logger.info("Running plagiarism analysis...")
-                
-                yield f"data: {json.dumps({'type': 'progress', 'stage': 'Searching academic databases...', 'progress': 60, 'step': 4})}\n\n"
-                time.sleep(2.0)  # Plagiarism check takes longer
-                
-                plagiarism_results = plagiarism_service.check_plagiarism(content, use_real_apis=is_pro)
-                
-                if plagiarism_results:
-                    results['plagiarism_score'] = int(plagiarism_results.get('score', 0))
-                    results['analysis_sections']['plagiarism'] = {
-                        'title': 'Plagiarism Detection',
-                        'content': f"Checked {plagiarism_results.get('sources_checked', 0)} sources",
-                        'sources_found': len(plagiarism_results.get('matches', [])),
-                        'similarity_score': plagiarism_results.get('score', 0) / 100,
-                        'details': plagiarism_results.get('matches', []),
-                        'matched_content': plagiarism_results.get('matches', []),
-                        'status': 'completed'
-                    }
-                    results['metadata']['services_used'].append('plagiarism')
-                    
-                    # Adjust trust score
-                    if plagiarism_results.get('score', 0) > 50:
-                        results['trust_score'] -= int(plagiarism_results.get('score', 0) * 0.25)
-                    
-                    # Send partial results
-                    yield f"data: {json.dumps({'type': 'partial', 'results': {'plagiarism': results['analysis_sections']['plagiarism']}})}\n\n"
-                
-                yield f"data: {json.dumps({'type': 'progress', 'stage': 'Comparing with online sources...', 'progress': 75, 'step': 4})}\n\n"
-                time.sleep(1.5)
-            else:
+            # Stages 2-4: AI detection, plagiarism, quality and source metadata
+            # run concurrently; partial results stream in the order they finish
+            stages = build_unified_stages(content, is_pro, url=url, article_data=article_data, ai_fallback=True)
+            if not any(stage.name == 'plagiarism' for stage in stages):
                 logger.warning("Plagiarism service not available")
                 results['analysis_sections']['plagiarism'] = {
                     'title': 'Plagiarism Detection',
@@ -1513,29 +1793,32 @@ def analyze_unified_stream():
                     'status': 'unavailable'
                 }
             
-            # Stage 4: Quality Analysis
-            yield f"data: {json.dumps({'type': 'progress', 'stage': 'Analyzing content quality...', 'progress': 80, 'step': 5})}\n\n"
-            time.sleep(1.0)
-            
-            # Add basic quality metrics
-            word_count = len(content.split())
-            sentence_count = len([s for s in content.split('.') if s.strip()])
-            avg_sentence_length = word_count / max(sentence_count, 1)
+            yield progress_event('Detecting AI patterns and checking for plagiarism...', 20, 2)
             
-            results['analysis_sections']['quality'] = {
-                'title': 'Content Quality Analysis',
-                'metrics': {
-                    'word_count': word_count,
-                    'sentence_count': sentence_count,
-                    'avg_sentence_length': round(avg_sentence_length, 1),
-                    'readability': 'Good' if avg_sentence_length < 20 else 'Complex'
-                },
-                'status': 'completed'
+            stage_labels = {
+                'ai_analysis': ('AI probability scores calculated', 3),
+                'ai_fallback': ('Pattern analysis complete', 3),
+                'plagiarism': ('Compared with online sources', 4),
+                'quality': ('Content quality analyzed', 5),
+                'source_metadata': ('Source details collected', 2)
             }
+            finished = 0
+            for stage_result in get_stage_executor().run(stages):
+                finished += 1
+                stage_name = stage_result['stage']
+                yield stage_event(stage_name, stage_result['duration_ms'], stage_result['status'])
+                
+                section_key = apply_unified_stage_result(results, stage_result)
+                if section_key:
+                    yield f"data: {json.dumps({'type': 'partial', 'results': {section_key: results['analysis_sections'][section_key]}})}\n\n"
+                
+                label, step = stage_labels.get(stage_name, ('Stage complete', 4))
+                yield progress_event(label, 20 + int(65 * finished / len(stages)), step)
+                stage_pause(0.8)
             
             # Stage 5: Finalize
-            yield f"data: {json.dumps({'type': 'progress', 'stage': 'Generating comprehensive report...', 'progress': 90, 'step': 6})}\n\n"
-            time.sleep(1.2)
+            yield progress_event('Generating comprehensive report...', 90, 6)
+            stage_pause(1.2)
             
             # Ensure trust score is within bounds
             results['trust_score'] = max(0, min(100, results['trust_score']))
@@ -1569,6 +1852,7 @@ def analyze_unified_stream():
                 results['recommendations'].append("Content appears authentic and trustworthy")
             
             # Save to database
+            save_started = time.time()
             try:
                 analysis = Analysis(
                     user_id=getattr(current_user, 'id', 1),
@@ -1581,13 +1865,16 @@ def analyze_unified_stream():
                 db.session.add(analysis)
                 db.session.commit()
                 results['metadata']['analysis_id'] = analysis.id
+                index_analyzed_content(content)
+                yield stage_event('db_save', int((time.time() - save_started) * 1000))
             except Exception as e:
                 logger.error(f"Database save error: {str(e)}")
                 # Continue even if save fails
+                yield stage_event('db_save', int((time.time() - save_started) * 1000), 'failed')
             
             # Final progress
-            yield f"data: {json.dumps({'type': 'progress', 'stage': 'Analysis complete!', 'progress': 100, 'step': 6})}\n\n"
-            time.sleep(0.5)
+            yield progress_event('Analysis complete!', 100, 6)
+            stage_pause(0.5)
             
             # Send complete results
             yield f"data: {json.dumps({'type': 'complete', 'results': results})}\n\n"
@@ -1610,6 +1897,7 @@ def analyze_unified_stream():
 # Keep the original endpoint for backwards compatibility
 @app.route('/api/analyze-unified', methods=['POST'])
 @csrf.exempt
+@async_job('unified')
 @track_usage('unified')
 def analyze_unified():
     """Original unified analysis endpoint with fallback support"""
@@ -1739,6 +2027,7 @@ def analyze_unified():
                 db.session.add(analysis)
                 db.session.commit()
                 results['analysis_id'] = analysis.id
+                index_analyzed_content(content)
             except Exception as e:
                 logger.error(f"Database save error: {str(e)}")
                 # Continue even if save fails
@@ -1762,69 +2051,10 @@ def analyze_unified():
             }
         }
         
-        # Run AI analysis if text content provided
+        # Run AI detection, plagiarism and quality stages concurrently
         if content:
-            ai_service = service_registry.get_service('ai_analysis')
-            if ai_service and ai_service.is_available:
-                ai_results = ai_service.analyze(content, use_openai=is_pro)
-                
-                if ai_results.get('success'):
-                    data = ai_results.get('data', {})
-                    results['ai_probability'] = data.get('ai_probability', 0)
-                    results['analysis_sections']['ai_detection'] = {
-                        'title': 'AI Content Detection',
-                        'content': data.get('analysis', 'Analysis completed'),
-                        'confidence': data.get('confidence', 0.5),
-                        'details': data.get('details', {}),
-                        'probability': data.get('ai_probability', 0),
-                        'ai_probability': data.get('ai_probability', 0),
-                        'human_probability': 100 - data.get('ai_probability', 0),
-                        'patterns': data.get('detected_patterns', {}).get('ai_phrases', 0),
-                        'status': 'completed'
-                    }
-                    results['metadata']['services_used'].append('ai_analysis')
-                    
-                    # Adjust trust score based on AI probability
-                    if data.get('ai_probability', 0) > 70:
-                        results['trust_score'] -= int(data.get('confidence', 0.5) * 30)
-            
-            # Run plagiarism check
-            plagiarism_service = service_registry.get_service('plagiarism')
-            if plagiarism_service and plagiarism_service.is_available:
-                plagiarism_results = plagiarism_service.check_plagiarism(content, use_real_apis=is_pro)
-                
-                if plagiarism_results:
-                    results['plagiarism_score'] = int(plagiarism_results.get('score', 0))
-                    results['analysis_sections']['plagiarism'] = {
-                        'title': 'Plagiarism Detection',
-                        'content': f"Checked {plagiarism_results.get('sources_checked', 0)} sources",
-                        'sources_found': len(plagiarism_results.get('matches', [])),
-                        'similarity_score': plagiarism_results.get('score', 0) / 100,
-                        'details': plagiarism_results.get('matches', []),
-                        'matched_content': plagiarism_results.get('matches', []),
-                        'status': 'completed'
-                    }
-                    results['metadata']['services_used'].append('plagiarism')
-                    
-                    # Adjust trust score based on plagiarism
-                    if plagiarism_results.get('score', 0) > 50:
-                        results['trust_score'] -= int(plagiarism_results.get('score', 0) * 0.25)
-            
-            # Add quality metrics
-            word_count = len(content.split())
-            sentence_count = len([s for s in content.split('.') if s.strip()])
-            avg_sentence_length = word_count / max(sentence_count, 1)
-            
-            results['analysis_sections']['quality'] = {
-                'title': 'Content Quality Analysis',
-                'metrics': {
-                    'word_count': word_count,
-                    'sentence_count': sentence_count,
-                    'avg_sentence_length': round(avg_sentence_length, 1),
-                    'readability': 'Good' if avg_sentence_length < 20 else 'Complex'
-                },
-                'status': 'completed'
-            }
+            for stage_result in get_stage_executor().run(build_unified_stages(content, is_pro)):
+                apply_unified_stage_result(results, stage_result)
         
         # Handle image analysis if image provided
         if image_file:
@@ -1905,6 +2135,7 @@ def analyze_unified():
             db.session.add(analysis)
             db.session.commit()
             results['analysis_id'] = analysis.id
+            index_analyzed_content(content)
         except Exception as e:
             logger.error(f"Database save error: {str(e)}")
             # Continue even if save fails
@@ -2696,6 +2927,7 @@ def generate_basic_pdf_fallback(results):
 
 @app.route('/api/analyze-news', methods=['POST'])
 @csrf.exempt
+@async_job('news')
 @track_usage('news')
 def api_analyze_news():
     """News analysis endpoint"""
@@ -2778,6 +3010,7 @@ def api_analyze_text():
 
 @app.route('/api/analyze-image', methods=['POST'])
 @csrf.exempt
+@async_job('image')
 @track_usage('image')
 def api_analyze_image():
     """Image analysis endpoint"""
@@ -3051,6 +3284,32 @@ def test_services():
     else:
         print("Service initialization failed!")
 
+@app.cli.command('import-times')
+@click.option('--module', default='app', help='Module to import')
+@click.option('--top', default=20, help='Number of packages and modules to list')
+@click.option('--budget-ms', default=None, type=float, help='Exit non-zero when the import takes longer')
+def import_times(module, top, budget_ms):
+    """Report where import time goes (python -X importtime in a fresh interpreter)"""
+    from utils.import_timing import measure_imports, format_report
+    
+    result = measure_imports(module)
+    print(format_report(result, top=top, budget_ms=budget_ms))
+    if not result['ok'] or (budget_ms is not None and result['wall_ms'] is not None and result['wall_ms'] > budget_ms):
+        raise SystemExit(1)
+
+@app.cli.command('load-models')
+@click.argument('names', nargs=-1)
+def load_models(names):
+    """Load registered models (all of them by default) and report load times"""
+    registry = get_model_registry()
+    registry.preload(names or list(registry.get_stats()))
+    print(json.dumps(registry.get_stats(), indent=2))
+
+@app.cli.command('playwright-diagnostics')
+def playwright_diagnostics():
+    """Print Playwright browser path diagnostics"""
+    playwright_config.print_diagnostics()
+
 # Utility functions
 
 def allowed_file(filename, allowed_extensions):
@@ -0,0 +1,294 @@
+"""
+Batched Transformer Inference
+Micro-batching queue for the RoBERTa AI detector, usable in-process or as a
+per-host sidecar so every gunicorn worker shares one model copy
+"""
+
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Listener, Client
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "Hello-SimpleAI/chatgpt-detector-roberta"
+
+
+class BatchedInferenceQueue:
+    """
+    Collects concurrent scoring requests and runs them through the model in
+    micro-batches. Long documents are split into overlapping windows of at
+    most max_length tokens and scored as a token-weighted mean, instead of
+    being truncated at the first 512 tokens.
+    """
+
+    def __init__(self, model, tokenizer, max_batch_size: int = 16, max_wait_ms: float = 10.0,
+                 max_length: int = 512, stride: int = 384, ai_label_index: int = 1):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_length = max_length
+        self.stride = stride
+        self.ai_label_index = ai_label_index
+
+        self._requests: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self.stats = {'requests': 0, 'batches': 0, 'windows': 0}
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for scoring; the future resolves to an AI probability (0-100)"""
+        self._ensure_worker()
+        future = Future()
+        self._requests.put((text, future))
+        return future
+
+    def score(self, text: str, timeout: Optional[float] = 30.0) -> float:
+        """Score a text, blocking until its batch has run"""
+        return self.submit(text).result(timeout=timeout)
+
+    def _ensure_worker(self):
+        # Started on first use so the thread lives in the process that scores,
+        # not in a preloaded parent that later forks
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='ai-detector-batcher', daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                scores = self._score_batch([text for text, _ in batch])
+                for (_, future), value in zip(batch, scores):
+                    future.set_result(value)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _windows(self, text: str) -> List[List[int]]:
+        """Split a document into overlapping token windows that fit the model"""
+        ids = self.tokenizer(text, add_special_tokens=False, return_attention_mask=False)['input_ids']
+        body_length = self.max_length - self.tokenizer.num_special_tokens_to_add(pair=False)
+        step = max(1, min(self.stride, body_length))
+
+        windows = []
+        start = 0
+        while True:
+            windows.append(ids[start:start + body_length])
+            if start + body_length >= len(ids):
+                break
+            start += step
+        return windows
+
+    def _score_batch(self, texts: List[str]) -> List[float]:
+        import torch
+
+        # Flatten every window of every document, remembering its owner
+        owners = []
+        window_ids = []
+        for index, text in enumerate(texts):
+            for window in self._windows(text):
+                owners.append(index)
+                window_ids.append(window)
+
+        probabilities = []
+        for offset in range(0, len(window_ids), self.max_batch_size):
+            chunk = [
+                self.tokenizer.build_inputs_with_special_tokens(window)
+                for window in window_ids[offset:offset + self.max_batch_size]
+            ]
+            inputs = self.tokenizer.pad({'input_ids': chunk}, return_tensors='pt')
+            with torch.no_grad():
+                logits = self.model(**inputs).logits
+                predictions = torch.nn.functional.softmax(logits, dim=-1)
+            probabilities.extend(predictions[:, self.ai_label_index].tolist())
+
+        # Token-weighted mean across each document's windows
+        totals = [0.0] * len(texts)
+        weights = [0] * len(texts)
+        for owner, window, probability in zip(owners, window_ids, probabilities):
+            weight = max(1, len(window))
+            totals[owner] += probability * weight
+            weights[owner] += weight
+
+        self.stats['requests'] += len(texts)
+        self.stats['batches'] += 1
+        self.stats['windows'] += len(window_ids)
+
+        return [totals[i] / weights[i] * 100 if weights[i] else 0.0 for i in range(len(texts))]
+
+
+class RemoteInferenceClient:
+    """
+    Client for a sidecar inference server started with `python batched_inference.py`.
+    Each thread keeps its own connection.
+    """
+
+    def __init__(self, address, authkey: bytes, timeout: float = 30.0):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def score(self, text: str, timeout: Optional[float] = None) -> float:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = Client(self.address, authkey=self.authkey)
+            self._local.connection = connection
+
+        try:
+            connection.send(('score', text))
+            if not connection.poll(timeout or self.timeout):
+                raise TimeoutError("Inference server did not respond in time")
+            status, value = connection.recv()
+        except Exception:
+            self._local.connection = None
+            try:
+                connection.close()
+            except Exception:
+                pass
+            raise
+
+        if status != 'ok':
+            raise RuntimeError(f"Inference server error: {value}")
+        return value
+
+
+def inference_authkey() -> Optional[bytes]:
+    """
+    Shared secret for the sidecar connection, from AI_INFERENCE_AUTHKEY
+
+    There is deliberately no default: multiprocessing connections unpickle
+    what they receive, so a known key would let anyone who can reach the
+    port run code in the server.
+    """
+    authkey = os.environ.get('AI_INFERENCE_AUTHKEY', '')
+    return authkey.encode('utf-8') if authkey else None
+
+
+def parse_address(address: str):
+    """'host:port' -> (host, port); anything else is treated as a unix socket path"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+_backend = None
+_backend_disabled = False  # sidecar configured without a key; decided once per process
+_backend_lock = threading.Lock()
+
+
+def get_inference_backend(model=None, tokenizer=None):
+    """
+    Return the process-wide scoring backend
+
+    Uses the sidecar server when AI_INFERENCE_ADDRESS is set, otherwise an
+    in-process BatchedInferenceQueue around the given model and tokenizer.
+    Returns None when neither is available, or when the sidecar is
+    configured without AI_INFERENCE_AUTHKEY.
+    """
+    global _backend, _backend_disabled
+    if _backend is not None or _backend_disabled:
+        return _backend
+
+    with _backend_lock:
+        if _backend is None and not _backend_disabled:
+            address = os.environ.get('AI_INFERENCE_ADDRESS')
+            if address:
+                authkey = inference_authkey()
+                if authkey is None:
+                    logger.warning("AI_INFERENCE_ADDRESS is set without AI_INFERENCE_AUTHKEY - "
+                                   "not connecting to the inference server")
+                    _backend_disabled = True
+                    return None
+                _backend = RemoteInferenceClient(parse_address(address), authkey=authkey)
+            elif model is not None and tokenizer is not None:
+                _backend = BatchedInferenceQueue(
+                    model, tokenizer,
+                    max_batch_size=int(os.environ.get('AI_INFERENCE_MAX_BATCH', 16)),
+                    max_wait_ms=float(os.environ.get('AI_INFERENCE_MAX_WAIT_MS', 10))
+                )
+    return _backend
+
+
+def serve(address, authkey: bytes, model_name: str = DEFAULT_MODEL_NAME,
+          max_batch_size: int = 16, max_wait_ms: float = 10.0):
+    """Load one model copy and serve scoring requests from all local workers"""
+    if not authkey:
+        raise ValueError("An authkey is required to serve inference requests")
+
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    inference_queue = BatchedInferenceQueue(model, tokenizer, max_batch_size=max_batch_size,
+                                            max_wait_ms=max_wait_ms)
+
+    def handle(connection):
+        try:
+            while True:
+                command, text = connection.recv()
+                if command != 'score':
+                    connection.send(('error', f"Unknown command: {command}"))
+                    continue
+                try:
+                    connection.send(('ok', inference_queue.score(text)))
+                except Exception as e:
+                    connection.send(('error', str(e)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    with Listener(address, authkey=authkey) as listener:
+        print(f"✓ AI detector inference server listening on {address}")
+        while True:
+            connection = listener.accept()
+            threading.Thread(target=handle, args=(connection,), daemon=True).start()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Shared AI detector inference server')
+    parser.add_argument('--address', default=os.environ.get('AI_INFERENCE_ADDRESS', '127.0.0.1:8765'))
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    parser.add_argument('--max-batch-size', type=int, default=int(os.environ.get('AI_INFERENCE_MAX_BATCH', 16)))
+    parser.add_argument('--max-wait-ms', type=float, default=float(os.environ.get('AI_INFERENCE_MAX_WAIT_MS', 10)))
+    args = parser.parse_args()
+
+    authkey = inference_authkey()
+    if authkey is None:
+        sys.exit("AI_INFERENCE_AUTHKEY must be set to a secret shared with the web workers")
+
+    try:
+        serve(
+            parse_address(args.address),
+            authkey=authkey,
+            model_name=args.model,
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms
+        )
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -66,6 +66,9 @@ class Config:
     
     # Cache Configuration
     REDIS_CACHE_TIMEOUT = int(os.environ.get('REDIS_CACHE_TIMEOUT', 3600))  # 1 hour
+
+    # Streaming Configuration
+    STREAM_PACING_MODE = os.environ.get('STREAM_PACING_MODE', 'realtime')  # 'realtime' or 'staged'
     
     # Subscription Tiers Configuration
     SUBSCRIPTION_LIMITS = {
@@ -4,15 +4,15 @@ Enhanced Article Extraction System
 Comprehensive solution for extracting article data from news websites
 """
 
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import re
 from datetime import datetime
-import json
 from typing import Dict, List, Optional, Tuple
 import traceback
 
+from analysis.html_document import HTMLDocument
+from services.page_cache import get_page_cache
+
 class ArticleExtractor:
     """
     Comprehensive article extraction with fallback strategies
@@ -34,26 +34,36 @@ class ArticleExtractor:
         Main extraction method with comprehensive fallbacks
         """
         try:
-            # Fetch the page
-            response = requests.get(url, headers=self.headers, timeout=15, allow_redirects=True)
+            # Repeat analyses of a trending URL skip the network and parsing
+            page_cache = get_page_cache()
+            cached = page_cache.lookup(url, 'article_extractor')
+            if cached:
+                return cached
+            
+            # Fetch the page (conditional GET when a cached copy exists)
+            response = page_cache.fetch(url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            cached = page_cache.get_extraction(response, 'article_extractor')
+            if cached:
+                return cached
+            
+            # Parse HTML once; every extractor below queries this document
+            document = HTMLDocument.for_page(response)
             
             # Parse domain
             parsed_url = urlparse(response.url)  # Use final URL after redirects
             domain = parsed_url.netloc.replace('www.', '')
             
             # Extract all components
-            title = self._extract_title(soup, domain)
-            authors = self._extract_authors(soup, response.text)
-            date = self._extract_date(soup, response.text)
-            content = self._extract_content(soup)
-            description = self._extract_description(soup)
+            title = self._extract_title(document, domain)
+            authors = self._extract_authors(document)
+            date = self._extract_date(document)
+            content = self._extract_content(document)
+            description = self._extract_description(document)
             
             # Extract structured data if available
-            structured_data = self._extract_structured_data(soup)
+            structured_data = self._extract_structured_data(document)
             
             # Determine article topic
             topic = self._determine_topic(title, content, description)
@@ -61,7 +71,7 @@ class ArticleExtractor:
             # Validate extraction
             extraction_quality = self._assess_extraction_quality(content, title, authors, date)
             
-            return {
+            result = {
                 'content': content,
                 'title': title,
                 'authors': authors,
@@ -74,46 +84,32 @@ class ArticleExtractor:
                 'extraction_quality': extraction_quality,
                 'extraction_success': extraction_quality['overall_score'] > 0.5
             }
+            page_cache.store_extraction(url, 'article_extractor', result, response)
+            return result
             
         except Exception as e:
             print(f"Extraction error for {url}: {str(e)}")
             traceback.print_exc()
             return None
     
-    def _extract_title(self, soup: BeautifulSoup, domain: str) -> str:
+    def _extract_title(self, document: HTMLDocument, domain: str) -> str:
         """
         Extract article title with multiple strategies
         """
+        soup = document.soup
+        
         # Strategy 1: Meta tags (most reliable)
-        meta_selectors = [
-            ('meta[property="og:title"]', 'content'),
-            ('meta[name="twitter:title"]', 'content'),
-            ('meta[property="article:title"]', 'content'),
-            ('meta[name="title"]', 'content'),
-            ('meta[itemprop="headline"]', 'content')
-        ]
+        meta_keys = ['og:title', 'twitter:title', 'article:title', 'title', 'headline']
         
-        for selector, attr in meta_selectors:
-            elem = soup.select_one(selector)
-            if elem and elem.get(attr):
-                title = elem[attr].strip()
-                if title and len(title) > 10:
-                    return self._clean_title(title, domain)
+        for key in meta_keys:
+            title = document.meta_content(key)
+            if title and len(title) > 10:
+                return self._clean_title(title, domain)
         
         # Strategy 2: Structured data
-        json_ld = soup.find('script', type='application/ld+json')
-        if json_ld:
-            try:
-                data = json.loads(json_ld.string)
-                if isinstance(data, dict):
-                    if 'headline' in data:
-                        return self._clean_title(data['headline'], domain)
-                    if '@graph' in data:
-                        for item in data['@graph']:
-                            if isinstance(item, dict) and 'headline' in item:
-                                return self._clean_title(item['headline'], domain)
-            except:
-                pass
+        for data in document.json_ld:
+            if isinstance(data.get('headline'), str):
+                return self._clean_title(data['headline'], domain)
         
         # Strategy 3: H1 tags with priority
         h1_candidates = []
@@ -172,37 +168,23 @@ class ArticleExtractor:
         
         return title.strip()
     
-    def _extract_authors(self, soup: BeautifulSoup, html_text: str) -> List[str]:
+    def _extract_authors(self, document: HTMLDocument) -> List[str]:
         """
         Extract authors with comprehensive strategies
         """
+        soup = document.soup
         authors = set()
         
         # Strategy 1: Meta tags
-        meta_selectors = [
-            'meta[name="author"]',
-            'meta[property="article:author"]',
-            'meta[name="byl"]',
-            'meta[property="author"]',
-            'meta[name="parsely-author"]',
-            'meta[name="sailthru.author"]'
-        ]
+        meta_keys = ['author', 'article:author', 'byl', 'parsely-author', 'sailthru.author']
         
-        for selector in meta_selectors:
-            elements = soup.select(selector)
-            for elem in elements:
-                content = elem.get('content', '').strip()
-                if content:
-                    authors.update(self._parse_author_string(content))
+        for key in meta_keys:
+            for content in document.meta_values(key):
+                authors.update(self._parse_author_string(content))
         
         # Strategy 2: Structured data
-        json_ld = soup.find_all('script', type='application/ld+json')
-        for script in json_ld:
-            try:
-                data = json.loads(script.string)
-                authors.update(self._extract_authors_from_json_ld(data))
-            except:
-                continue
+        for data in document.json_ld:
+            authors.update(self._extract_authors_from_json_ld(data))
         
         # Strategy 3: Semantic HTML
         semantic_selectors = [
@@ -220,33 +202,10 @@ class ArticleExtractor:
                 if self._is_valid_author(text):
                     authors.add(self._clean_author_name(text))
         
-        # Strategy 4: Class-based selectors
-        class_patterns = [
-            r'class="[^"]*(?:author|byline|writer|reporter|journalist|correspondent)[^"]*"',
-            r'class="[^"]*(?:by-line|article-author|post-author|entry-author)[^"]*"',
-            r'class="[^"]*(?:author-name|author-link|author-bio)[^"]*"'
-        ]
-        
-        for pattern in class_patterns:
-            matches = re.finditer(pattern, html_text, re.IGNORECASE)
-            for match in matches:
-                # Extract the element
-                start = html_text.rfind('<', 0, match.start())
-                end = html_text.find('>', match.end())
-                if start != -1 and end != -1:
-                    element_html = html_text[start:end+1]
-                    # Find the closing tag
-                    tag_match = re.match(r'<(\w+)', element_html)
-                    if tag_match:
-                        tag_name = tag_match.group(1)
-                        close_tag = f'</{tag_name}>'
-                        close_pos = html_text.find(close_tag, end)
-                        if close_pos != -1:
-                            full_element = html_text[start:close_pos+len(close_tag)]
-                            elem_soup = BeautifulSoup(full_element, 'html.parser')
-                            text = elem_soup.get_text(strip=True)
-                            if self._is_valid_author(text):
-                                authors.add(self._clean_author_name(text))
+        # Strategy 4: Byline elements (author/byline/writer/reporter classes)
+        for text in document.byline_texts:
+            if self._is_valid_author(text):
+                authors.add(self._clean_author_name(text))
         
         # Strategy 5: Text patterns
         text_patterns = [
@@ -258,7 +217,7 @@ class ArticleExtractor:
         ]
         
         # Search in first 1000 characters
-        search_text = soup.get_text()[:1000]
+        search_text = document.head_text(1000)
         for pattern in text_patterns:
             matches = re.finditer(pattern, search_text, re.MULTILINE)
             for match in matches:
@@ -377,41 +336,26 @@ class ArticleExtractor:
         
         return True
     
-    def _extract_date(self, soup: BeautifulSoup, html_text: str) -> Optional[str]:
+    def _extract_date(self, document: HTMLDocument) -> Optional[str]:
         """
         Extract publication date with multiple strategies
         """
-        # Strategy 1: Meta tags
-        meta_selectors = [
-            ('meta[property="article:published_time"]', 'content'),
-            ('meta[name="publish_date"]', 'content'),
-            ('meta[name="publication_date"]', 'content'),
-            ('meta[property="article:published"]', 'content'),
-            ('meta[name="date"]', 'content'),
-            ('meta[itemprop="datePublished"]', 'content'),
-            ('meta[name="parsely-pub-date"]', 'content'),
-            ('meta[name="sailthru.date"]', 'content'),
-            ('meta[property="og:article:published_time"]', 'content'),
-            ('meta[name="DC.date.issued"]', 'content')
-        ]
+        soup = document.soup
         
-        for selector, attr in meta_selectors:
-            elem = soup.select_one(selector)
-            if elem and elem.get(attr):
-                date = elem[attr].strip()
-                if date:
-                    return self._normalize_date(date)
+        # Strategy 1: Meta tags
+        date = document.meta_content(
+            'article:published_time', 'publish_date', 'publication_date', 'article:published',
+            'date', 'datePublished', 'parsely-pub-date', 'sailthru.date',
+            'og:article:published_time', 'DC.date.issued'
+        )
+        if date:
+            return self._normalize_date(date)
         
         # Strategy 2: Structured data
-        json_ld = soup.find_all('script', type='application/ld+json')
-        for script in json_ld:
-            try:
-                data = json.loads(script.string)
-                date = self._extract_date_from_json_ld(data)
-                if date:
-                    return self._normalize_date(date)
-            except:
-                continue
+        for data in document.json_ld:
+            date = self._extract_date_from_json_ld(data)
+            if isinstance(date, str) and date:
+                return self._normalize_date(date)
         
         # Strategy 3: Time elements
         time_selectors = [
@@ -464,7 +408,7 @@ class ArticleExtractor:
             r'(\d{1,2} [A-Za-z]+ \d{4})'
         ]
         
-        search_text = soup.get_text()[:2000]  # First 2000 chars
+        search_text = document.head_text(2000)  # First 2000 chars
         for pattern in date_patterns:
             match = re.search(pattern, search_text)
             if match:
@@ -521,13 +465,12 @@ class ArticleExtractor:
         # In production, you'd parse and format to ISO 8601
         return date_str.strip()
     
-    def _extract_content(self, soup: BeautifulSoup) -> str:
+    def _extract_content(self, document: HTMLDocument) -> str:
         """
         Extract main article content
         """
-        # Remove script and style elements
-        for element in soup(['script', 'style', 'noscript']):
-            element.decompose()
+        # Tree with script, style and page chrome removed
+        soup = document.content_soup
         
         # Strategy 1: Article containers
         content_selectors = [
@@ -618,59 +561,42 @@ class ArticleExtractor:
         
         return True
     
-    def _extract_description(self, soup: BeautifulSoup) -> str:
+    def _extract_description(self, document: HTMLDocument) -> str:
         """
         Extract article description/summary
         """
         # Try meta descriptions
-        desc_selectors = [
-            ('meta[property="og:description"]', 'content'),
-            ('meta[name="description"]', 'content'),
-            ('meta[name="twitter:description"]', 'content'),
-            ('meta[itemprop="description"]', 'content'),
-            ('meta[name="sailthru.description"]', 'content')
-        ]
+        desc_keys = ['og:description', 'description', 'twitter:description', 'sailthru.description']
         
-        for selector, attr in desc_selectors:
-            elem = soup.select_one(selector)
-            if elem and elem.get(attr):
-                desc = elem[attr].strip()
-                if desc and len(desc) > 20:
-                    return desc
+        for key in desc_keys:
+            desc = document.meta_content(key)
+            if desc and len(desc) > 20:
+                return desc
         
         # Try structured data
-        json_ld = soup.find('script', type='application/ld+json')
-        if json_ld:
-            try:
-                data = json.loads(json_ld.string)
-                if isinstance(data, dict) and 'description' in data:
-                    return data['description']
-            except:
-                pass
+        if document.json_ld_raw:
+            data = document.json_ld_raw[0]
+            if isinstance(data, dict) and 'description' in data:
+                return data['description']
         
         return ""
     
-    def _extract_structured_data(self, soup: BeautifulSoup) -> dict:
+    def _extract_structured_data(self, document: HTMLDocument) -> dict:
         """
         Extract structured data (JSON-LD, microdata, etc.)
         """
         structured = {}
         
-        # Extract JSON-LD
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
-        for script in json_ld_scripts:
-            try:
-                data = json.loads(script.string)
-                if isinstance(data, dict):
-                    # Extract relevant fields
-                    if '@type' in data:
-                        structured['type'] = data['@type']
-                    if 'publisher' in data:
-                        structured['publisher'] = data['publisher']
-                    if 'keywords' in data:
-                        structured['keywords'] = data['keywords']
-            except:
-                continue
+        # Extract JSON-LD (parsed once, before scripts were stripped)
+        for data in document.json_ld_raw:
+            if isinstance(data, dict):
+                # Extract relevant fields
+                if '@type' in data:
+                    structured['type'] = data['@type']
+                if 'publisher' in data:
+                    structured['publisher'] = data['publisher']
+                if 'keywords' in data:
+                    structured['keywords'] = data['keywords']
         
         return structured
     
@@ -8,24 +8,22 @@ import re
 import json
 import requests
 import time
+import uuid
 from typing import Dict, List, Tuple, Any, Optional
 from collections import Counter, defaultdict
 from datetime import datetime
-import nltk
 from textstat import flesch_reading_ease, flesch_kincaid_grade, gunning_fog
-from transformers import pipeline
-import spacy
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
 import numpy as np
 
-# Download required NLTK data
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
-nltk.download('vader_lexicon', quiet=True)
-nltk.download('averaged_perceptron_tagger', quiet=True)
-nltk.download('maxent_ne_chunker', quiet=True)
-nltk.download('words', quiet=True)
+from services.claim_store import get_claim_store, simple_verdict, FACT_CHECK_ORIGINS
+from services.copyleaks_scans import get_scan_manager
+from services.fact_check_client import get_fact_check_client
+from services.model_registry import get_model_registry, ensure_nltk_data
+from utils.keyword_matcher import KeywordMatcher
+
+# NLTK data the analyzer needs; missing packages are fetched when the first
+# analyzer is created rather than on every import
+NLTK_PACKAGES = ('punkt', 'stopwords', 'vader_lexicon', 'averaged_perceptron_tagger', 'maxent_ne_chunker', 'words')
 
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
@@ -33,6 +31,23 @@ from nltk.sentiment import SentimentIntensityAnalyzer
 from nltk.chunk import ne_chunk
 from nltk.tag import pos_tag
 
+# Keyword proxies for news category scoring
+NEWS_CATEGORY_KEYWORDS = {
+    "hard_news": ["breaking", "urgent", "official", "statement", "announced"],
+    "opinion": ["believe", "think", "should", "must", "opinion", "argue"],
+    "analysis": ["analysis", "examine", "investigate", "study", "research"],
+    "feature": ["story", "journey", "experience", "life", "personal"]
+}
+NEWS_CATEGORY_MATCHER = KeywordMatcher(NEWS_CATEGORY_KEYWORDS)
+
+
+def _load_spacy_model():
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+
+get_model_registry().register('spacy_en', _load_spacy_model, 'spaCy en_core_web_sm pipeline')
+
 
 class PlagiarismChecker:
     """
@@ -105,7 +120,7 @@ class PlagiarismChecker:
         """
         Submit text to Copyleaks for scanning
         """
-        scan_id = f"scan_{int(time.time())}"
+        scan_id = f"scan_{int(time.time())}_{uuid.uuid4().hex[:8]}"
         url = f"https://api.copyleaks.com/v3/downloads/{scan_id}"
         
         headers = {
@@ -118,7 +133,7 @@ class PlagiarismChecker:
             "filename": f"{title}.txt",
             "properties": {
                 "webhooks": {
-                    "status": "https://your-webhook-url.com/status/{STATUS}"
+                    "status": get_scan_manager().webhook_url(scan_id) or "https://your-webhook-url.com/status/{STATUS}"
                 },
                 "includeHtml": False,
                 "pdf": {
@@ -156,31 +171,31 @@ class PlagiarismChecker:
     def _wait_for_results(self, scan_id: str, max_wait: int = 120) -> Optional[Dict]:
         """
         Wait for Copyleaks results with timeout
+        Resolved by the shared scan poller or the completion webhook
+        """
+        try:
+            future = get_scan_manager().track(scan_id, lambda: self._poll_result(scan_id), max_wait)
+            return future.result(timeout=max_wait + 30)
+        except Exception as e:
+            print(f"Error waiting for results: {e}")
+            return None
+    
+    def _poll_result(self, scan_id: str):
+        """
+        Check once for a finished Copyleaks result, returning (status, results)
         """
         url = f"https://api.copyleaks.com/v3/downloads/{scan_id}/result"
         headers = {
             "Authorization": f"Bearer {self.access_token}"
         }
         
-        start_time = time.time()
-        while time.time() - start_time < max_wait:
-            try:
-                response = requests.get(url, headers=headers, timeout=30)
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 404:
-                    # Still processing
-                    time.sleep(5)
-                    continue
-                else:
-                    break
-            except Exception as e:
-                print(f"Error waiting for results: {e}")
-                break
-                
-            time.sleep(5)
-            
-        return None
+        response = requests.get(url, headers=headers, timeout=30)
+        if response.status_code == 200:
+            return 'completed', response.json()
+        elif response.status_code == 404:
+            # Still processing
+            return 'pending', None
+        return 'failed', None
     
     def _format_copyleaks_results(self, results: Dict) -> Dict[str, Any]:
         """
@@ -317,7 +332,8 @@ class FactChecker:
     
     def __init__(self):
         self.api_key = os.environ.get('GOOGLE_FACTCHECK_API_KEY')
-        self.base_url = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+        self.client = get_fact_check_client()
+        self.claim_store = get_claim_store()
         
     def check_claims(self, claims: List[str]) -> List[Dict[str, Any]]:
         """
@@ -328,21 +344,36 @@ class FactChecker:
             
         fact_check_results = []
         
-        for claim in claims[:10]:  # Limit to 10 claims to avoid rate limits
-            try:
-                result = self._check_single_claim(claim)
-                if result:
-                    fact_check_results.append(result)
-                else:
-                    # Add mock data for claims not found in database
-                    fact_check_results.append(self._generate_mock_claim_result(claim))
-                    
-                # Rate limiting - Google Fact Check API has rate limits
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"Error checking claim: {e}")
-                fact_check_results.append(self._generate_mock_claim_result(claim))
+        # Limit to 10 claims; claims fact-checkers already resolved are answered locally
+        known = {}
+        for claim in claims[:10]:
+            match = self.claim_store.match(claim, origins=FACT_CHECK_ORIGINS)
+            if match:
+                known[claim] = match
+        
+        # The rest run concurrently under the client's rate limit
+        lookups = iter(self.client.lookup([claim for claim in claims[:10] if claim not in known]))
+        
+        for claim in claims[:10]:
+            if claim in known:
+                fact_check_results.append(self._format_stored_result(claim, known[claim]))
+                continue
+            
+            lookup = next(lookups)
+            if lookup['status'] == 'found':
+                result = self._format_claim_result(lookup['claim'], lookup['top_claim'])
+                self.claim_store.record(
+                    result['claim'], simple_verdict(result['verdict']), source=result['source'],
+                    explanation=result['explanation'], rating=result['verdict'],
+                    confidence=result['confidence'], source_url=result['source_url'],
+                    origin='google_fact_check'
+                )
+                fact_check_results.append(result)
+            else:
+                if lookup['status'] == 'error':
+                    print(f"Error checking claim: {lookup.get('error')}")
+                # Add mock data for claims not found in database
+                fact_check_results.append(self._generate_mock_claim_result(lookup['claim']))
                 
         return fact_check_results
     
@@ -350,41 +381,47 @@ class FactChecker:
         """
         Check a single claim against Google Fact Check API
         """
-        try:
-            params = {
-                'key': self.api_key,
-                'query': claim,
-                'languageCode': 'en'
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                claims = data.get('claims', [])
-                
-                if claims:
-                    # Get the most relevant claim
-                    best_claim = claims[0]
-                    
-                    claim_review = best_claim.get('claimReview', [{}])[0]
-                    
-                    return {
-                        "claim": claim,
-                        "verdict": claim_review.get('textualRating', 'Unverified'),
-                        "source": claim_review.get('publisher', {}).get('name', 'Unknown'),
-                        "source_url": claim_review.get('url', ''),
-                        "confidence": self._calculate_confidence(claim_review),
-                        "explanation": claim_review.get('title', 'No explanation available'),
-                        "api_used": "Google Fact Check",
-                        "checked_date": datetime.now().isoformat()
-                    }
-                    
-        except Exception as e:
-            print(f"Error in Google Fact Check API: {e}")
-            
+        lookup = self.client.lookup([claim])[0]
+        if lookup['status'] == 'error':
+            print(f"Error in Google Fact Check API: {lookup.get('error')}")
+        if lookup['status'] == 'found':
+            return self._format_claim_result(claim, lookup['top_claim'])
         return None
     
+    def _format_claim_result(self, claim: str, best_claim: Dict) -> Dict[str, Any]:
+        """
+        Build a result from the most relevant claim returned by the API
+        """
+        claim_review = (best_claim.get('claimReview') or [{}])[0]
+        
+        return {
+            "claim": claim,
+            "verdict": claim_review.get('textualRating', 'Unverified'),
+            "source": claim_review.get('publisher', {}).get('name', 'Unknown'),
+            "source_url": claim_review.get('url', ''),
+            "confidence": self._calculate_confidence(claim_review),
+            "explanation": claim_review.get('title', 'No explanation available'),
+            "api_used": "Google Fact Check",
+            "checked_date": datetime.now().isoformat()
+        }
+    
+    def _format_stored_result(self, claim: str, match: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a result from a verdict already in the claim store
+        """
+        return {
+            "claim": claim,
+            "verdict": match.get('rating') or match['verdict'],
+            "source": match['source'],
+            "source_url": match.get('source_url', ''),
+            "confidence": match.get('confidence') or 0.5,
+            "explanation": match.get('explanation') or 'No explanation available',
+            "api_used": "Claim Store",
+            "checked_date": match['checked_at'],
+            "matched_claim": match['matched_claim'],
+            "similarity": match['similarity']
+        }
+    
     def _calculate_confidence(self, claim_review: Dict) -> float:
         """
         Calculate confidence score based on fact-check rating
@@ -510,6 +547,7 @@ class EnhancedContentAnalyzer:
     
     def __init__(self):
         # Initialize models
+        ensure_nltk_data(*NLTK_PACKAGES)
         self.sia = SentimentIntensityAnalyzer()
         self.stop_words = set(stopwords.words('english'))
         
@@ -517,20 +555,18 @@ class EnhancedContentAnalyzer:
         self.plagiarism_checker = PlagiarismChecker()
         self.fact_checker = FactChecker()
         
-        # Initialize spaCy for advanced NLP
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except:
-            # Fallback if spaCy model not installed
-            self.nlp = None
-            
         # Initialize transformer models for advanced analysis
         try:
             # Only load if explicitly needed to save memory
             self.emotion_classifier = None
         except:
             self.emotion_classifier = None
-            
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline for advanced NLP, loaded on first use (None if not installed)"""
+        return get_model_registry().get('spacy_en')
+    
     def analyze_article(self, text: str, url: str = "") -> Dict[str, Any]:
         """
         Perform comprehensive analysis on news article
@@ -642,6 +678,7 @@ class EnhancedContentAnalyzer:
         
         # Extract key sentences using TF-IDF
         if len(sentences) > 3:
+            from sklearn.feature_extraction.text import TfidfVectorizer
             vectorizer = TfidfVectorizer(stop_words='english')
             tfidf_matrix = vectorizer.fit_transform(sentences)
             scores = tfidf_matrix.sum(axis=1).A1
@@ -746,6 +783,9 @@ class EnhancedContentAnalyzer:
             if len(sentences) < 5:
                 return []
                 
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.decomposition import LatentDirichletAllocation
+            
             # Vectorize
             vectorizer = TfidfVectorizer(max_features=50, stop_words='english')
             doc_term_matrix = vectorizer.fit_transform(sentences)
@@ -777,19 +817,12 @@ class EnhancedContentAnalyzer:
         """
         # This would ideally use a trained classifier
         # For now, using keyword density as a proxy
-        categories = {
-            "hard_news": ["breaking", "urgent", "official", "statement", "announced"],
-            "opinion": ["believe", "think", "should", "must", "opinion", "argue"],
-            "analysis": ["analysis", "examine", "investigate", "study", "research"],
-            "feature": ["story", "journey", "experience", "life", "personal"]
-        }
-        
-        text_lower = text.lower()
+        counts = NEWS_CATEGORY_MATCHER.category_counts(text, distinct=False)
+        word_count = len(text.split())
         scores = {}
         
-        for category, keywords in categories.items():
-            score = sum(text_lower.count(keyword) for keyword in keywords)
-            scores[category] = score / len(text_lower.split()) if text_lower.split() else 0
+        for category in NEWS_CATEGORY_KEYWORDS:
+            scores[category] = counts.get(category, 0) / word_count if word_count else 0
             
         return scores
     
@@ -39,3 +39,16 @@ graceful_timeout = 30
 limit_request_line = 8190
 limit_request_fields = 100
 limit_request_field_size = 8190
+
+# Background analysis jobs - start each worker's job threads after the fork so
+# they consume the shared Redis queue instead of living in the master process
+def post_fork(server, worker):
+    from services.job_queue import get_job_queue
+    get_job_queue().start()
+
+    # Models load on first use; MODEL_PRELOAD names any to warm up in the
+    # background so the worker starts serving immediately
+    if os.environ.get("MODEL_PRELOAD"):
+        import threading
+        from services.model_registry import preload_from_env
+        threading.Thread(target=preload_from_env, name="model-preload", daemon=True).start()
@@ -6,7 +6,11 @@ Enhanced version with stealth techniques
 
 import logging
 import os
+import queue
 import random
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
@@ -25,236 +29,475 @@ try:
 except ImportError:
     logger.warning("Playwright not available - will use standard extraction")
 
-def extract_with_playwright(url):
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+
+BROWSER_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--disable-web-security',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-infobars',
+    '--window-position=0,0',
+    '--ignore-certificate-errors',
+    '--ignore-certificate-errors-spki-list',
+    '--disable-accelerated-2d-canvas',
+    '--disable-gpu',
+    '--window-size=1920,1080',
+    '--start-maximized',
+    f'--user-agent={USER_AGENT}'
+]
+
+# Enhanced stealth settings for every browser context
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'screen': {'width': 1920, 'height': 1080},
+    'user_agent': USER_AGENT,
+    'locale': 'en-US',
+    'timezone_id': 'America/New_York',
+    'permissions': ['geolocation'],
+    'geolocation': {'latitude': 40.7128, 'longitude': -74.0060},
+    'color_scheme': 'light',
+    'extra_http_headers': {
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Cache-Control': 'max-age=0',
+        'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="121", "Google Chrome";v="121"',
+        'Sec-Ch-Ua-Mobile': '?0',
+        'Sec-Ch-Ua-Platform': '"Windows"',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+        'Upgrade-Insecure-Requests': '1'
+    }
+}
+
+# Remove automation indicators
+STEALTH_SCRIPT = """
+    // Remove webdriver property
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+    
+    // Remove automation indicators
+    window.chrome = {
+        runtime: {}
+    };
+    
+    // Add plugins
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [
+            {
+                0: {type: "application/x-google-chrome-pdf", suffixes: "pdf", description: "Portable Document Format"},
+                description: "Portable Document Format",
+                filename: "internal-pdf-viewer",
+                length: 1,
+                name: "Chrome PDF Plugin"
+            }
+        ]
+    });
+    
+    // Override permissions
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+            Promise.resolve({ state: Notification.permission }) :
+            originalQuery(parameters)
+    );
+    
+    // Add realistic window properties
+    Object.defineProperty(navigator, 'hardwareConcurrency', {
+        get: () => 8
+    });
+    
+    Object.defineProperty(navigator, 'deviceMemory', {
+        get: () => 8
+    });
+"""
+
+# Requests aborted at the route level - article text never needs them
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+BLOCKED_HOST_KEYWORDS = (
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'google-analytics.com',
+    'googletagmanager.com', 'adservice.google', 'amazon-adsystem.com', 'scorecardresearch.com',
+    'taboola.com', 'outbrain.com', 'chartbeat.', 'quantserve.com', 'criteo.', 'adnxs.com',
+    'moatads.com', 'facebook.net', 'hotjar.com'
+)
+
+# Common cookie accept button selectors
+COOKIE_SELECTORS = [
+    'button:has-text("Accept")',
+    'button:has-text("Accept all")',
+    'button:has-text("I agree")',
+    'button:has-text("Got it")',
+    'button:has-text("OK")',
+    '[class*="cookie"] button',
+    '[id*="cookie"] button',
+    '[class*="consent"] button'
+]
+
+
+class RenderCancelled(Exception):
+    """The caller no longer wants the page being rendered"""
+
+
+def _check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise RenderCancelled("Playwright render cancelled by caller")
+
+
+def _block_unneeded_requests(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return route.abort()
+    host = urlparse(request.url).netloc
+    if any(keyword in host for keyword in BLOCKED_HOST_KEYWORDS):
+        return route.abort()
+    return route.continue_()
+
+
+class BrowserSlot(threading.Thread):
     """
-    Extract article content using Playwright with stealth techniques
-    Returns None if extraction fails
+    Worker thread owning one Playwright instance, one Chromium and one warm
+    context. The sync Playwright API is bound to the thread that started it,
+    so every browser operation for this slot happens on this thread.
     """
-    if not PLAYWRIGHT_AVAILABLE:
-        logger.error("Playwright not available but was called")
-        return None
     
-    browser = None
-    try:
-        with sync_playwright() as p:
-            # First, check if browser is actually available
+    def __init__(self, index, jobs, context_max_uses, browser_max_uses, page_timeout_ms):
+        super().__init__(name=f'playwright-slot-{index}', daemon=True)
+        self.index = index
+        self.jobs = jobs
+        self.context_max_uses = context_max_uses
+        self.browser_max_uses = browser_max_uses
+        self.page_timeout_ms = page_timeout_ms
+        
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._context_uses = 0
+        self._browser_uses = 0
+        self.stats = {
+            'browser_launches': 0,
+            'browser_recycles': 0,
+            'context_recycles': 0,
+            'pages': 0,
+            'failures': 0,
+            'cancelled': 0,
+            'last_error': None
+        }
+    
+    def run(self):
+        try:
+            self._playwright = sync_playwright().start()
+        except Exception as e:
+            logger.error(f"Failed to start Playwright (slot {self.index}): {str(e)}")
+            self.stats['last_error'] = str(e)
+        
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                url, future, cancel = job
+                if cancel is not None and cancel.is_set():
+                    future.cancel()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if self._playwright is None:
+                        raise RuntimeError(f"Playwright failed to start: {self.stats['last_error']}")
+                    future.set_result(self._render(url, cancel))
+                except RenderCancelled as e:
+                    # Abandoned between steps; the browser itself is fine
+                    self.stats['cancelled'] += 1
+                    future.set_exception(e)
+                except Exception as e:
+                    self.stats['failures'] += 1
+                    self.stats['last_error'] = str(e)
+                    future.set_exception(e)
+                    # A failed page may leave the context or browser wedged
+                    self._close_browser(recycled=True)
+        finally:
+            self._close_browser()
+            if self._playwright is not None:
+                try:
+                    self._playwright.stop()
+                except Exception:
+                    pass
+    
+    def _ensure_context(self):
+        if self._browser is not None and (not self._browser.is_connected()
+                                          or self._browser_uses >= self.browser_max_uses):
+            self._close_browser(recycled=True)
+        
+        if self._browser is None:
             try:
-                # Launch with stealth options
-                browser = p.chromium.launch(
-                    headless=True,  # Must be headless on Render
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--disable-web-security',
-                        '--disable-features=IsolateOrigins,site-per-process',
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-infobars',
-                        '--window-position=0,0',
-                        '--ignore-certificate-errors',
-                        '--ignore-certificate-errors-spki-list',
-                        '--disable-accelerated-2d-canvas',
-                        '--disable-gpu',
-                        '--window-size=1920,1080',
-                        '--start-maximized',
-                        '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-                    ]
-                )
-                logger.info("Browser launched successfully")
+                self._browser = self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)  # Must be headless on Render
             except Exception as e:
-                # If browser launch fails, log the error and return None
                 logger.error(f"Failed to launch browser: {str(e)}")
-                
                 # Check if it's the executable not found error
                 if "Executable doesn't exist" in str(e):
                     logger.error("Chrome executable not found. Playwright browsers may not be properly installed.")
                     logger.error("Try running 'playwright install chromium' in your build script.")
-                
-                return None
+                raise
+            self._browser_uses = 0
+            self.stats['browser_launches'] += 1
+            logger.info(f"Browser launched successfully (slot {self.index})")
+        
+        if self._context is not None and self._context_uses >= self.context_max_uses:
+            self._close_context()
+            self.stats['context_recycles'] += 1
+        
+        if self._context is None:
+            self._context = self._browser.new_context(**CONTEXT_OPTIONS)
+            self._context.add_init_script(STEALTH_SCRIPT)
+            self._context.route('**/*', _block_unneeded_requests)
+            self._context.set_default_timeout(self.page_timeout_ms)
+            self._context.set_default_navigation_timeout(self.page_timeout_ms)
+            self._context_uses = 0
             
-            # If we get here, browser launched successfully
+            # Visit a benign page once per context (helps with some anti-bot
+            # systems) instead of once per article
+            page = self._context.new_page()
             try:
-                # Create context with enhanced stealth settings
-                context = browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    screen={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-                    locale='en-US',
-                    timezone_id='America/New_York',
-                    permissions=['geolocation'],
-                    geolocation={'latitude': 40.7128, 'longitude': -74.0060},
-                    color_scheme='light',
-                    extra_http_headers={
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Cache-Control': 'max-age=0',
-                        'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="121", "Google Chrome";v="121"',
-                        'Sec-Ch-Ua-Mobile': '?0',
-                        'Sec-Ch-Ua-Platform': '"Windows"',
-                        'Sec-Fetch-Dest': 'document',
-                        'Sec-Fetch-Mode': 'navigate',
-                        'Sec-Fetch-Site': 'none',
-                        'Sec-Fetch-User': '?1',
-                        'Upgrade-Insecure-Requests': '1'
-                    }
-                )
-                
-                # Create page
-                page = context.new_page()
-                
-                # Remove automation indicators
-                page.add_init_script("""
-                    // Remove webdriver property
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-                    
-                    // Remove automation indicators
-                    window.chrome = {
-                        runtime: {}
-                    };
-                    
-                    // Add plugins
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [
-                            {
-                                0: {type: "application/x-google-chrome-pdf", suffixes: "pdf", description: "Portable Document Format"},
-                                description: "Portable Document Format",
-                                filename: "internal-pdf-viewer",
-                                length: 1,
-                                name: "Chrome PDF Plugin"
-                            }
-                        ]
-                    });
-                    
-                    // Override permissions
-                    const originalQuery = window.navigator.permissions.query;
-                    window.navigator.permissions.query = (parameters) => (
-                        parameters.name === 'notifications' ?
-                            Promise.resolve({ state: Notification.permission }) :
-                            originalQuery(parameters)
-                    );
-                    
-                    // Add realistic window properties
-                    Object.defineProperty(navigator, 'hardwareConcurrency', {
-                        get: () => 8
-                    });
-                    
-                    Object.defineProperty(navigator, 'deviceMemory', {
-                        get: () => 8
-                    });
-                """)
-                
-                # Random delay to appear more human
-                page.wait_for_timeout(random.randint(500, 1500))
-                
-                # Navigate to URL with better timeout handling
-                logger.info(f"Playwright: Navigating to {url}")
-                try:
-                    # Navigate first to a benign page (helps with some anti-bot systems)
-                    page.goto('https://www.google.com', wait_until='domcontentloaded', timeout=15000)
-                    page.wait_for_timeout(random.randint(1000, 2000))
-                    
-                    # Now navigate to the target URL
-                    page.goto(url, wait_until='domcontentloaded', timeout=45000)
-                    
-                    # Wait for potential Cloudflare challenge
-                    page.wait_for_timeout(5000)
-                    
-                    # Check if we're still on a challenge page
-                    page_text = page.content()
-                    if 'challenges.cloudflare.com' in page_text or 'Just a moment' in page_text:
-                        logger.info("Cloudflare challenge detected, waiting longer...")
-                        # Wait up to 15 seconds for challenge to complete
-                        try:
-                            page.wait_for_selector('article', timeout=15000)
-                        except:
-                            # Try waiting for any main content indicator
-                            page.wait_for_timeout(10000)
-                    
-                except Exception as timeout_err:
-                    logger.warning(f"Initial page load issue: {timeout_err}")
-                    # Try one more time with minimal waiting
-                    try:
-                        page.goto(url, wait_until='commit', timeout=30000)
-                        page.wait_for_timeout(5000)
-                    except Exception as retry_err:
-                        logger.error(f"Page load failed even with retry: {retry_err}")
-                        raise
-                
-                # Get domain
-                domain = urlparse(url).netloc.replace('www.', '')
-                
-                # Try to handle cookie consent with more human-like behavior
-                try:
-                    # Move mouse to center first
-                    page.mouse.move(960, 540)
-                    page.wait_for_timeout(random.randint(500, 1000))
-                    
-                    # Common cookie accept button selectors
-                    cookie_selectors = [
-                        'button:has-text("Accept")',
-                        'button:has-text("Accept all")',
-                        'button:has-text("I agree")',
-                        'button:has-text("Got it")',
-                        'button:has-text("OK")',
-                        '[class*="cookie"] button',
-                        '[id*="cookie"] button',
-                        '[class*="consent"] button'
-                    ]
-                    
-                    for selector in cookie_selectors:
-                        try:
-                            buttons = page.locator(selector).all()
-                            if buttons:
-                                button = buttons[0]
-                                if button.is_visible():
-                                    # Move mouse to button with human-like movement
-                                    box = button.bounding_box()
-                                    if box:
-                                        page.mouse.move(box['x'] + box['width']/2, box['y'] + box['height']/2)
-                                        page.wait_for_timeout(random.randint(200, 500))
-                                        button.click()
-                                        page.wait_for_timeout(random.randint(1000, 2000))
-                                        break
-                        except:
-                            continue
-                except:
-                    pass  # Cookie handling is best-effort
-                
-                # Scroll down a bit to trigger lazy loading
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight * 0.3)")
-                page.wait_for_timeout(1500)
-                
-                # Get the page content
-                html_content = page.content()
-                
-                # Close browser
-                browser.close()
-                browser = None
-                
-                # Now parse the content using BeautifulSoup
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Extract data using the same logic as the main extractor
-                return extract_data_from_soup(soup, domain, url)
-                
+                page.goto('https://www.google.com', wait_until='domcontentloaded', timeout=15000)
             except Exception as e:
-                logger.error(f"Error during page navigation/extraction: {str(e)}")
-                if browser:
-                    browser.close()
-                return None
-            
-    except Exception as e:
-        logger.error(f"Playwright extraction error for {url}: {str(e)}")
-        if browser:
+                logger.warning(f"Context warm-up navigation failed: {str(e)}")
+            finally:
+                page.close()
+        
+        return self._context
+    
+    def _render(self, url, cancel=None):
+        context = self._ensure_context()
+        self._context_uses += 1
+        self._browser_uses += 1
+        self.stats['pages'] += 1
+        
+        page = context.new_page()
+        try:
+            return _load_article_page(page, url, self.page_timeout_ms, cancel)
+        finally:
+            try:
+                page.close()
+            except Exception:
+                pass
+    
+    def _close_context(self):
+        if self._context is not None:
+            try:
+                self._context.close()
+            except Exception:
+                pass
+            self._context = None
+    
+    def _close_browser(self, recycled=False):
+        self._close_context()
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+            if recycled:
+                self.stats['browser_recycles'] += 1
+    
+    def get_health(self):
+        return {
+            'alive': self.is_alive(),
+            'browser_connected': self._browser is not None and self._browser.is_connected(),
+            'context_uses': self._context_uses,
+            'browser_uses': self._browser_uses,
+            **self.stats
+        }
+
+
+class BrowserPool:
+    """
+    Long-lived pool of warm Chromium browsers shared by all requests in a
+    worker process. Contexts are recycled every context_max_uses pages and
+    browsers every browser_max_uses pages, or after a failure.
+    """
+    
+    def __init__(self, size=2, context_max_uses=25, browser_max_uses=200,
+                 page_timeout_ms=30000, fetch_timeout=90.0):
+        self.size = size
+        self.fetch_timeout = fetch_timeout
+        self._jobs = queue.Queue()
+        self._slots = [
+            BrowserSlot(index, self._jobs, context_max_uses, browser_max_uses, page_timeout_ms)
+            for index in range(size)
+        ]
+        for slot in self._slots:
+            slot.start()
+        self.started_at = time.time()
+    
+    def fetch(self, url, timeout=None, cancel=None):
+        """
+        Render a URL on the next free browser and return its HTML
+
+        Setting the cancel event makes the slot skip the job if it has not
+        started, or abandon the page at its next step (navigation, challenge
+        wait, cookie banner, scroll) if it has; the step already in progress
+        still runs to its own Playwright timeout.
+        """
+        cancel = cancel if cancel is not None else threading.Event()
+        _check_cancelled(cancel)
+        future = Future()
+        self._jobs.put((url, future, cancel))
+        try:
+            return future.result(timeout=timeout or self.fetch_timeout)
+        except FutureTimeoutError:
+            cancel.set()
+            raise TimeoutError(f"Playwright fetch exceeded {timeout or self.fetch_timeout}s for {url}")
+    
+    def get_health(self):
+        return {
+            'size': self.size,
+            'queued': self._jobs.qsize(),
+            'uptime_seconds': int(time.time() - self.started_at),
+            'slots': [slot.get_health() for slot in self._slots]
+        }
+    
+    def shutdown(self):
+        for _ in self._slots:
+            self._jobs.put(None)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """
+    Return the process-wide browser pool, starting it on first use so the
+    browsers live in each gunicorn worker rather than the preloaded master
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool(
+                    size=int(os.environ.get('PLAYWRIGHT_POOL_SIZE', 2)),
+                    context_max_uses=int(os.environ.get('PLAYWRIGHT_CONTEXT_MAX_USES', 25)),
+                    browser_max_uses=int(os.environ.get('PLAYWRIGHT_BROWSER_MAX_USES', 200)),
+                    page_timeout_ms=int(os.environ.get('PLAYWRIGHT_PAGE_TIMEOUT_MS', 30000)),
+                    fetch_timeout=float(os.environ.get('PLAYWRIGHT_FETCH_TIMEOUT', 90))
+                )
+    return _pool
+
+
+def get_browser_pool_health():
+    """Pool health for /api/health; does not start the pool"""
+    if not PLAYWRIGHT_AVAILABLE:
+        return {'available': False}
+    if _pool is None:
+        return {'available': True, 'started': False}
+    return {'available': True, 'started': True, **_pool.get_health()}
+
+
+def _load_article_page(page, url, page_timeout_ms, cancel=None):
+    """Navigate a pooled page to the article and return the rendered HTML"""
+    _check_cancelled(cancel)
+    # Navigate to URL with better timeout handling
+    logger.info(f"Playwright: Navigating to {url}")
+    try:
+        page.goto(url, wait_until='domcontentloaded', timeout=page_timeout_ms)
+        
+        # Check if we're on a challenge page
+        page_text = page.content()
+        if 'challenges.cloudflare.com' in page_text or 'Just a moment' in page_text:
+            logger.info("Cloudflare challenge detected, waiting longer...")
+            # Wait up to 15 seconds for challenge to complete
             try:
-                browser.close()
+                page.wait_for_selector('article', timeout=15000)
+            except:
+                # Try waiting for any main content indicator
+                page.wait_for_timeout(10000)
+        else:
+            # Returns as soon as article markup is present
+            try:
+                page.wait_for_selector('article p, main p', timeout=5000)
             except:
                 pass
+        
+    except Exception as timeout_err:
+        logger.warning(f"Initial page load issue: {timeout_err}")
+        # Try one more time with minimal waiting
+        try:
+            page.goto(url, wait_until='commit', timeout=page_timeout_ms)
+            page.wait_for_timeout(5000)
+        except Exception as retry_err:
+            logger.error(f"Page load failed even with retry: {retry_err}")
+            raise
+    
+    _check_cancelled(cancel)
+    
+    # Try to handle cookie consent with more human-like behavior
+    try:
+        # Move mouse to center first
+        page.mouse.move(960, 540)
+        page.wait_for_timeout(random.randint(200, 500))
+        
+        for selector in COOKIE_SELECTORS:
+            try:
+                buttons = page.locator(selector).all()
+                if buttons:
+                    button = buttons[0]
+                    if button.is_visible():
+                        # Move mouse to button with human-like movement
+                        box = button.bounding_box()
+                        if box:
+                            page.mouse.move(box['x'] + box['width']/2, box['y'] + box['height']/2)
+                            page.wait_for_timeout(random.randint(200, 500))
+                            button.click()
+                            page.wait_for_timeout(random.randint(500, 1000))
+                            break
+            except:
+                continue
+    except:
+        pass  # Cookie handling is best-effort
+    
+    _check_cancelled(cancel)
+    
+    # Scroll down a bit to trigger lazy loading
+    page.evaluate("window.scrollTo(0, document.body.scrollHeight * 0.3)")
+    try:
+        page.wait_for_load_state('networkidle', timeout=1500)
+    except:
+        pass
+    
+    # Get the page content
+    return page.content()
+
+
+def extract_with_playwright(url, cancel=None):
+    """
+    Extract article content using a pooled Playwright browser with stealth techniques
+    Returns None if extraction fails or the optional cancel event is set
+    """
+    if not PLAYWRIGHT_AVAILABLE:
+        logger.error("Playwright not available but was called")
         return None
+    
+    try:
+        html_content = get_browser_pool().fetch(url, cancel=cancel)
+    except Exception as e:
+        logger.error(f"Playwright extraction error for {url}: {str(e)}")
+        return None
+    
+    # Get domain
+    domain = urlparse(url).netloc.replace('www.', '')
+    
+    # Now parse the content (single lxml parse shared with the other extractors)
+    from analysis.html_document import HTMLDocument
+    soup = HTMLDocument(html_content, url).soup
+    
+    # Extract data using the same logic as the main extractor
+    return extract_data_from_soup(soup, domain, url)
 
 def extract_data_from_soup(soup, domain, url):
     """
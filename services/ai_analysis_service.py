@@ -13,6 +13,7 @@ import statistics
 from typing import Dict, Any, Optional, List
 
 from .base_service import BaseAnalysisService
+from .result_cache import ResultCache
 
 # Try to import OpenAI with proper error handling
 try:
@@ -40,6 +41,15 @@ class AIAnalysisService(BaseAnalysisService):
         self.max_text_length = config.get('max_text_length', 3000)
         self.confidence_threshold = config.get('confidence_threshold', 70)
         
+        # Result cache keyed on normalized text hash + depth + model
+        self.cache_enabled = config.get('cache_enabled', True)
+        self.cache = ResultCache(
+            namespace='ai_analysis',
+            max_entries=config.get('cache_max_entries', 512),
+            ttl=config.get('cache_ttl', 3600),
+            redis_url=config.get('redis_url')
+        ) if self.cache_enabled else None
+        
     def _initialize_service(self) -> bool:
         """
         Initialize OpenAI client and validate configuration
@@ -89,6 +99,21 @@ class AIAnalysisService(BaseAnalysisService):
             use_openai = kwargs.get('use_openai', True) and self.is_available
             analysis_depth = kwargs.get('analysis_depth', 'comprehensive')
             
+            # Identical text re-submitted with the same options costs no tokens
+            cache_key = None
+            if self.cache is not None and kwargs.get('use_cache', True):
+                cache_key = self.cache.make_key(
+                    content,
+                    depth=analysis_depth,
+                    model=self.model if (use_openai and self.client) else 'pattern',
+                    max_length=self.max_text_length
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    cached['cache_hit'] = True
+                    cached['processing_time'] = round(time.time() - start_time, 4)
+                    return self._create_success_response(cached)
+            
             # Perform analysis
             if use_openai and self.client:
                 self.logger.info("Performing OpenAI-powered AI analysis")
@@ -108,12 +133,26 @@ class AIAnalysisService(BaseAnalysisService):
             results['analysis_method'] = 'OpenAI + Pattern Analysis' if ai_analysis else 'Pattern Analysis Only'
             results['service_available'] = self.is_available
             
+            # Don't cache a pattern-only result produced because OpenAI failed
+            if cache_key and (ai_analysis or not (use_openai and self.client)):
+                self.cache.set(cache_key, results)
+            results['cache_hit'] = False
+            
             return self._create_success_response(results)
             
         except Exception as e:
             self.logger.error(f"AI analysis failed: {str(e)}")
             return self._create_error_response(f"Analysis failed: {str(e)}")
     
+    def get_health_status(self) -> Dict[str, Any]:
+        """
+        Return service health including result cache hit/miss counters
+        """
+        status = super().get_health_status()
+        status['model'] = self.model
+        status['cache'] = self.cache.get_stats() if self.cache is not None else {'enabled': False}
+        return status
+    
     def _openai_analysis(self, content: str, analysis_depth: str) -> Optional[Dict[str, Any]]:
         """
         Perform AI detection using OpenAI GPT-4
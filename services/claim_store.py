@@ -0,0 +1,424 @@
+"""
+Claim Verdict Store for Facts & Fakes AI
+Remembers every resolved claim and matches new claims to prior verdicts with
+a MinHash/LSH index, so recurring talking points skip the fact-check APIs
+"""
+import os
+import re
+import json
+import time
+import struct
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable
+
+from services.fact_check_client import normalize_claim
+
+# fcntl keeps appends from several gunicorn workers to one file consistent
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+STOP_WORDS = frozenset("""
+a an the and or but of to in on at by for with from as is are was were be been being
+it its this that these those there their they we our you your i he she his her has have had
+do does did so than then very just about into over also will would can could should
+""".split())
+
+# Verdicts published by fact-checkers, as opposed to the speech pipeline's
+# own model verdicts ('speech_batch_factcheck')
+FACT_CHECK_ORIGINS = frozenset({'google_fact_check'})
+
+# Words that reverse a claim; "causes" and "never causes" must not share a verdict
+NEGATORS = frozenset("""
+not no never none nobody nothing neither nor nowhere without cannot
+""".split())
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def simple_verdict(rating: Optional[str]) -> str:
+    """Map a publisher's textual rating to true / false / partially_true / unverified"""
+    rating = (rating or '').lower()
+    if any(word in rating for word in ['false', 'incorrect', 'wrong', 'misleading']):
+        return 'false'
+    if any(word in rating for word in ['true', 'correct', 'accurate']):
+        return 'true'
+    if any(word in rating for word in ['partly', 'mixed', 'partially']):
+        return 'partially_true'
+    return 'unverified'
+
+
+def claim_terms(claim: str) -> List[str]:
+    """Content words of a normalized claim (numbers kept, stop words dropped)"""
+    words = re.findall(r"\d+(?:[.,]\d+)*%?|[a-z][a-z'-]*", normalize_claim(claim).replace('\u2019', "'"))
+    return [word for word in words if word not in STOP_WORDS]
+
+
+def claim_shingles(terms: List[str]) -> set:
+    """Unigram and bigram shingles; bigrams keep some word order"""
+    shingles = set(terms)
+    shingles.update(f"{first} {second}" for first, second in zip(terms, terms[1:]))
+    return shingles
+
+
+def claim_numbers(terms: List[str]) -> frozenset:
+    """Numeric tokens - claims that differ only in a figure must not match"""
+    return frozenset(term for term in terms if term[0].isdigit())
+
+
+def claim_negations(terms: List[str]) -> frozenset:
+    """Negating tokens ("doesn't" counts as "not") - a negated claim must not match its positive form"""
+    return frozenset('not' if term.endswith("n't") else term for term in terms
+                     if term in NEGATORS or term.endswith("n't"))
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes of 64-bit shingle digests"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        params = hashlib.sha256(f"minhash:{seed}:{num_perm}".encode('utf-8')).digest()
+        while len(params) < num_perm * 16:
+            params += hashlib.sha256(params).digest()
+        self._a = [struct.unpack_from('<Q', params, i * 16)[0] % (_MERSENNE_PRIME - 1) + 1
+                   for i in range(num_perm)]
+        self._b = [struct.unpack_from('<Q', params, i * 16 + 8)[0] % _MERSENNE_PRIME
+                   for i in range(num_perm)]
+
+    def signature(self, shingles) -> List[int]:
+        hashes = [
+            struct.unpack('<Q', hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest())[0]
+            for shingle in shingles
+        ]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in zip(self._a, self._b)
+        ]
+
+
+class ClaimStore:
+    """
+    Resolved claims with their verdict, source and timestamp
+
+    Exact repeats (after normalization) are a dict lookup. Paraphrases are
+    found through LSH buckets over MinHash signatures and confirmed with the
+    exact Jaccard similarity of their shingles; matches must also quote the
+    same figures and the same negations. Every entry carries its origin, and lookups can be limited
+    to some origins so model verdicts never answer for a published fact check.
+
+    Entries are appended to a JSON-lines file shared by all workers on the
+    host, and each worker tails the file for new verdicts. Once the file
+    passes max_file_bytes it is rewritten with the live entries, newest
+    first kept, to at most half that size; workers notice the replaced file
+    and re-read it from the start.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.65, max_age: int = 30 * 86400,
+                 max_entries: int = 50000, max_file_bytes: int = 16 * 1024 * 1024,
+                 num_perm: int = 64, bands: int = 16):
+        self.path = path
+        self.threshold = threshold
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_file_bytes = max_file_bytes
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._index: Dict[int, tuple] = {}  # id -> (shingles, numbers, negations, band keys)
+        self._exact: Dict[str, Dict[str, int]] = {}  # normalized claim -> origin -> id
+        self._buckets: Dict[tuple, set] = {}
+        self._next_id = 0
+        self._offset = 0
+        self._inode = None
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'exact_hits': 0, 'fuzzy_hits': 0, 'misses': 0, 'recorded': 0,
+                      'compactions': 0}
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._lock:
+                self._sync()
+
+    def match(self, claim: str, origins: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored verdict for the closest prior claim at or above the
+        similarity threshold, with 'matched_claim' and 'similarity', or None
+
+        With origins, only verdicts recorded with one of those origins count.
+        """
+        key = normalize_claim(claim)
+        terms = claim_terms(claim)
+        now = time.time()
+        origins = frozenset(origins) if origins is not None else None
+        numbers = claim_numbers(terms)
+        negations = claim_negations(terms)
+
+        with self._lock:
+            self._sync()
+            self.stats['lookups'] += 1
+
+            exact = [
+                entry_id for origin, entry_id in self._exact.get(key, {}).items()
+                if (origins is None or origin in origins) and self._is_fresh(self._entries[entry_id], now)
+                and self._index[entry_id][1:3] == (numbers, negations)
+            ]
+            if exact:
+                self.stats['exact_hits'] += 1
+                return self._result(max(exact, key=lambda entry_id: self._entries[entry_id].get('checked_ts', 0)), 1.0)
+
+            shingles = claim_shingles(terms)
+            if shingles:
+                best_id, best_score = None, 0.0
+                for candidate in self._candidates(self._band_keys(shingles)):
+                    candidate_shingles, candidate_numbers, candidate_negations, _ = self._index[candidate]
+                    if candidate_numbers != numbers or candidate_negations != negations:
+                        continue
+                    if not self._is_fresh(self._entries[candidate], now):
+                        continue
+                    if origins is not None and self._origin(self._entries[candidate]) not in origins:
+                        continue
+                    score = len(shingles & candidate_shingles) / len(shingles | candidate_shingles)
+                    if score > best_score:
+                        best_id, best_score = candidate, score
+
+                if best_id is not None and best_score >= self.threshold:
+                    self.stats['fuzzy_hits'] += 1
+                    return self._result(best_id, best_score)
+
+            self.stats['misses'] += 1
+            return None
+
+    def record(self, claim: str, verdict: str, source: str = 'Unknown', explanation: str = '',
+               rating: Optional[str] = None, confidence: Optional[float] = None,
+               source_url: str = '', origin: str = 'unknown'):
+        """Store a resolved verdict; unresolved ('unverified') results are ignored"""
+        if not claim or not verdict or verdict.lower() == 'unverified':
+            return
+
+        entry = {
+            'claim': claim,
+            'verdict': verdict,
+            'rating': rating,
+            'explanation': explanation,
+            'source': source,
+            'source_url': source_url,
+            'confidence': confidence,
+            'origin': origin,
+            'checked_at': datetime.utcnow().isoformat(),
+            'checked_ts': time.time()
+        }
+
+        with self._lock:
+            if self.path:
+                self._append(entry)
+            else:
+                self._add(entry)
+            self.stats['recorded'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['max_file_bytes'] = self.max_file_bytes
+        hits = stats['exact_hits'] + stats['fuzzy_hits']
+        stats['hit_rate'] = round(hits / stats['lookups'], 3) if stats['lookups'] else 0.0
+        stats['threshold'] = self.threshold
+        stats['persistent'] = bool(self.path)
+        return stats
+
+    def _result(self, entry_id: int, similarity: float) -> Dict[str, Any]:
+        result = dict(self._entries[entry_id])
+        result['matched_claim'] = result['claim']
+        result['similarity'] = round(similarity, 3)
+        return result
+
+    def _is_fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        return now - entry.get('checked_ts', 0) <= self.max_age
+
+    @staticmethod
+    def _origin(entry: Dict[str, Any]) -> str:
+        return entry.get('origin') or 'unknown'
+
+    def _band_keys(self, shingles) -> List[tuple]:
+        signature = self.hasher.signature(shingles)
+        return [
+            (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def _candidates(self, band_keys) -> set:
+        candidates = set()
+        for band_key in band_keys:
+            candidates.update(self._buckets.get(band_key, ()))
+        return candidates
+
+    def _add(self, entry: Dict[str, Any]):
+        """
+        Index one entry (caller holds the lock); a newer verdict from the
+        same origin replaces an older one
+        """
+        if not self._is_fresh(entry, time.time()):
+            return
+
+        key = normalize_claim(entry['claim'])
+        origin = self._origin(entry)
+        if origin in self._exact.get(key, {}):
+            self._remove(self._exact[key][origin])
+
+        terms = claim_terms(entry['claim'])
+        shingles = claim_shingles(terms)
+        band_keys = self._band_keys(shingles) if shingles else []
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        self._index[entry_id] = (shingles, claim_numbers(terms), claim_negations(terms), band_keys)
+        self._exact.setdefault(key, {})[origin] = entry_id
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        _, _, _, band_keys = self._index.pop(entry_id)
+        key = normalize_claim(entry['claim'])
+        by_origin = self._exact.get(key, {})
+        if by_origin.get(self._origin(entry)) == entry_id:
+            del by_origin[self._origin(entry)]
+            if not by_origin:
+                del self._exact[key]
+        for band_key in band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _reset(self):
+        """Forget every indexed entry (caller holds the lock)"""
+        self._entries.clear()
+        self._index.clear()
+        self._exact.clear()
+        self._buckets.clear()
+        self._offset = 0
+
+    def _sync(self):
+        """Index verdicts appended to the file since the last read (caller holds the lock)"""
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+            if stat.st_ino == self._inode and stat.st_size <= self._offset:
+                return
+            with open(self.path, 'rb') as f:
+                inode = os.fstat(f.fileno()).st_ino
+                if inode != self._inode:
+                    # First read, or another worker compacted the file
+                    self._reset()
+                    self._inode = inode
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Claim store read failed: {str(e)}")
+            return
+
+        # Only consume complete lines; a partial trailing write is picked up next time
+        complete = data[:data.rfind(b'\n') + 1]
+        self._offset += len(complete)
+        for line in complete.splitlines():
+            try:
+                self._add(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def _open_locked(self):
+        """
+        Open the store for appending under an exclusive lock, retrying if
+        another worker replaced the file while we waited for the lock
+        """
+        while True:
+            f = open(self.path, 'ab')
+            if not FCNTL_AVAILABLE:
+                return f
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def _append(self, entry: Dict[str, Any]):
+        line = (json.dumps(entry) + '\n').encode('utf-8')
+        try:
+            # Closing the file releases the lock
+            with self._open_locked() as f:
+                f.write(line)
+                f.flush()
+                if f.tell() > self.max_file_bytes:
+                    self._compact()
+        except OSError as e:
+            logger.warning(f"Claim store write failed: {str(e)}")
+            self._add(entry)
+            return
+        # Our own line (and any other worker's) is indexed by the tail read
+        self._sync()
+
+    def _compact(self):
+        """
+        Rewrite the file with the live entries, dropping the oldest until it
+        is at most half of max_file_bytes (caller holds the lock and the file
+        lock)
+        """
+        self._sync()
+        lines = [(json.dumps(entry) + '\n').encode('utf-8') for entry in self._entries.values()]
+        size = sum(len(line) for line in lines)
+        start = 0
+        # Entries are in insertion order, oldest first
+        while start < len(lines) and size > self.max_file_bytes // 2:
+            size -= len(lines[start])
+            start += 1
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.writelines(lines[start:])
+        os.replace(temp_path, self.path)
+        self.stats['compactions'] += 1
+        logger.info(f"Compacted claim store to {len(lines) - start} entries ({size} bytes)")
+
+
+_store: Optional[ClaimStore] = None
+_store_lock = threading.Lock()
+
+
+def get_claim_store() -> ClaimStore:
+    """Return the process-wide claim store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ClaimStore(
+                    path=os.environ.get('CLAIM_STORE_PATH', '/tmp/factsandfakes-claims.jsonl') or None,
+                    threshold=float(os.environ.get('CLAIM_STORE_SIMILARITY', 0.65)),
+                    max_age=int(float(os.environ.get('CLAIM_STORE_MAX_AGE_DAYS', 30)) * 86400),
+                    max_entries=int(os.environ.get('CLAIM_STORE_MAX_ENTRIES', 50000)),
+                    max_file_bytes=int(os.environ.get('CLAIM_STORE_MAX_BYTES', 16 * 1024 * 1024))
+                )
+    return _store
@@ -0,0 +1,270 @@
+"""
+Copyleaks Scan Manager for Facts & Fakes AI
+Tracks submitted scans from one background poller and resolves them early
+when Copyleaks calls the completion webhook
+"""
+import os
+import hmac
+import json
+import time
+import heapq
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Callable, Tuple
+
+# Redis is optional - it fans webhooks out to every worker process
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+WEBHOOK_CHANNEL = 'copyleaks:webhooks'
+
+# poll() returns ('pending' | 'completed' | 'failed', results or None)
+ScanPoll = Callable[[], Tuple[str, Optional[Dict[str, Any]]]]
+
+
+class _TrackedScan:
+    def __init__(self, scan_id: str, poll: ScanPoll, deadline: float, first_delay: float):
+        self.scan_id = scan_id
+        self.poll = poll
+        self.deadline = deadline
+        self.delay = first_delay
+        self.next_poll_at = time.time() + first_delay
+        self.woken = False  # completion webhook arrived while a poll was in flight
+        self.future: Future = Future()
+
+
+class ScanManager:
+    """
+    Waits on many Copyleaks scans without a sleeping thread per scan
+
+    track() registers a submitted scan and returns a Future that resolves to
+    the scan results, or None if the scan failed or missed its deadline. One
+    poller thread checks each scan with exponential backoff. A completion
+    webhook moves that scan's next check to now, so results are fetched as
+    soon as Copyleaks finishes. When webhooks are configured the first check
+    waits webhook_fallback_delay, since the poller is only a safety net.
+
+    The webhook may reach a different gunicorn worker than the one that
+    submitted the scan; with Redis, notifications are published to every
+    worker. Without Redis, other workers' scans are still found by polling.
+
+    Webhook URLs carry an HMAC token keyed by webhook_secret; with no secret
+    configured, webhooks stay disabled and scans are found by polling.
+    """
+
+    def __init__(self, webhook_base_url: Optional[str] = None, webhook_secret: str = '',
+                 initial_delay: float = 2.0, max_delay: float = 30.0, webhook_fallback_delay: float = 20.0,
+                 redis_url: Optional[str] = None):
+        self.webhook_base_url = (webhook_base_url or '').rstrip('/')
+        self.webhook_secret = webhook_secret
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.webhook_fallback_delay = webhook_fallback_delay
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if self.webhook_base_url and not self.webhook_secret:
+            self.logger.warning("COPYLEAKS_WEBHOOK_SECRET is not set - Copyleaks webhooks disabled, polling only")
+
+        self._scans: Dict[str, _TrackedScan] = {}
+        self._schedule = []  # heap of (next_poll_at, scan_id)
+        self._cond = threading.Condition()
+        self._poller: Optional[threading.Thread] = None
+        self._stats = {
+            'tracked': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'polls': 0,
+            'webhooks': 0
+        }
+
+        self._redis = None
+        self._pubsub_thread = None
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self._redis = redis.Redis.from_url(redis_url, socket_connect_timeout=0.5)
+                self._redis.ping()
+            except Exception as e:
+                self.logger.warning(f"Redis unavailable, webhooks only reach the receiving worker: {str(e)}")
+                self._redis = None
+
+    @property
+    def webhooks_enabled(self) -> bool:
+        return bool(self.webhook_base_url and self.webhook_secret)
+
+    def webhook_url(self, scan_id: str) -> Optional[str]:
+        """
+        Status webhook URL to submit with a scan (Copyleaks fills in {STATUS}),
+        or None when no public base URL is configured
+        """
+        if not self.webhooks_enabled:
+            return None
+        return f"{self.webhook_base_url}/api/copyleaks/webhook/{{STATUS}}/{scan_id}?token={self._token(scan_id)}"
+
+    def verify_webhook(self, scan_id: str, token: str) -> bool:
+        """Check the token a webhook call carries against its scan id"""
+        return self.webhooks_enabled and hmac.compare_digest(self._token(scan_id), token or '')
+
+    def track(self, scan_id: str, poll: ScanPoll, timeout: float) -> Future:
+        """Start waiting for a submitted scan and return a Future for its results"""
+        first_delay = self.webhook_fallback_delay if self.webhooks_enabled else self.initial_delay
+        scan = _TrackedScan(scan_id, poll, time.time() + timeout, min(first_delay, timeout))
+
+        self._ensure_started()
+        with self._cond:
+            self._scans[scan_id] = scan
+            heapq.heappush(self._schedule, (scan.next_poll_at, scan_id))
+            self._stats['tracked'] += 1
+            self._cond.notify()
+        return scan.future
+
+    def notify(self, scan_id: str, status: str):
+        """
+        Handle a Copyleaks status webhook ('completed', 'error', ...)
+        Published to every worker when Redis is available
+        """
+        if self._redis is not None:
+            try:
+                self._redis.publish(WEBHOOK_CHANNEL, json.dumps({'scan_id': scan_id, 'status': status}))
+                return
+            except Exception as e:
+                self.logger.warning(f"Webhook publish failed, handling locally: {str(e)}")
+        self._wake(scan_id, status)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._scans)
+        stats['webhooks_enabled'] = self.webhooks_enabled
+        stats['redis_fanout'] = self._redis is not None
+        return stats
+
+    def _wake(self, scan_id: str, status: str):
+        with self._cond:
+            scan = self._scans.get(scan_id)
+            if scan is None:
+                return
+            self._stats['webhooks'] += 1
+            if status.lower() == 'completed':
+                if scan.next_poll_at is None:
+                    scan.woken = True
+                    return
+                scan.next_poll_at = time.time()
+                heapq.heappush(self._schedule, (scan.next_poll_at, scan_id))
+                self._cond.notify()
+                return
+            if status.lower() != 'error':
+                return  # creditsChecked / indexed carry no results
+            del self._scans[scan_id]
+            self._stats['failed'] += 1
+        self.logger.error(f"Copyleaks reported an error for scan {scan_id}")
+        scan.future.set_result(None)
+
+    def _ensure_started(self):
+        with self._cond:
+            if self._poller is not None:
+                return
+            self._poller = threading.Thread(target=self._run, name='copyleaks-poller', daemon=True)
+            self._poller.start()
+
+        if self._redis is not None:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{WEBHOOK_CHANNEL: self._on_published})
+                self._pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+            except Exception as e:
+                self.logger.warning(f"Webhook subscription failed, relying on polling: {str(e)}")
+
+    def _on_published(self, message):
+        try:
+            event = json.loads(message['data'])
+            self._wake(event['scan_id'], event['status'])
+        except Exception as e:
+            self.logger.warning(f"Bad webhook notification: {str(e)}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                scan = self._next_due()
+                while scan is None:
+                    wait_for = self._schedule[0][0] - time.time() if self._schedule else None
+                    self._cond.wait(wait_for)
+                    scan = self._next_due()
+
+            try:
+                status, results = scan.poll()
+            except Exception as e:
+                self.logger.error(f"Copyleaks poll error for {scan.scan_id}: {str(e)}")
+                status, results = 'failed', None
+
+            with self._cond:
+                self._stats['polls'] += 1
+            if status == 'completed':
+                self._finish(scan, results, 'completed')
+            elif status == 'failed':
+                self._finish(scan, None, 'failed')
+            elif time.time() >= scan.deadline:
+                self.logger.warning(f"Copyleaks scan timeout for {scan.scan_id}")
+                self._finish(scan, None, 'timeouts')
+            else:
+                self._reschedule(scan)
+
+    def _next_due(self) -> Optional[_TrackedScan]:
+        """Pop the first scan whose check is due; caller holds the lock"""
+        now = time.time()
+        while self._schedule and self._schedule[0][0] <= now:
+            when, scan_id = heapq.heappop(self._schedule)
+            scan = self._scans.get(scan_id)
+            # Skip entries superseded by a webhook or reschedule
+            if scan is not None and scan.next_poll_at == when:
+                scan.next_poll_at = None
+                return scan
+        return None
+
+    def _reschedule(self, scan: _TrackedScan):
+        scan.delay = min(scan.delay * 2, self.max_delay)
+        with self._cond:
+            if scan.scan_id not in self._scans:
+                return
+            if scan.woken:
+                scan.woken = False
+                scan.next_poll_at = time.time()
+            else:
+                scan.next_poll_at = min(time.time() + scan.delay, scan.deadline)
+            heapq.heappush(self._schedule, (scan.next_poll_at, scan.scan_id))
+
+    def _finish(self, scan: _TrackedScan, results: Optional[Dict[str, Any]], outcome: str):
+        with self._cond:
+            if self._scans.pop(scan.scan_id, None) is None:
+                return
+            self._stats[outcome] += 1
+        scan.future.set_result(results)
+
+    def _token(self, scan_id: str) -> str:
+        return hmac.new(self.webhook_secret.encode('utf-8'), scan_id.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+_scan_manager: Optional[ScanManager] = None
+_scan_manager_lock = threading.Lock()
+
+
+def get_scan_manager() -> ScanManager:
+    """Return the process-wide scan manager, creating it on first use"""
+    global _scan_manager
+    if _scan_manager is None:
+        with _scan_manager_lock:
+            if _scan_manager is None:
+                _scan_manager = ScanManager(
+                    webhook_base_url=os.environ.get('COPYLEAKS_WEBHOOK_BASE_URL'),
+                    webhook_secret=os.environ.get('COPYLEAKS_WEBHOOK_SECRET', ''),
+                    initial_delay=float(os.environ.get('COPYLEAKS_POLL_INITIAL_DELAY', 2)),
+                    max_delay=float(os.environ.get('COPYLEAKS_POLL_MAX_DELAY', 30)),
+                    webhook_fallback_delay=float(os.environ.get('COPYLEAKS_WEBHOOK_FALLBACK_DELAY', 20)),
+                    redis_url=os.environ.get('REDIS_URL')
+                )
+    return _scan_manager
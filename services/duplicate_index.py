@@ -0,0 +1,277 @@
+"""
+Near-Duplicate Index for Facts & Fakes AI
+MinHash/LSH index over previously analyzed submissions and fetched articles,
+persisted to a memory-mapped signature file
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from services.result_cache import normalize_text
+
+# fcntl is POSIX-only; without it writes are only serialized within a process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Largest prime below 2**32, so permuted hashes fit the uint32 signature file
+HASH_PRIME = 4294967291
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """32-bit hashes of the distinct word n-grams of the normalized text"""
+    words = normalize_text(text).lower().split()
+    if len(words) < size:
+        return np.empty(0, dtype=np.uint64)
+    shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+         for shingle in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+
+
+class DuplicateIndex:
+    """
+    Finds earlier documents that share most of their word 5-grams with a text
+
+    Each document is reduced to a num_perm MinHash signature; the fraction of
+    equal signature slots estimates the Jaccard similarity of the shingle
+    sets. Signatures are split into bands and bucketed, so a query only
+    compares against documents that collide in at least one band.
+
+    Documents can carry owners (the users who submitted them) so a query can
+    leave out the caller's own submissions; adding the same (source, ref)
+    again only records the new owner.
+
+    Signatures are appended to '<path>.sig' (a uint32 memmap) and document
+    metadata to '<path>.meta.jsonl'. Appends take an exclusive file lock, and
+    every process picks up rows other workers appended before each lookup,
+    so all gunicorn workers share one index. Band buckets are rebuilt in
+    memory from the signature file on startup.
+    """
+
+    def __init__(self, path: str, num_perm: int = 128, bands: int = 32, shingle_size: int = 5,
+                 initial_capacity: int = 1024, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self.initial_capacity = initial_capacity
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        rng = np.random.RandomState(seed)
+        # a * x + b stays below 2**64 for 32-bit a, b and x
+        self._a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)[:, None]
+
+        self._lock = threading.Lock()
+        self._signatures: Optional[np.memmap] = None
+        self._documents: List[Dict[str, Any]] = []
+        self._refs: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._meta_offset = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            self._sync()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the text, or None if it has too few words"""
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not hashes.size:
+            return None
+        return ((self._a * hashes[None, :] + self._b) % HASH_PRIME).min(axis=1).astype(np.uint32)
+
+    def add(self, text: str, source: str, ref: str, title: Optional[str] = None,
+            url: Optional[str] = None, excerpt: Optional[str] = None, owner: Optional[str] = None) -> bool:
+        """
+        Index a document under a unique (source, ref) key; returns False if it
+        was already indexed (its owners are still updated) or is too short to
+        fingerprint
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return False
+
+        key = f"{source}:{ref}"
+        with self._lock, self._file_lock():
+            self._sync()
+            if key in self._refs:
+                row = self._refs[key]
+                if owner is not None and str(owner) not in self._documents[row]['owners']:
+                    self._append_meta({'owner_of': row, 'owner': str(owner)})
+                return False
+
+            row = len(self._documents)
+            self._ensure_capacity(row + 1)
+            self._signatures[row] = signature
+            self._signatures.flush()
+
+            self._append_meta({'row': row, 'source': source, 'ref': str(ref), 'title': title, 'url': url,
+                               'excerpt': (excerpt or '')[:200], 'owners': [str(owner)] if owner is not None else []})
+        return True
+
+    def query(self, text: str, min_similarity: float = 0.3, limit: int = 10,
+              exclude_owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Indexed documents whose estimated Jaccard similarity with the text is
+        at least min_similarity, most similar first; 'similarity' is 0-100.
+        Documents owned by exclude_owner are left out.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+
+        with self._lock:
+            self._sync()
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            if not candidates:
+                return []
+
+            if exclude_owner is not None:
+                candidates = {row for row in candidates if str(exclude_owner) not in self._documents[row]['owners']}
+                if not candidates:
+                    return []
+
+            rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarities = (self._signatures[rows] == signature).mean(axis=1)
+            documents = [self._documents[row] for row in rows]
+
+        matches = [
+            dict(document, owners=list(document['owners']), similarity=round(float(similarity) * 100, 1))
+            for document, similarity in zip(documents, similarities)
+            if similarity >= min_similarity
+        ]
+        matches.sort(key=lambda match: match['similarity'], reverse=True)
+        return matches[:limit]
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'capacity': 0 if self._signatures is None else self._signatures.shape[0],
+                'num_perm': self.num_perm,
+                'bands': self.bands,
+                'path': self.path
+            }
+
+    @property
+    def _sig_path(self) -> str:
+        return f"{self.path}.sig"
+
+    @property
+    def _meta_path(self) -> str:
+        return f"{self.path}.meta.jsonl"
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes()
+
+    def _append_meta(self, record: Dict[str, Any]):
+        """Append a metadata record and load it; caller holds both locks"""
+        with open(self._meta_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        self._sync()
+
+    def _sync(self):
+        """Load documents appended to the files since the last sync; caller holds the lock"""
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, 'rb') as f:
+            f.seek(self._meta_offset)
+            lines = f.readlines()
+            # A line still being written by another process has no newline yet
+            if lines and not lines[-1].endswith(b'\n'):
+                lines.pop()
+            self._meta_offset += sum(len(line) for line in lines)
+
+        if not lines:
+            return
+        records = [json.loads(line) for line in lines]
+        self._map_signatures()
+        for record in records:
+            if 'owner_of' in record:
+                self._documents[record['owner_of']]['owners'].append(record['owner'])
+                continue
+            row = record['row']
+            record.setdefault('owners', [])
+            for band, key in enumerate(self._band_keys(self._signatures[row])):
+                self._buckets[band].setdefault(key, []).append(row)
+            self._documents.append(record)
+            self._refs[f"{record['source']}:{record['ref']}"] = row
+
+    def _map_signatures(self):
+        """(Re)open the signature memmap if the file grew"""
+        row_bytes = self.num_perm * 4
+        rows = os.path.getsize(self._sig_path) // row_bytes if os.path.exists(self._sig_path) else 0
+        if rows and (self._signatures is None or self._signatures.shape[0] != rows):
+            self._signatures = np.memmap(self._sig_path, dtype=np.uint32, mode='r+', shape=(rows, self.num_perm))
+
+    def _ensure_capacity(self, rows_needed: int):
+        """Grow the signature file (doubling) so it holds rows_needed rows"""
+        self._map_signatures()
+        capacity = 0 if self._signatures is None else self._signatures.shape[0]
+        if rows_needed <= capacity:
+            return
+        new_capacity = max(self.initial_capacity, capacity * 2, rows_needed)
+        self._signatures = None
+        with open(self._sig_path, 'ab') as f:
+            f.truncate(new_capacity * self.num_perm * 4)
+        self._map_signatures()
+
+    def _file_lock(self):
+        return _FileLock(f"{self.path}.lock")
+
+
+class _FileLock:
+    """Exclusive advisory lock across processes (no-op where fcntl is missing)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+_duplicate_index: Optional[DuplicateIndex] = None
+_duplicate_index_lock = threading.Lock()
+
+
+def get_duplicate_index() -> DuplicateIndex:
+    """Return the process-wide near-duplicate index, loading it on first use"""
+    global _duplicate_index
+    if _duplicate_index is None:
+        with _duplicate_index_lock:
+            if _duplicate_index is None:
+                _duplicate_index = DuplicateIndex(
+                    path=os.environ.get('DUPLICATE_INDEX_PATH', '/tmp/factsandfakes-duplicate-index/index'),
+                    num_perm=int(os.environ.get('DUPLICATE_INDEX_NUM_PERM', 128)),
+                    bands=int(os.environ.get('DUPLICATE_INDEX_BANDS', 32))
+                )
+    return _duplicate_index
@@ -0,0 +1,229 @@
+"""
+Google Fact Check Client for Facts & Fakes AI
+Concurrent, rate-limited and cached claim lookups against the Fact Check Tools API
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlencode
+from typing import Dict, Any, List, Optional
+
+from services.http_fetcher import get_http_fetcher
+from services.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+FACT_CHECK_SEARCH_URL = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+
+# The API key travels in the query string; never let it reach a log line
+_KEY_PARAM = re.compile(r'([?&]key=)[^&\s]+')
+
+_QUOTES = '"\'“”‘’'
+
+
+def normalize_claim(claim: str) -> str:
+    """
+    Canonical form of a claim for deduplication and cache keys: unicode
+    form, case, whitespace, surrounding quotes and trailing punctuation
+    """
+    text = unicodedata.normalize('NFKC', claim or '').lower()
+    text = ' '.join(text.split())
+    text = text.strip(_QUOTES + ' ')
+    return re.sub(r'[\s.!?;:,]+$', '', text)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, with
+    bursts of up to `capacity`. Callers block in acquire() until a token is free.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting up to timeout seconds; False if none became free"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_for = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_for = min(wait_for, remaining)
+            time.sleep(wait_for)
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds` (e.g. after the API answers 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class FactCheckClient:
+    """
+    Looks up many claims at once
+
+    Claims are normalized and deduplicated, answered from the verdict cache
+    where possible, and the rest are searched concurrently. Every outgoing
+    request takes a token from a bucket sized to the API quota, so a burst
+    of claims goes out in parallel without tripping the rate limit.
+    """
+
+    def __init__(self, api_key: Optional[str], rate_per_second: float = 5.0, burst: int = 5,
+                 max_workers: int = 5, timeout: float = 5.0, cache_ttl: int = 86400,
+                 cache_max_entries: int = 2048, redis_url: Optional[str] = None):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.cache = ResultCache(namespace='fact_check', max_entries=cache_max_entries,
+                                 ttl=cache_ttl, redis_url=redis_url)
+        self._max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'requests': 0, 'deduplicated': 0, 'errors': 0, 'rate_limited': 0}
+
+    def lookup(self, claims: List[str], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Search every claim and return one result per input claim, in order
+
+        Each result has 'claim', 'status' ('found', 'not_found' or 'error'),
+        'top_claim' (the API's best matching claim, with its claimReview list)
+        and 'cached'. Errors carry an 'error' message and are not cached.
+        """
+        if not claims:
+            return []
+
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout * 3)
+        keys = [normalize_claim(claim) for claim in claims]
+        answers: Dict[str, Dict[str, Any]] = {}
+        pending = {}
+
+        for claim, key in zip(claims, keys):
+            if key in answers or key in pending:
+                continue
+            cached = self.cache.get(self.cache.make_key(key))
+            if cached is not None:
+                answers[key] = dict(cached, cached=True)
+            else:
+                pending[key] = claim
+
+        with self._lock:
+            self.stats['lookups'] += len(claims)
+            self.stats['deduplicated'] += len(claims) - len(set(keys))
+
+        if pending:
+            executor = self._get_executor()
+            futures = {
+                executor.submit(self._search, claim, deadline): key
+                for key, claim in pending.items()
+            }
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            for future in not_done:
+                future.cancel()
+                answers[futures[future]] = {'status': 'error', 'error': 'Fact check timed out',
+                                            'top_claim': None, 'cached': False}
+            for future in done:
+                key = futures[future]
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    with self._lock:
+                        self.stats['errors'] += 1
+                    error = self._redact(str(e))
+                    logger.warning(f"Fact check lookup failed: {error}")
+                    answer = {'status': 'error', 'error': error, 'top_claim': None}
+                else:
+                    self.cache.set(self.cache.make_key(key), answer)
+                answers[key] = dict(answer, cached=False)
+
+        return [dict(answers[key], claim=claim) for claim, key in zip(claims, keys)]
+
+    def _search(self, claim: str, deadline: float) -> Dict[str, Any]:
+        if not self.bucket.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise TimeoutError("Rate limit wait exceeded the fact check deadline")
+
+        query = urlencode({'key': self.api_key, 'query': claim, 'languageCode': 'en'})
+        with self._lock:
+            self.stats['requests'] += 1
+        response = get_http_fetcher().fetch(f"{FACT_CHECK_SEARCH_URL}?{query}", timeout=self.timeout)
+
+        if response.status_code == 429:
+            with self._lock:
+                self.stats['rate_limited'] += 1
+            retry_after = response.headers.get('Retry-After', '')
+            self.bucket.pause(float(retry_after) if retry_after.isdigit() else 1.0)
+        if not response.ok:
+            # Not raise_for_status(): its message includes the URL, key and all
+            raise RuntimeError(f"Fact check API returned {response.status_code} {response.reason}".strip())
+
+        results = json.loads(response.text).get('claims') or []
+        if results:
+            return {'status': 'found', 'top_claim': results[0]}
+        return {'status': 'not_found', 'top_claim': None}
+
+    def _redact(self, message: str) -> str:
+        """Strip the API key from an error message (connection errors quote the URL)"""
+        message = _KEY_PARAM.sub(r'\1REDACTED', message)
+        if self.api_key:
+            message = message.replace(self.api_key, 'REDACTED')
+        return message
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                        thread_name_prefix='fact-check')
+        return self._executor
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['cache'] = self.cache.get_stats()
+        stats['rate_per_second'] = self.bucket.rate
+        stats['burst'] = self.bucket.capacity
+        return stats
+
+
+_client: Optional[FactCheckClient] = None
+_client_lock = threading.Lock()
+
+
+def get_fact_check_client() -> FactCheckClient:
+    """
+    Return the process-wide fact check client, so the rate limit and the
+    verdict cache are shared by every caller in the worker
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = FactCheckClient(
+                    api_key=os.environ.get('GOOGLE_FACTCHECK_API_KEY'),
+                    rate_per_second=float(os.environ.get('FACT_CHECK_RATE_PER_SECOND', 5)),
+                    burst=int(os.environ.get('FACT_CHECK_BURST', 5)),
+                    max_workers=int(os.environ.get('FACT_CHECK_MAX_WORKERS', 5)),
+                    timeout=float(os.environ.get('FACT_CHECK_TIMEOUT', 5)),
+                    cache_ttl=int(os.environ.get('FACT_CHECK_CACHE_TTL', 86400)),
+                    redis_url=os.environ.get('REDIS_URL')
+                )
+    return _client
@@ -0,0 +1,198 @@
+"""
+Shared HTTP Fetch Layer for Facts & Fakes AI
+Pooled keep-alive connections and size-capped streaming downloads for article
+extraction
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    # Only advertise encodings urllib3 can actually decode (br needs brotli)
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+
+class FetchedPage:
+    """
+    A fully read (and possibly truncated) HTTP response
+
+    Mirrors the parts of requests.Response the extractors use: status_code,
+    url, headers, content, text, ok and raise_for_status().
+    """
+
+    def __init__(self, url: str, status_code: int, headers, content: bytes, encoding: Optional[str],
+                 truncated: bool = False, elapsed_ms: int = 0, reason: str = ''):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.truncated = truncated
+        self.elapsed_ms = elapsed_ms
+        self.reason = reason
+        # Set by the page cache: canonical key, body hash and hit status
+        self.cache_key = None
+        self.version = None
+        self.cache_status = None
+        self._text = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            if self.encoding:
+                self._text = self.content.decode(self.encoding, errors='replace')
+            else:
+                try:
+                    self._text = self.content.decode('utf-8')
+                except UnicodeDecodeError:
+                    self._text = self.content.decode('cp1252', errors='replace')
+        return self._text
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error: {self.reason} for url: {self.url}")
+
+
+class HTTPFetcher:
+    """
+    Process-wide fetcher shared by every article extractor
+
+    All sessions mount the same HTTPAdapter, so TCP/TLS connections are kept
+    alive per host and reused across requests and threads. Each thread gets
+    its own Session (cookies are not shared between threads).
+    """
+
+    def __init__(self, pool_connections: int = 32, pool_maxsize: int = 8,
+                 max_bytes: int = 5 * 1024 * 1024, timeout=(3.05, 10), race_workers: int = 4):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                    pool_block=False)
+        self._local = threading.local()
+        self._race_workers = race_workers
+        self._race_pool = None
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'bytes': 0, 'truncated': 0}
+
+    def new_session(self, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+        """Return a Session backed by the shared connection pool"""
+        session = requests.Session()
+        session.mount('http://', self._adapter)
+        session.mount('https://', self._adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            session.headers.update(headers)
+        return session
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None, timeout=None,
+              max_bytes: Optional[int] = None, allow_redirects: bool = True) -> FetchedPage:
+        """
+        GET a URL, decompressing as it streams and stopping at max_bytes of
+        decoded body. Oversized pages are truncated rather than rejected.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.new_session()
+
+        limit = max_bytes or self.max_bytes
+        started = time.time()
+        with self._lock:
+            self.stats['requests'] += 1
+        try:
+            with session.get(url, headers=headers, timeout=timeout or self.timeout,
+                             allow_redirects=allow_redirects, stream=True) as response:
+                chunks = []
+                received = 0
+                truncated = False
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if received >= limit:
+                        truncated = True
+                        break
+                content = b''.join(chunks)[:limit]
+
+                charset = 'charset=' in response.headers.get('Content-Type', '').lower()
+                page = FetchedPage(
+                    url=response.url,
+                    status_code=response.status_code,
+                    headers=response.headers,
+                    content=content,
+                    encoding=response.encoding if charset else None,
+                    truncated=truncated,
+                    elapsed_ms=int((time.time() - started) * 1000),
+                    reason=response.reason
+                )
+        except Exception:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+
+        with self._lock:
+            self.stats['bytes'] += len(content)
+            if truncated:
+                self.stats['truncated'] += 1
+        if truncated:
+            logger.warning(f"Response from {url} truncated at {limit} bytes")
+        return page
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run a fetch-related callable in the background (e.g. a Playwright
+        render raced against a plain fetch) and return its Future
+        """
+        if self._race_pool is None:
+            with self._lock:
+                if self._race_pool is None:
+                    self._race_pool = ThreadPoolExecutor(max_workers=self._race_workers,
+                                                         thread_name_prefix='fetch-race')
+        return self._race_pool.submit(func, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+_fetcher: Optional[HTTPFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_http_fetcher() -> HTTPFetcher:
+    """
+    Return the process-wide fetcher, creating it on first use so pooled
+    sockets are opened inside each gunicorn worker
+    """
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = HTTPFetcher(
+                    pool_connections=int(os.environ.get('FETCH_POOL_HOSTS', 32)),
+                    pool_maxsize=int(os.environ.get('FETCH_POOL_PER_HOST', 8)),
+                    max_bytes=int(os.environ.get('FETCH_MAX_BYTES', 5 * 1024 * 1024)),
+                    timeout=(float(os.environ.get('FETCH_CONNECT_TIMEOUT', 3.05)),
+                             float(os.environ.get('FETCH_READ_TIMEOUT', 10)))
+                )
+    return _fetcher
@@ -0,0 +1,283 @@
+"""
+Background Job Queue for Facts & Fakes AI
+Runs long analyses off the request thread so web workers return immediately
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable, Tuple
+
+# Redis is optional - without it there is no queue and analyses run inline
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+class JobQueue:
+    """
+    Named job handlers run on a pool of worker threads
+
+    A handler takes a JSON-serializable payload and returns (result, status_code).
+    enqueue() stores a 'queued' job record and returns its id at once; the
+    record moves through 'running' to 'completed' or 'failed' and is kept
+    for result_ttl seconds so clients can poll it.
+
+    Records and pending jobs live in Redis, so every gunicorn worker consumes
+    the shared queue and any worker can answer a status lookup. Without Redis
+    the queue is unavailable (available is False) and callers run the work
+    inline: records held in one worker's memory would be invisible to the
+    other workers that most status polls land on.
+
+    A consumer moves each job atomically from the queue into its process's
+    processing list and removes it only once the job has finished. Every
+    process refreshes a liveness key while it runs; when a process dies, the
+    jobs left in its processing list are put back on the queue by the
+    surviving workers, up to max_attempts runs per job. The analyses are I/O
+    bound (Copyleaks, GPT-4, Playwright) and need the Flask app context, so
+    threads are used rather than processes.
+    """
+
+    def __init__(self, max_workers: int = 2, result_ttl: int = 3600, lease_seconds: int = 30,
+                 max_attempts: int = 3, redis_url: Optional[str] = None, namespace: str = 'jobs'):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.namespace = namespace
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Tuple[Any, int]]] = {}
+        self._lock = threading.Lock()
+        self._consumers = []
+        self._worker_id: Optional[str] = None
+        self._stopping = threading.Event()
+
+        self._redis = None
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=5, socket_connect_timeout=0.5)
+                self._redis.ping()
+                self.logger.info("Redis job queue enabled")
+            except Exception as e:
+                self.logger.warning(f"Redis job queue unavailable, analyses will run inline: {str(e)}")
+                self._redis = None
+
+    @property
+    def available(self) -> bool:
+        return self._redis is not None
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any]], Tuple[Any, int]]):
+        """Register the handler that runs jobs of the given kind"""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """
+        Start this process's workers (idempotent)
+
+        Deferred like the stage executor so threads start inside each gunicorn
+        worker rather than in the preloaded master process.
+        """
+        with self._lock:
+            if self._consumers or self.max_workers <= 0 or self._redis is None:
+                return
+            self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+            self._redis.sadd(self._workers_key(), self._worker_id)
+            self._redis.setex(self._alive_key(self._worker_id), self.lease_seconds, 1)
+            threading.Thread(target=self._heartbeat, name='analysis-job-heartbeat', daemon=True).start()
+
+            # Daemon threads: a consumer blocked on the queue must not hold up
+            # worker exit, and unfinished jobs are re-queued by the other workers
+            for index in range(self.max_workers):
+                consumer = threading.Thread(target=self._consume, name=f'analysis-job-{index}', daemon=True)
+                consumer.start()
+                self._consumers.append(consumer)
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job and return its record"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        if self._redis is None:
+            raise RuntimeError("Job queue requires Redis")
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': 'queued',
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'attempts': 0,
+            'status_code': None,
+            'result': None,
+            'error': None
+        }
+        self._save(job)
+        self._redis.lpush(self._queue_key(), json.dumps({'id': job['id'], 'kind': kind, 'payload': payload}))
+        self.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job record, or None if unknown or expired"""
+        if self._redis is None:
+            return None
+        try:
+            raw = self._redis.get(self._job_key(job_id))
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            self.logger.warning(f"Redis job read failed: {str(e)}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return availability, worker and queue depth information"""
+        stats = {
+            'available': self.available,
+            'max_workers': self.max_workers,
+            'workers_started': bool(self._consumers),
+            'result_ttl_seconds': self.result_ttl
+        }
+        if self._redis is not None:
+            try:
+                stats['queued'] = self._redis.llen(self._queue_key())
+            except Exception:
+                stats['queued'] = None
+        return stats
+
+    def shutdown(self):
+        """Stop consuming new jobs; running jobs are allowed to finish"""
+        self._stopping.set()
+
+    def _consume(self):
+        """Pull jobs from the shared queue until shutdown"""
+        processing_key = self._processing_key(self._worker_id)
+        while not self._stopping.is_set():
+            try:
+                # Jobs are pushed on the left and taken from the right (FIFO);
+                # the move into the processing list is atomic, so a job is
+                # never only in this process's memory
+                raw = self._redis.brpoplpush(self._queue_key(), processing_key, timeout=1)
+            except Exception as e:
+                self.logger.warning(f"Redis job queue read failed: {str(e)}")
+                time.sleep(1)
+                continue
+            if raw is None:
+                continue
+
+            try:
+                entry = json.loads(raw)
+                self._run(entry['id'], entry['kind'], entry['payload'])
+            except Exception as e:
+                self.logger.error(f"Job queue entry could not be run: {str(e)}")
+            finally:
+                try:
+                    self._redis.lrem(processing_key, 1, raw)
+                except Exception as e:
+                    self.logger.warning(f"Could not clear finished job from processing list: {str(e)}")
+
+    def _heartbeat(self):
+        """Keep this process's lease alive and re-queue jobs of dead processes"""
+        last_sweep = 0.0
+        while not self._stopping.wait(self.lease_seconds / 3.0):
+            try:
+                self._redis.setex(self._alive_key(self._worker_id), self.lease_seconds, 1)
+                if time.time() - last_sweep >= self.lease_seconds:
+                    last_sweep = time.time()
+                    self._requeue_orphans()
+            except Exception as e:
+                self.logger.warning(f"Job queue heartbeat failed: {str(e)}")
+
+    def _requeue_orphans(self):
+        for raw_id in self._redis.smembers(self._workers_key()):
+            worker_id = raw_id.decode('utf-8') if isinstance(raw_id, bytes) else raw_id
+            if worker_id == self._worker_id or self._redis.exists(self._alive_key(worker_id)):
+                continue
+            moved = 0
+            # One atomic move per job, so two sweeping workers never duplicate one
+            while self._redis.rpoplpush(self._processing_key(worker_id), self._queue_key()) is not None:
+                moved += 1
+            self._redis.srem(self._workers_key(), worker_id)
+            if moved:
+                self.logger.warning(f"Re-queued {moved} job(s) from dead worker {worker_id}")
+
+    def _run(self, job_id: str, kind: str, payload: Dict[str, Any]):
+        job = self.get(job_id)
+        if job is None:
+            self.logger.warning(f"Job {job_id} expired before it ran")
+            return
+
+        job['attempts'] = job.get('attempts', 0) + 1
+        if job['attempts'] > self.max_attempts:
+            # The job keeps taking its worker down with it
+            job['status'] = 'failed'
+            job['status_code'] = 500
+            job['error'] = 'Job was interrupted too many times'
+            job['finished_at'] = time.time()
+            self._save(job)
+            return
+
+        job['status'] = 'running'
+        job['started_at'] = time.time()
+        self._save(job)
+
+        try:
+            result, status_code = self._handlers[kind](payload)
+            job['result'] = result
+            job['status_code'] = status_code
+            job['status'] = 'completed' if status_code < 400 else 'failed'
+        except Exception as e:
+            self.logger.error(f"Job {job_id} ({kind}) failed: {str(e)}")
+            job['status'] = 'failed'
+            job['status_code'] = 500
+            job['error'] = str(e)
+
+        job['finished_at'] = time.time()
+        self._save(job)
+
+    def _save(self, job: Dict[str, Any]):
+        try:
+            self._redis.setex(self._job_key(job['id']), self.result_ttl, json.dumps(job))
+        except Exception as e:
+            self.logger.warning(f"Redis job write failed: {str(e)}")
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.namespace}:job:{job_id}"
+
+    def _queue_key(self) -> str:
+        return f"{self.namespace}:queue"
+
+    def _processing_key(self, worker_id: str) -> str:
+        return f"{self.namespace}:processing:{worker_id}"
+
+    def _alive_key(self, worker_id: str) -> str:
+        return f"{self.namespace}:alive:{worker_id}"
+
+    def _workers_key(self) -> str:
+        return f"{self.namespace}:workers"
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, creating it on first use"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(
+                    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+                    result_ttl=int(os.environ.get('JOB_RESULT_TTL', 3600)),
+                    lease_seconds=int(os.environ.get('JOB_LEASE_SECONDS', 30)),
+                    max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', 3)),
+                    redis_url=os.environ.get('REDIS_URL')
+                )
+    return _job_queue
@@ -0,0 +1,187 @@
+"""
+Lazy Model Registry for Facts & Fakes AI
+Loads ML models and heavy modules on first use instead of at import, so
+workers boot without paying for models a request may never need
+"""
+import os
+import time
+import logging
+import importlib
+import threading
+from typing import Dict, Any, Optional, Callable, Iterable
+
+# NLTK package name -> resource path checked before downloading
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'vader_lexicon': 'sentiment/vader_lexicon.zip',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+    'maxent_ne_chunker': 'chunkers/maxent_ne_chunker',
+    'words': 'corpora/words'
+}
+
+
+class _Entry:
+    def __init__(self, name: str, loader: Callable[[], Any], description: str):
+        self.name = name
+        self.loader = loader
+        self.description = description
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.value = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+
+class ModelRegistry:
+    """
+    Named loaders that run once, on the first get()
+
+    A loader's result is kept for the life of the process. A loader that
+    raises is recorded as failed and get() returns None from then on, the
+    same "None means unavailable" contract the analyzers already fall back
+    on, so a missing model is not retried on every request. Each entry has
+    its own lock: two requests needing the same model wait for one load,
+    while unrelated models load in parallel.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any], description: str = ''):
+        """Register a loader; re-registering a name that is not loaded yet replaces it"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.loaded:
+                return
+            self._entries[name] = _Entry(name, loader, description)
+
+    def get(self, name: str) -> Any:
+        """Return the loaded object, loading it now if needed (None if loading failed)"""
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"No loader registered for: {name}")
+        if entry.loaded:
+            return entry.value
+
+        with entry.lock:
+            if not entry.loaded:
+                start = time.time()
+                try:
+                    entry.value = entry.loader()
+                    self.logger.info(f"Loaded {name} in {time.time() - start:.2f}s")
+                except Exception as e:
+                    entry.error = f"{type(e).__name__}: {str(e)}"
+                    self.logger.warning(f"Could not load {name}: {entry.error}")
+                entry.load_seconds = round(time.time() - start, 3)
+                entry.loaded = True
+        return entry.value
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.loaded
+
+    def preload(self, names: Iterable[str]):
+        """Load the named entries now, skipping unknown names"""
+        for name in names:
+            if name in self._entries:
+                self.get(name)
+            else:
+                self.logger.warning(f"Cannot preload unknown model: {name}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Load state of every registered entry"""
+        return {
+            name: {
+                'description': entry.description,
+                'loaded': entry.loaded and entry.error is None,
+                'failed': entry.error,
+                'load_seconds': entry.load_seconds
+            }
+            for name, entry in list(self._entries.items())
+        }
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported through the registry on first
+    attribute access, e.g. analysis = LazyModule('analysis.image_analysis')
+    """
+
+    def __init__(self, module_name: str):
+        self._module_name = module_name
+        get_model_registry().register(
+            f"module:{module_name}", lambda: importlib.import_module(module_name), f"import {module_name}"
+        )
+
+    def __getattr__(self, attribute: str):
+        module = get_model_registry().get(f"module:{self._module_name}")
+        if module is None:
+            raise ImportError(f"Could not import {self._module_name}")
+        return getattr(module, attribute)
+
+
+def lazy_function(module_name: str, function_name: str) -> Callable[..., Any]:
+    """A function that imports its module on the first call and then delegates to it"""
+    module = LazyModule(module_name)
+
+    def call(*args, **kwargs):
+        return getattr(module, function_name)(*args, **kwargs)
+
+    call.__name__ = function_name
+    call.__qualname__ = function_name
+    call.__doc__ = f"Lazily imported {module_name}.{function_name}"
+    return call
+
+
+_nltk_ready = set()
+_nltk_lock = threading.Lock()
+
+
+def ensure_nltk_data(*packages: str):
+    """
+    Download the NLTK packages that are not installed yet
+
+    Replaces unconditional nltk.download() calls at import time: installed
+    packages cost one lookup, and each package is checked once per process.
+    """
+    missing = [package for package in packages if package not in _nltk_ready]
+    if not missing:
+        return
+
+    import nltk
+    with _nltk_lock:
+        for package in missing:
+            if package in _nltk_ready:
+                continue
+            try:
+                nltk.data.find(NLTK_RESOURCES.get(package, package))
+            except LookupError:
+                try:
+                    nltk.download(package, quiet=True)
+                except Exception as e:
+                    logging.getLogger(__name__).warning(f"NLTK download failed for {package}: {str(e)}")
+            _nltk_ready.add(package)
+
+
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry, creating it on first use"""
+    global _model_registry
+    if _model_registry is None:
+        with _model_registry_lock:
+            if _model_registry is None:
+                _model_registry = ModelRegistry()
+    return _model_registry
+
+
+def preload_from_env():
+    """Load the comma-separated entries named in MODEL_PRELOAD (nothing by default)"""
+    names = [name.strip() for name in os.environ.get('MODEL_PRELOAD', '').split(',') if name.strip()]
+    if names:
+        get_model_registry().preload(names)
@@ -0,0 +1,402 @@
+"""
+Page Cache for Facts & Fakes AI
+Canonical-URL keyed cache of fetched HTML and extracted article data, with
+ETag/Last-Modified revalidation and a Redis or on-disk persistent tier
+"""
+import os
+import json
+import time
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import Dict, Any, Optional
+
+from services.duplicate_index import get_duplicate_index
+from services.http_fetcher import FetchedPage, get_http_fetcher
+
+# Redis is optional - falls back to the disk tier
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+# fcntl serializes disk eviction across the gunicorn workers sharing the directory
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    fcntl = None
+
+# Query parameters that never change the article served
+TRACKING_PARAM_PREFIXES = ('utm_', 'mc_', '_ga', '_gl')
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'ocid', 'cmpid', 'smid', 'smtyp', 'ref', 'ref_src'}
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so the same article shares one cache entry: lowercase
+    scheme and host, default ports and fragments dropped, tracking
+    parameters removed and the remaining query sorted
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+class PageCache:
+    """
+    Cache entries hold the raw HTML, its validators and the article dicts
+    each extractor produced from that HTML version.
+
+    Within fresh_seconds of the last validation an entry is served without
+    touching the network. After that the page is revalidated with a
+    conditional GET; a 304 (or byte-identical body) keeps the stored
+    extractions so the page is not parsed again.
+    """
+
+    def __init__(self, fresh_seconds: int = 300, ttl: int = 86400, memory_max_bytes: int = 64 * 1024 * 1024,
+                 backend: str = 'auto', redis_url: Optional[str] = None, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 512 * 1024 * 1024):
+        self.fresh_seconds = fresh_seconds
+        self.ttl = ttl
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (size, entry)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'fresh_hits': 0,
+            'revalidated': 0,
+            'misses': 0,
+            'extraction_hits': 0,
+            'evictions': 0,
+            'store_errors': 0
+        }
+
+        self._redis = None
+        self._disk_dir = None
+        self._disk_bytes = 0
+        # Every worker writes to the directory, so this process re-measures it
+        # after writing a twentieth of the budget rather than trusting its count
+        self._disk_unmeasured = 0
+        self._disk_measure_every = max(1, disk_max_bytes // 20)
+
+        if backend in ('auto', 'redis') and redis_url and REDIS_AVAILABLE:
+            try:
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                self._redis.ping()
+                self.logger.info("Page cache using Redis tier")
+            except Exception as e:
+                self.logger.warning(f"Redis page cache unavailable: {str(e)}")
+                self._redis = None
+
+        if self._redis is None and backend in ('auto', 'disk') and disk_dir:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+                self._disk_dir = disk_dir
+                self._disk_bytes = sum(
+                    entry.stat().st_size for entry in os.scandir(disk_dir) if entry.name.endswith('.json')
+                )
+                self.logger.info(f"Page cache using disk tier at {disk_dir}")
+            except OSError as e:
+                self.logger.warning(f"Disk page cache unavailable: {str(e)}")
+                self._disk_dir = None
+
+    # Public API
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None, timeout=None) -> FetchedPage:
+        """
+        Return the page for url, from cache while fresh, otherwise via a
+        conditional GET. The returned page carries cache_key, version and
+        cache_status ('fresh', 'revalidated', 'miss' or 'bypass').
+        """
+        key = canonical_url(url)
+        entry = self._load(key)
+        now = time.time()
+
+        # Page-less entries (browser-rendered results) have no HTML to serve
+        if entry is not None and entry.get('html') is None:
+            entry = None
+
+        if entry is not None and now - entry['validated_at'] < self.fresh_seconds:
+            self._count('fresh_hits')
+            return self._page_from_entry(key, entry, 'fresh')
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        page = get_http_fetcher().fetch(url, headers=request_headers, timeout=timeout)
+
+        if page.status_code == 304 and entry is not None:
+            entry['validated_at'] = now
+            self._store(key, entry)
+            self._count('revalidated')
+            return self._page_from_entry(key, entry, 'revalidated')
+
+        cache_control = page.headers.get('Cache-Control', '').lower()
+        if page.status_code != 200 or page.truncated or 'no-store' in cache_control:
+            page.cache_key, page.version, page.cache_status = key, None, 'bypass'
+            return page
+
+        version = hashlib.sha1(page.content).hexdigest()
+        unchanged = entry is not None and entry.get('version') == version
+        entry = {
+            'url': key,
+            'final_url': page.url,
+            'html': page.text,
+            'encoding': page.encoding,
+            'content_type': page.headers.get('Content-Type', ''),
+            'etag': page.headers.get('ETag'),
+            'last_modified': page.headers.get('Last-Modified'),
+            'version': version,
+            'validated_at': now,
+            'extractions': entry['extractions'] if unchanged else {}
+        }
+        self._store(key, entry)
+        self._count('revalidated' if unchanged else 'misses')
+
+        page.cache_key, page.version = key, version
+        page.cache_status = 'revalidated' if unchanged else 'miss'
+        return page
+
+    def lookup(self, url: str, extractor: str) -> Optional[Dict[str, Any]]:
+        """Return a stored extraction if its entry is still fresh - no network"""
+        key = canonical_url(url)
+        entry = self._load(key)
+        if entry is None or time.time() - entry['validated_at'] >= self.fresh_seconds:
+            return None
+        return self._extraction(entry, extractor)
+
+    def get_extraction(self, page: FetchedPage, extractor: str) -> Optional[Dict[str, Any]]:
+        """Return the extraction stored for exactly this page version"""
+        if getattr(page, 'version', None) is None:
+            return None
+        entry = self._load(page.cache_key)
+        if entry is None or entry.get('version') != page.version:
+            return None
+        return self._extraction(entry, extractor)
+
+    def store_extraction(self, url: str, extractor: str, result: Dict[str, Any],
+                         page: Optional[FetchedPage] = None):
+        """
+        Remember an extractor's output. Results not tied to a cached page
+        version (e.g. browser-rendered fallbacks) get a page-less entry that
+        is only served while fresh.
+        """
+        if not result:
+            return
+        key = canonical_url(url)
+        entry = self._load(key)
+        version = getattr(page, 'version', None)
+
+        if entry is None or (version is not None and entry.get('version') != version):
+            if version is not None:
+                return  # Page was replaced or evicted meanwhile
+            entry = {
+                'url': key, 'final_url': url, 'html': None, 'encoding': None, 'content_type': '',
+                'etag': None, 'last_modified': None, 'version': None,
+                'validated_at': time.time(), 'extractions': {}
+            }
+
+        entry['extractions'][extractor] = json.loads(json.dumps(result, default=str))
+        self._store(key, entry)
+
+        # Fetched articles feed the near-duplicate index used for plagiarism checks
+        text = result.get('text') or result.get('content')
+        if isinstance(text, str):
+            try:
+                get_duplicate_index().add(text, source='page', ref=key, title=result.get('title'),
+                                          url=url, excerpt=text)
+            except Exception as e:
+                self.logger.warning(f"Duplicate index update failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_bytes
+        stats['backend'] = 'redis' if self._redis is not None else ('disk' if self._disk_dir else 'memory')
+        stats['disk_bytes'] = self._disk_bytes
+        return stats
+
+    # Internals
+
+    def _extraction(self, entry, extractor):
+        result = entry['extractions'].get(extractor)
+        if result is None:
+            return None
+        self._count('extraction_hits')
+        return copy.deepcopy(result)
+
+    def _page_from_entry(self, key, entry, status) -> FetchedPage:
+        encoding = entry.get('encoding') or 'utf-8'
+        page = FetchedPage(entry['final_url'], 200, {'Content-Type': entry.get('content_type', '')},
+                           entry['html'].encode(encoding, errors='replace'), encoding)
+        page.cache_key, page.version, page.cache_status = key, entry.get('version'), status
+        return page
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _load(self, key) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if time.time() - item[1]['validated_at'] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    return item[1]
+                del self._memory[key]
+                self._memory_bytes -= item[0]
+
+        raw = None
+        try:
+            if self._redis is not None:
+                raw = self._redis.get(self._redis_key(key))
+            elif self._disk_dir:
+                path = self._disk_path(key)
+                if os.path.exists(path):
+                    if time.time() - os.path.getmtime(path) > self.ttl:
+                        self._remove_disk(path)
+                    else:
+                        with open(path, 'rb') as f:
+                            raw = f.read()
+        except Exception as e:
+            self.logger.warning(f"Page cache read failed: {str(e)}")
+
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        self._remember(key, entry, len(raw))
+        return entry
+
+    def _store(self, key, entry):
+        raw = json.dumps(entry).encode('utf-8')
+        self._remember(key, entry, len(raw))
+
+        try:
+            if self._redis is not None:
+                self._redis.setex(self._redis_key(key), self.ttl, raw)
+            elif self._disk_dir:
+                path = self._disk_path(key)
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(raw)
+                os.replace(tmp_path, path)
+                with self._lock:
+                    self._disk_bytes += len(raw) - previous
+                    self._disk_unmeasured += len(raw)
+                    measure = (self._disk_bytes > self.disk_max_bytes
+                               or self._disk_unmeasured >= self._disk_measure_every)
+                if measure:
+                    self._evict_disk()
+        except Exception as e:
+            self.logger.warning(f"Page cache write failed: {str(e)}")
+            self._count('store_errors')
+
+    def _remember(self, key, entry, size):
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[0]
+            self._memory[key] = (size, entry)
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_max_bytes and len(self._memory) > 1:
+                _, (evicted_size, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def _evict_disk(self):
+        """
+        Measure the directory under the file lock and, if it is over budget,
+        delete least recently written files until under 90% of it
+        """
+        # Closing the lock file releases the lock
+        with open(os.path.join(self._disk_dir, '.lock'), 'a') as lock_file:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            files = []
+            for entry in os.scandir(self._disk_dir):
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # removed by another worker
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            if total > self.disk_max_bytes:
+                target = self.disk_max_bytes * 0.9
+                for _, size, path in sorted(files):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    self._count('evictions')
+
+            with self._lock:
+                self._disk_bytes = total
+                self._disk_unmeasured = 0
+
+    def _remove_disk(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            with self._lock:
+                self._disk_bytes -= size
+        except OSError:
+            pass
+
+    def _disk_path(self, key):
+        return os.path.join(self._disk_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    @staticmethod
+    def _redis_key(key):
+        return f"page:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Return the process-wide page cache, creating it on first use"""
+    global _page_cache
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache(
+                    fresh_seconds=int(os.environ.get('PAGE_CACHE_FRESH_SECONDS', 300)),
+                    ttl=int(os.environ.get('PAGE_CACHE_TTL', 86400)),
+                    memory_max_bytes=int(os.environ.get('PAGE_CACHE_MEMORY_BYTES', 64 * 1024 * 1024)),
+                    backend=os.environ.get('PAGE_CACHE_BACKEND', 'auto'),
+                    redis_url=os.environ.get('REDIS_URL'),
+                    disk_dir=os.environ.get('PAGE_CACHE_DIR', '/tmp/factsandfakes-page-cache'),
+                    disk_max_bytes=int(os.environ.get('PAGE_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+                )
+    return _page_cache
@@ -12,11 +12,17 @@ import logging
 import requests
 import hashlib
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import xml.etree.ElementTree as ET
 from urllib.parse import quote, urlparse
 
+from services.copyleaks_scans import get_scan_manager
+from services.duplicate_index import get_duplicate_index
+from utils.text_similarity import SimilarityEngine
+
 logger = logging.getLogger(__name__)
 
 class PlagiarismService:
@@ -43,6 +49,30 @@ class PlagiarismService:
             self.google_api_key
         )
         
+        # Provider fan-out: query every configured provider at once, stop at
+        # the deadline or as soon as a strong enough match arrives
+        self.fanout = str(self.config.get('plagiarism_fanout', os.environ.get('PLAGIARISM_FANOUT', 'true'))).lower() == 'true'
+        self.fanout_deadline = float(self.config.get('plagiarism_deadline', os.environ.get('PLAGIARISM_DEADLINE', 30)))
+        # Three providers per request: size for the requests checked at once
+        self.provider_workers = int(self.config.get('plagiarism_provider_workers', os.environ.get('PLAGIARISM_PROVIDER_WORKERS', 12)))
+        self.early_stop_similarity = float(self.config.get(
+            'plagiarism_early_stop_similarity', os.environ.get('PLAGIARISM_EARLY_STOP_SIMILARITY', 80)
+        ))
+        
+        # Local near-duplicate index: matches below local_min_similarity are
+        # ignored, and at known_duplicate_similarity the providers are skipped
+        self.local_min_similarity = float(self.config.get(
+            'plagiarism_local_min_similarity', os.environ.get('PLAGIARISM_LOCAL_MIN_SIMILARITY', 30)
+        ))
+        self.known_duplicate_similarity = float(self.config.get(
+            'plagiarism_known_duplicate_similarity', os.environ.get('PLAGIARISM_KNOWN_DUPLICATE_SIMILARITY', 90)
+        ))
+        # Character n-grams tolerate the punctuation and truncation in search snippets
+        self.similarity_engine = SimilarityEngine(analyzer='char', n=5)
+        self._provider_executor = None
+        self._search_executor = None
+        self._executor_lock = threading.Lock()
+        
         # Session for HTTP requests
         self.session = requests.Session()
         self.session.headers.update({
@@ -57,13 +87,14 @@ class PlagiarismService:
         logger.info(f"Services configured: Copyscape={bool(self.copyscape_api_key)}, "
                    f"Copyleaks={bool(self.copyleaks_api_key)}, Google={bool(self.google_api_key)}")
     
-    def check_plagiarism(self, text: str, use_real_apis: bool = True) -> Optional[Dict[str, Any]]:
+    def check_plagiarism(self, text: str, use_real_apis: bool = True, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Check text for plagiarism using available APIs
         
         Args:
             text: Text to check for plagiarism
-            use_real_apis: Whether to use real APIs (Pro) or simulated results (Basic)
+            use_real_apis: Whether to use real APIs (Pro) or only the local duplicate index (Basic)
+            owner: Id of the submitting user; their own earlier submissions are not matches
             
         Returns:
             Dictionary with plagiarism results or None if error
@@ -76,10 +107,48 @@ class PlagiarismService:
                 'error': 'Text too short for plagiarism checking'
             }
         
-        # Use simulated results for basic tier
+        # Previously analyzed submissions and fetched articles cost no API calls
+        local_results = self._check_local_index(text, owner)
+        
+        # Basic tier gets the local index only (simulated if the index is unavailable)
         if not use_real_apis:
-            return self._simulate_plagiarism_check(text)
+            return local_results or self._simulate_plagiarism_check(text)
+        
+        # Known copy of a fetched article - the paid providers would add nothing.
+        # Earlier submissions don't count: they have no source to point at
+        if local_results and local_results['published_score'] >= self.known_duplicate_similarity:
+            local_results['known_duplicate'] = True
+            return local_results
+        
+        if self.fanout:
+            results = self._check_providers_concurrently(text)
+        else:
+            results = self._check_providers_sequentially(text)
+        
+        # No provider answered - report what the local index found, never a
+        # simulated score
+        if results is None:
+            note = 'No plagiarism provider answered'
+            if local_results:
+                local_results['note'] = f"{note}; only earlier analyses and fetched articles were checked"
+                return local_results
+            return {
+                'score': 0,
+                'sources_checked': 0,
+                'matches': [],
+                'services_used': [],
+                'error': note
+            }
         
+        results = self._merge_local_results(results, local_results)
+        self._annotate_matches(text, results['matches'])
+        return results
+    
+    def _check_providers_sequentially(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Query Copyscape, then Copyleaks, then Google if nothing matched yet
+        Returns None when no provider answered
+        """
         results = {
             'score': 0,
             'sources_checked': 0,
@@ -131,9 +200,9 @@ class PlagiarismService:
             except Exception as e:
                 logger.error(f"Google search error: {str(e)}")
         
-        # If still no services were used, use simulation
+        # No services were used
         if not results['services_used']:
-            return self._simulate_plagiarism_check(text)
+            return None
         
         # Sort matches by similarity score
         results['matches'].sort(key=lambda x: x.get('similarity', 0), reverse=True)
@@ -143,6 +212,195 @@ class PlagiarismService:
         
         return results
     
+    def _check_providers_concurrently(self, text: str) -> Dict[str, Any]:
+        """
+        Query all configured providers in parallel and merge matches as each
+        one answers
+        
+        Matches are deduplicated by URL, keeping the higher similarity. Each
+        provider gets fanout_deadline seconds from when it starts (or from
+        submission while it waits for a thread), and the wait ends early once
+        any match reaches early_stop_similarity; providers that did not answer
+        are listed in 'providers_pending' and their late answers are
+        discarded. Returns None when no provider answered.
+        """
+        providers = []
+        if self.copyscape_api_key and self.copyscape_username:
+            providers.append(('copyscape', self._check_copyscape))
+        if self.copyleaks_api_key and self.copyleaks_email:
+            providers.append(('copyleaks', self._check_copyleaks))
+        if self.google_api_key:
+            providers.append(('google', self._check_google_search))
+        
+        if not providers:
+            return None
+        
+        results = {
+            'score': 0,
+            'sources_checked': 0,
+            'matches': [],
+            'services_used': [],
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        matches_by_url = {}
+        
+        # The pool is shared by every request in the process, so a provider's
+        # deadline counts from when it starts; one still queued after the
+        # deadline is cancelled without running
+        executor = self._get_executor('_provider_executor', 'plagiarism-provider', self.provider_workers)
+        started = {}
+        submitted_at = time.time()
+        pending = {executor.submit(self._timed_provider, started, name, check, text): name for name, check in providers}
+        abandoned = []
+        early_stop = False
+        
+        while pending and not early_stop:
+            deadline = min(started.get(name, submitted_at) + self.fanout_deadline for name in pending.values())
+            done, _ = wait(list(pending), timeout=max(0.0, deadline - time.time()), return_when=FIRST_COMPLETED)
+            
+            now = time.time()
+            for future, name in list(pending.items()):
+                if future in done or now < started.get(name, submitted_at) + self.fanout_deadline:
+                    continue
+                # cancel() fails for a provider that started just now; its own deadline applies then
+                if name in started or future.cancel():
+                    pending.pop(future)
+                    abandoned.append(name)
+            
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    provider_results = future.result()
+                except Exception as e:
+                    logger.error(f"{name} plagiarism provider error: {str(e)}")
+                    continue
+                if not provider_results:
+                    continue
+                
+                results['services_used'].append(name)
+                results['sources_checked'] += provider_results.get('sources_checked', 0)
+                results['score'] = max(results['score'], provider_results.get('score', 0))
+                for match in provider_results.get('matches', []):
+                    key = match.get('url', '') or f"{name}:{len(matches_by_url)}"
+                    if key not in matches_by_url or match.get('similarity', 0) > matches_by_url[key].get('similarity', 0):
+                        matches_by_url[key] = match
+                    if match.get('similarity', 0) >= self.early_stop_similarity:
+                        early_stop = True
+        
+        for future in pending:
+            future.cancel()
+        if pending or abandoned:
+            results['providers_pending'] = sorted(list(pending.values()) + abandoned)
+            reason = 'strong match found' if early_stop else 'deadline reached'
+            logger.info(f"Plagiarism fan-out stopped early ({reason}); pending: {results['providers_pending']}")
+        results['early_terminated'] = early_stop
+        
+        # Every provider failed or timed out
+        if not results['services_used']:
+            return None
+        
+        # Top 10 matches by similarity score
+        results['matches'] = sorted(matches_by_url.values(), key=lambda x: x.get('similarity', 0), reverse=True)[:10]
+        
+        return results
+    
+    def _check_local_index(self, text: str, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Match text against the near-duplicate index of earlier analyses and
+        fetched articles, leaving out the owner's own submissions; None if the
+        index is unavailable
+        
+        'published_score' is the best match against a fetched article with a
+        URL, the only kind of local match that identifies a source.
+        """
+        try:
+            index = get_duplicate_index()
+            found = index.query(text, min_similarity=self.local_min_similarity / 100, exclude_owner=owner)
+            documents = len(index)
+        except Exception as e:
+            logger.error(f"Duplicate index lookup error: {str(e)}")
+            return None
+        
+        matches = []
+        published_score = 0
+        for document in found:
+            if document['source'] == 'page' and document.get('url'):
+                published_score = max(published_score, document['similarity'])
+            if document['source'] == 'analysis':
+                # Never expose another user's submission
+                source, url, excerpt = 'Previously analyzed submission', '', ''
+            else:
+                source, url, excerpt = document.get('title') or document.get('url'), document.get('url'), document.get('excerpt')
+            matches.append({
+                'source': source or 'Previously fetched article',
+                'url': url or '',
+                'similarity': document['similarity'],
+                'excerpt': excerpt or '',
+                'service': 'local_index'
+            })
+        
+        return {
+            'score': max((match['similarity'] for match in matches), default=0),
+            'published_score': published_score,
+            'sources_checked': documents,
+            'matches': matches,
+            'services_used': ['local_index'],
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    def _merge_local_results(self, results: Dict[str, Any], local_results: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add local index matches to provider results, deduplicated by URL"""
+        if not local_results or not local_results['matches']:
+            return results
+        
+        seen_urls = {match.get('url') for match in results['matches'] if match.get('url')}
+        for match in local_results['matches']:
+            if not match['url'] or match['url'] not in seen_urls:
+                results['matches'].append(match)
+        results['matches'].sort(key=lambda x: x.get('similarity', 0), reverse=True)
+        results['matches'] = results['matches'][:10]
+        results['score'] = max(results['score'], local_results['score'])
+        results['sources_checked'] += local_results['sources_checked']
+        results['services_used'].append('local_index')
+        return results
+    
+    def _annotate_matches(self, text: str, matches: List[Dict[str, Any]]):
+        """
+        Score every match excerpt against the submitted text in one pass
+        
+        Adds 'excerpt_similarity' (how much of the excerpt appears in the text,
+        0-100) and 'matched_spans' ((start, end) offsets into the text) for
+        highlighting. Provider 'similarity' values are left as reported.
+        """
+        excerpted = [match for match in matches if match.get('excerpt')]
+        if not excerpted:
+            return
+        
+        try:
+            scores = self.similarity_engine.score(text, [match['excerpt'] for match in excerpted], with_spans=True)
+        except Exception as e:
+            logger.warning(f"Match annotation failed: {str(e)}")
+            return
+        
+        for match, score in zip(excerpted, scores):
+            match['excerpt_similarity'] = round(score['containment'] * 100, 1)
+            match['matched_spans'] = [span['query'] for span in score['spans']]
+    
+    @staticmethod
+    def _timed_provider(started: Dict[str, float], name: str, check, text: str) -> Optional[Dict[str, Any]]:
+        started[name] = time.time()
+        return check(text)
+    
+    def _get_executor(self, attr: str, thread_name_prefix: str, max_workers: int) -> ThreadPoolExecutor:
+        executor = getattr(self, attr)
+        if executor is None:
+            with self._executor_lock:
+                executor = getattr(self, attr)
+                if executor is None:
+                    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+                    setattr(self, attr, executor)
+        return executor
+    
     def _check_copyscape(self, text: str) -> Optional[Dict[str, Any]]:
         """
         Check plagiarism using Copyscape API
@@ -315,7 +573,8 @@ class PlagiarismService:
                 'filename': f"{scan_id}.txt",
                 'properties': {
                     'webhooks': {
-                        'status': f"https://webhook.site/{scan_id}/status"  # Dummy webhook
+                        # Dummy webhook unless a public callback URL is configured
+                        'status': get_scan_manager().webhook_url(scan_id) or f"https://webhook.site/{scan_id}/status"
                     }
                 },
                 'text': text[:25000]  # Copyleaks limit
@@ -339,43 +598,45 @@ class PlagiarismService:
             return None
     
     def _wait_for_copyleaks_results(self, scan_id: str, timeout: int = 30) -> Optional[Dict[str, Any]]:
-        """Wait for Copyleaks scan to complete and get results"""
+        """
+        Wait for Copyleaks scan to complete and get results
+        
+        The scan manager's shared poller (or the completion webhook) resolves
+        the wait; this thread blocks on the result without polling itself.
+        """
         try:
-            headers = {
-                'Authorization': f'Bearer {self._copyleaks_token}'
-            }
-            
-            # Poll for results
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                # Check scan status
-                status_url = f"https://api.copyleaks.com/v3/scans/{scan_id}/status"
-                response = self.session.get(status_url, headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    status_data = response.json()
-                    
-                    if status_data.get('status') == 'Completed':
-                        # Get detailed results
-                        results_url = f"https://api.copyleaks.com/v3/scans/{scan_id}/results"
-                        results_response = self.session.get(results_url, headers=headers, timeout=10)
-                        
-                        if results_response.status_code == 200:
-                            return results_response.json()
-                    elif status_data.get('status') in ['Failed', 'Error']:
-                        logger.error(f"Copyleaks scan failed: {status_data}")
-                        return None
-                
-                # Wait before next poll
-                time.sleep(2)
-            
-            logger.warning(f"Copyleaks scan timeout for {scan_id}")
-            return None
+            future = get_scan_manager().track(scan_id, lambda: self._poll_copyleaks_scan(scan_id), timeout)
+            return future.result(timeout=timeout + 15)
             
         except Exception as e:
             logger.error(f"Copyleaks results error: {str(e)}")
             return None
     
+    def _poll_copyleaks_scan(self, scan_id: str):
+        """Check a Copyleaks scan once, returning (status, results)"""
+        headers = {
+            'Authorization': f'Bearer {self._copyleaks_token}'
+        }
+        
+        status_url = f"https://api.copyleaks.com/v3/scans/{scan_id}/status"
+        response = self.session.get(status_url, headers=headers, timeout=10)
+        
+        if response.status_code == 200:
+            status_data = response.json()
+            
+            if status_data.get('status') == 'Completed':
+                # Get detailed results
+                results_url = f"https://api.copyleaks.com/v3/scans/{scan_id}/results"
+                results_response = self.session.get(results_url, headers=headers, timeout=10)
+                
+                if results_response.status_code == 200:
+                    return 'completed', results_response.json()
+            elif status_data.get('status') in ['Failed', 'Error']:
+                logger.error(f"Copyleaks scan failed: {status_data}")
+                return 'failed', None
+        
+        return 'pending', None
+    
     def _check_google_search(self, text: str) -> Optional[Dict[str, Any]]:
         """
         Fallback plagiarism check using Google Custom Search API
@@ -404,36 +665,15 @@ class PlagiarismService:
             matches = []
             sources_checked = 0
             
-            # Search for each phrase
-            for phrase in search_phrases[:2]:  # Limit to 2 searches to save API calls
-                params = {
-                    'key': self.google_api_key,
-                    'q': phrase,
-                    'num': 5  # Results per search
-                }
-                
-                if self.google_cx:
-                    params['cx'] = self.google_cx
-                
-                response = self.session.get(base_url, params=params, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    sources_checked += data.get('searchInformation', {}).get('totalResults', 0)
-                    
-                    for item in data.get('items', []):
-                        # Simple similarity calculation based on title/snippet match
-                        snippet = item.get('snippet', '')
-                        similarity = self._calculate_simple_similarity(phrase, snippet)
-                        
-                        if similarity > 20:  # Threshold for considering it a match
-                            matches.append({
-                                'source': item.get('title', 'Unknown'),
-                                'url': item.get('link', ''),
-                                'similarity': similarity,
-                                'excerpt': snippet,
-                                'service': 'google'
-                            })
+            # Search the phrases in parallel, limited to 2 searches to save API calls.
+            # A separate pool from the providers so a provider never waits on
+            # work queued behind itself
+            executor = self._get_executor('_search_executor', 'plagiarism-search', 4)
+            searches = [executor.submit(self._google_phrase_search, base_url, phrase) for phrase in search_phrases[:2]]
+            for search in searches:
+                phrase_sources, phrase_matches = search.result()
+                sources_checked += phrase_sources
+                matches.extend(phrase_matches)
             
             # Calculate overall score
             score = min(100, sum(m['similarity'] for m in matches))
@@ -448,18 +688,42 @@ class PlagiarismService:
             logger.error(f"Google search check error: {str(e)}")
             return None
     
-    def _calculate_simple_similarity(self, text1: str, text2: str) -> float:
-        """Calculate simple similarity percentage between two texts"""
-        text1_words = set(text1.lower().split())
-        text2_words = set(text2.lower().split())
+    def _google_phrase_search(self, base_url: str, phrase: str):
+        """Run one exact-phrase Google search, returning (sources_checked, matches)"""
+        params = {
+            'key': self.google_api_key,
+            'q': phrase,
+            'num': 5  # Results per search
+        }
         
-        if not text1_words or not text2_words:
-            return 0
+        if self.google_cx:
+            params['cx'] = self.google_cx
         
-        intersection = text1_words.intersection(text2_words)
-        union = text1_words.union(text2_words)
+        response = self.session.get(base_url, params=params, timeout=10)
+        if response.status_code != 200:
+            return 0, []
+        
+        data = response.json()
+        items = data.get('items', [])
+        # Share of the searched phrase found in each snippet, scored together
+        scores = self.similarity_engine.score(phrase, [item.get('snippet', '') for item in items])
+        
+        matches = []
+        for item, score in zip(items, scores):
+            snippet = item.get('snippet', '')
+            similarity = round(score['coverage'] * 100, 1)
+            
+            if similarity > 20:  # Threshold for considering it a match
+                matches.append({
+                    'source': item.get('title', 'Unknown'),
+                    'url': item.get('link', ''),
+                    'similarity': similarity,
+                    'excerpt': snippet,
+                    'service': 'google'
+                })
         
-        return (len(intersection) / len(union)) * 100
+        # totalResults comes back as a string
+        return int(data.get('searchInformation', {}).get('totalResults', 0) or 0), matches
     
     def _simulate_plagiarism_check(self, text: str) -> Dict[str, Any]:
         """Simulate plagiarism check for basic tier"""
@@ -0,0 +1,151 @@
+"""
+Result Cache for Facts & Fakes AI
+Two-tier cache (per-process LRU in front of optional Redis) for analysis results
+"""
+import json
+import time
+import copy
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Redis is optional - the in-process tier works without it
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text before hashing so trivially different pastes share a key
+    (unicode form, surrounding and repeated whitespace)
+    """
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Content-hash keyed result cache with TTL eviction
+
+    Lookups hit the local LRU first, then Redis (if configured). Redis hits
+    are promoted into the local tier. Values must be JSON-serializable.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = 512, ttl: int = 3600,
+                 redis_url: Optional[str] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.logger = logging.getLogger(f"{self.__class__.__name__}[{namespace}]")
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'local_hits': 0,
+            'redis_hits': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'redis_errors': 0
+        }
+
+        self._redis = None
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                self._redis.ping()
+                self.logger.info("Redis cache tier enabled")
+            except Exception as e:
+                self.logger.warning(f"Redis cache tier unavailable, using local cache only: {str(e)}")
+                self._redis = None
+
+    def make_key(self, text: str, **params) -> str:
+        """
+        Build a cache key from the normalized text hash plus any parameters
+        that change the result (e.g. analysis depth and model)
+        """
+        param_part = '|'.join(f"{name}={params[name]}" for name in sorted(params))
+        return f"{self.namespace}:{content_hash(text)}:{hashlib.sha1(param_part.encode('utf-8')).hexdigest()[:12]}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached value, or None on miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    self._stats['local_hits'] += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self._stats['expirations'] += 1
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._store_local(key, value, now + self.ttl)
+                    with self._lock:
+                        self._stats['hits'] += 1
+                        self._stats['redis_hits'] += 1
+                    return copy.deepcopy(value)
+            except Exception as e:
+                self.logger.warning(f"Redis cache read failed: {str(e)}")
+                with self._lock:
+                    self._stats['redis_errors'] += 1
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a value in both tiers"""
+        self._store_local(key, copy.deepcopy(value), time.time() + self.ttl)
+
+        if self._redis is not None:
+            try:
+                self._redis.setex(key, self.ttl, json.dumps(value))
+            except Exception as e:
+                self.logger.warning(f"Redis cache write failed: {str(e)}")
+                with self._lock:
+                    self._stats['redis_errors'] += 1
+
+    def clear(self):
+        """Drop all local entries (Redis entries expire via TTL)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and tier information"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl
+        stats['redis_enabled'] = self._redis is not None
+        return stats
+
+    def _store_local(self, key: str, value: Dict[str, Any], expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
@@ -0,0 +1,256 @@
+"""
+Stage Execution Engine for Facts & Fakes AI
+Runs independent analysis stages concurrently on a bounded thread pool
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, List, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """
+    A single unit of work in an analysis stage graph
+
+    The stage function receives a dict mapping each dependency name to that
+    dependency's result, so stages only share what they explicitly depend on.
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any],
+                 depends_on: Optional[List[str]] = None, timeout: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on or [])
+        self.timeout = timeout
+
+
+class StageExecutor:
+    """
+    Executes a graph of stages, running every stage whose dependencies are
+    satisfied in parallel and yielding results in the order they finish
+    """
+
+    def __init__(self, max_workers: int = 4, default_timeout: float = 60.0,
+                 max_queue_wait: Optional[float] = None):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.max_queue_wait = max_queue_wait if max_queue_wait is not None else default_timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-stage')
+
+    def run(self, stages: List[Stage]) -> Iterator[Dict[str, Any]]:
+        """
+        Run the stage graph, yielding one result dict per stage as it finishes
+
+        Each result has 'stage', 'status' ('completed', 'failed', 'timeout' or
+        'skipped'), 'result', 'error' and 'duration_ms'. A stage's deadline
+        counts from when it starts running, not from submission, so time spent
+        queued behind other requests on the shared pool does not use it up.
+        A stage whose deadline passes is reported as 'timeout'; Python threads
+        cannot be interrupted, so its thread finishes in the background and
+        its late result is discarded. A stage still queued after
+        max_queue_wait is cancelled and reported as 'timeout' without having
+        run. Stages depending on a stage that did not complete are 'skipped'.
+        Closing the generator early cancels every stage that has not started.
+        """
+        self._validate_graph(stages)
+
+        pending = {stage.name: stage for stage in stages}
+        results: Dict[str, Dict[str, Any]] = {}
+        running = {}  # future -> (stage, submitted_at)
+        started = {}  # stage name -> start time, written by _invoke on the pool thread
+
+        try:
+            yield from self._run_graph(pending, results, running, started)
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _run_graph(self, pending, results, running, started) -> Iterator[Dict[str, Any]]:
+        while pending or running:
+            # Launch (or skip) everything whose dependencies are resolved
+            launched = True
+            while launched:
+                launched = False
+                for name in list(pending):
+                    stage = pending[name]
+                    upstream = [results.get(dep) for dep in stage.depends_on]
+                    if any(dep_result is None for dep_result in upstream):
+                        continue
+
+                    del pending[name]
+                    launched = True
+
+                    if any(dep_result['status'] != 'completed' for dep_result in upstream):
+                        result = self._stage_result(name, 'skipped', error='Upstream stage did not complete')
+                        results[name] = result
+                        yield result
+                        continue
+
+                    inputs = {dep: results[dep]['result'] for dep in stage.depends_on}
+                    future = self._pool.submit(self._invoke, stage, inputs, started)
+                    running[future] = (stage, time.time())
+
+            if not running:
+                break
+
+            now = time.time()
+            next_deadline = min(self._deadline(stage, submitted_at, started) for stage, submitted_at in running.values())
+            done, _ = wait(list(running), timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage, submitted_at = running.pop(future)
+                started_at = started.get(stage.name, submitted_at)
+                try:
+                    value = future.result()
+                    result = self._stage_result(stage.name, 'completed', value, started_at=started_at)
+                except Exception as e:
+                    self.logger.error(f"Stage {stage.name} failed: {str(e)}")
+                    result = self._stage_result(stage.name, 'failed', error=str(e), started_at=started_at)
+                results[stage.name] = result
+                yield result
+
+            now = time.time()
+            for future, (stage, submitted_at) in list(running.items()):
+                if now < self._deadline(stage, submitted_at, started):
+                    continue
+                started_at = started.get(stage.name)
+                if started_at is None:
+                    # cancel() fails if the stage started just now; its own deadline applies then
+                    if not future.cancel():
+                        continue
+                    self.logger.warning(f"Stage {stage.name} did not start within {self.max_queue_wait}s")
+                    error = 'Stage did not start before its queue deadline'
+                else:
+                    self.logger.warning(f"Stage {stage.name} exceeded its {self._timeout_for(stage)}s deadline")
+                    error = 'Stage deadline exceeded'
+                running.pop(future)
+                result = self._stage_result(stage.name, 'timeout', error=error, started_at=started_at or submitted_at)
+                results[stage.name] = result
+                yield result
+
+    def run_all(self, stages: List[Stage], parallel: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the stage graph to completion and return results keyed by stage name
+
+        With parallel=False the stages run one after another on the calling
+        thread, in dependency order (no deadlines are enforced).
+        """
+        runner = self.run if parallel else self.run_sequential
+        return {result['stage']: result for result in runner(stages)}
+
+    def run_sequential(self, stages: List[Stage]) -> Iterator[Dict[str, Any]]:
+        """
+        Run the stage graph inline on the calling thread, yielding the same
+        result dicts as run()
+        """
+        by_name = {stage.name: stage for stage in stages}
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for name in self._validate_graph(stages):
+            stage = by_name[name]
+            upstream = [results[dep] for dep in stage.depends_on]
+            if any(dep_result['status'] != 'completed' for dep_result in upstream):
+                result = self._stage_result(name, 'skipped', error='Upstream stage did not complete')
+            else:
+                started_at = time.time()
+                try:
+                    value = self._invoke(stage, {dep: results[dep]['result'] for dep in stage.depends_on})
+                    result = self._stage_result(name, 'completed', value, started_at=started_at)
+                except Exception as e:
+                    self.logger.error(f"Stage {name} failed: {str(e)}")
+                    result = self._stage_result(name, 'failed', error=str(e), started_at=started_at)
+            results[name] = result
+            yield result
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Run a single callable on the pool and return its Future, for work
+        that arrives incrementally rather than as a stage graph
+        """
+        return self._pool.submit(func, *args, **kwargs)
+
+    def shutdown(self):
+        """
+        Stop accepting work; running stages are allowed to finish
+        """
+        self._pool.shutdown(wait=False)
+
+    def _invoke(self, stage: Stage, inputs: Dict[str, Any], started: Optional[Dict[str, float]] = None) -> Any:
+        if started is not None:
+            started[stage.name] = time.time()
+        return stage.func(inputs)
+
+    def _timeout_for(self, stage: Stage) -> float:
+        return stage.timeout if stage.timeout is not None else self.default_timeout
+
+    def _deadline(self, stage: Stage, submitted_at: float, started: Dict[str, float]) -> float:
+        """Start time plus the stage timeout, or the queue deadline if it has not started"""
+        started_at = started.get(stage.name)
+        if started_at is None:
+            return submitted_at + self.max_queue_wait
+        return started_at + self._timeout_for(stage)
+
+    def _validate_graph(self, stages: List[Stage]) -> List[str]:
+        """Check the graph and return the stage names in dependency order"""
+        names = [stage.name for stage in stages]
+        if len(names) != len(set(names)):
+            raise ValueError(f"Duplicate stage names in graph: {names}")
+
+        known = set(names)
+        for stage in stages:
+            missing = [dep for dep in stage.depends_on if dep not in known]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {missing}")
+
+        # Kahn's algorithm - every stage must be reachable without a cycle
+        order = []
+        remaining = {stage.name: set(stage.depends_on) for stage in stages}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Stage graph has a dependency cycle among: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+            order.extend(ready)
+        return order
+
+    @staticmethod
+    def _stage_result(name: str, status: str, value: Any = None, error: Optional[str] = None,
+                      started_at: Optional[float] = None) -> Dict[str, Any]:
+        return {
+            'stage': name,
+            'status': status,
+            'result': value,
+            'error': error,
+            'duration_ms': int((time.time() - started_at) * 1000) if started_at else 0
+        }
+
+
+_executor: Optional[StageExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_stage_executor() -> StageExecutor:
+    """
+    Return the process-wide stage executor, creating it on first use
+
+    Creation is deferred so the pool's threads start inside each gunicorn
+    worker rather than in the preloaded master process.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = StageExecutor(
+                    max_workers=int(os.environ.get('STAGE_EXECUTOR_MAX_WORKERS', 4)),
+                    default_timeout=float(os.environ.get('STAGE_DEFAULT_TIMEOUT', 60)),
+                    max_queue_wait=float(os.environ.get('STAGE_MAX_QUEUE_WAIT', 60))
+                )
+    return _executor
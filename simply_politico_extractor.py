@@ -4,11 +4,12 @@ Uses alternative methods when Playwright isn't available
 """
 
 import logging
-import requests
 from bs4 import BeautifulSoup
 import time
 import json
 
+from services.http_fetcher import get_http_fetcher
+
 logger = logging.getLogger(__name__)
 
 def extract_politico_simple(url):
@@ -32,7 +33,7 @@ def extract_politico_simple(url):
             'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1'
         ]
         
-        session = requests.Session()
+        fetcher = get_http_fetcher()
         
         for user_agent in user_agents:
             try:
@@ -45,7 +46,7 @@ def extract_politico_simple(url):
                     'Cache-Control': 'no-cache'
                 }
                 
-                response = session.get(url, headers=headers, timeout=10, allow_redirects=True)
+                response = fetcher.fetch(url, headers=headers, timeout=10)
                 
                 if response.status_code == 200 and len(response.text) > 5000:
                     # Parse the content
@@ -120,7 +121,7 @@ def extract_politico_simple(url):
         try:
             cache_url = f"https://webcache.googleusercontent.com/search?q=cache:{url}"
             
-            response = requests.get(cache_url, headers={'User-Agent': user_agents[0]}, timeout=10)
+            response = fetcher.fetch(cache_url, headers={'User-Agent': user_agents[0]}, timeout=10)
             
             if response.status_code == 200 and 'politico.com' in response.text:
                 soup = BeautifulSoup(response.text, 'html.parser')
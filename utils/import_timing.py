@@ -0,0 +1,100 @@
+"""
+Import-time report
+Runs `python -X importtime` on a module in a fresh interpreter and summarizes
+where startup time goes
+"""
+import re
+import sys
+import subprocess
+from typing import Dict, Any, List
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """
+    Parse -X importtime stderr into entries with self/cumulative milliseconds
+    and nesting depth (0 = imported directly by the measured module)
+    """
+    entries = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append({
+            'module': module,
+            'self_ms': int(self_us) / 1000.0,
+            'cumulative_ms': int(cumulative_us) / 1000.0,
+            'depth': (len(indent) - 1) // 2
+        })
+    return entries
+
+
+def measure_imports(module: str, timeout: float = 300.0) -> Dict[str, Any]:
+    """
+    Import a module in a child interpreter with -X importtime
+
+    Returns the wall-clock import time (measured around the import inside
+    the child, so interpreter startup is excluded), the parsed entries for
+    modules the import loaded and whether the import succeeded.
+    """
+    code = (
+        "import time, sys\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "sys.stdout.write(repr(time.perf_counter() - start))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, timeout=timeout
+    )
+    # Leave out what the interpreter imports at startup (site, encodings, ...)
+    baseline = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import time, sys'],
+        capture_output=True, text=True, timeout=timeout
+    )
+    startup = {entry['module'] for entry in parse_importtime(baseline.stderr)}
+    entries = [entry for entry in parse_importtime(completed.stderr) if entry['module'] not in startup]
+    try:
+        wall_ms = float(completed.stdout.strip().splitlines()[-1]) * 1000
+    except (IndexError, ValueError):
+        wall_ms = None
+
+    return {
+        'module': module,
+        'ok': completed.returncode == 0,
+        'wall_ms': wall_ms,
+        'entries': entries,
+        'error': None if completed.returncode == 0 else completed.stderr.strip().splitlines()[-1:]
+    }
+
+
+def format_report(result: Dict[str, Any], top: int = 20, budget_ms: float = None) -> str:
+    """Text report: slowest top-level packages, then slowest modules by self time"""
+    lines = [f"Import-time report for '{result['module']}'"]
+    if not result['ok']:
+        lines.append(f"  import failed: {' '.join(result['error'] or [])}")
+    if result['wall_ms'] is not None:
+        status = ''
+        if budget_ms is not None:
+            status = '  (within budget)' if result['wall_ms'] <= budget_ms else f"  (OVER budget of {budget_ms:.0f} ms)"
+        lines.append(f"  total: {result['wall_ms']:.0f} ms{status}")
+
+    # Cumulative time per top-level package, counted once at its outermost import
+    packages: Dict[str, float] = {}
+    for entry in result['entries']:
+        package = entry['module'].split('.')[0]
+        if entry['depth'] == 0 or entry['module'] == package:
+            packages[package] = max(packages.get(package, 0.0), entry['cumulative_ms'])
+
+    lines.append('')
+    lines.append(f"  {'cumulative ms':>14}  package")
+    for package, cumulative_ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"  {cumulative_ms:>14.1f}  {package}")
+
+    lines.append('')
+    lines.append(f"  {'self ms':>14}  module")
+    for entry in sorted(result['entries'], key=lambda item: item['self_ms'], reverse=True)[:top]:
+        lines.append(f"  {entry['self_ms']:>14.1f}  {entry['module']}")
+    return '\n'.join(lines)
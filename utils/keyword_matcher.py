@@ -0,0 +1,125 @@
+"""
+Compiled multi-keyword matcher
+Counts keyword and pattern hits per category in one regex scan of the text
+"""
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+Pattern = type(re.compile(''))
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex source matching any keyword, with shared prefixes factored out"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Optional groups are greedy, so the longest keyword is preferred
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword of every category in a single pass
+
+    Literal keywords match as case-insensitive substrings, the same as
+    `keyword in text.lower()`, overlapping matches included. All literals
+    are compiled into one prefix-trie regex inside a lookahead, so each
+    position is tried against at most one branch per character; the longest
+    keyword wins and any keyword that is a prefix of it is reported too.
+    Compiled regex patterns are run once each over the whole text. Matches
+    are reported per category, or bucketed into spans (e.g. sentences) of
+    one text so a transcript is scanned once rather than sentence by
+    sentence.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[Union[str, Pattern]]]):
+        self._literals: Dict[str, List[str]] = {}  # keyword -> categories
+        self._patterns: List[Tuple[str, Pattern]] = []
+        self.pattern_terms: Set[str] = set()
+
+        for category, terms in categories.items():
+            for term in terms:
+                if isinstance(term, Pattern):
+                    self._patterns.append((category, term))
+                    self.pattern_terms.add(term.pattern)
+                else:
+                    self._literals.setdefault(term.lower(), []).append(category)
+
+        keywords = sorted(self._literals, key=len, reverse=True)
+        if keywords:
+            trie_pattern = '(?=(' + _trie_pattern(keywords) + '))'
+            self._literal_re = re.compile(trie_pattern)
+            # Only needed when lowercasing would shift character offsets
+            self._literal_re_nocase = re.compile(trie_pattern, re.IGNORECASE)
+        else:
+            self._literal_re = self._literal_re_nocase = None
+
+        # Every (category, term) a match reports, including shorter keywords
+        # implied by a longer match at the same position
+        self._hits = {
+            keyword: [
+                (category, term)
+                for term in keywords if keyword.startswith(term)
+                for category in self._literals[term]
+            ]
+            for keyword in keywords
+        }
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, str, str]]:
+        """Yield (offset, category, term) for every hit; pattern hits use the pattern source as term"""
+        if self._literal_re is not None:
+            lowered = text.lower()
+            if len(lowered) == len(text):
+                matches = self._literal_re.finditer(lowered)
+            else:
+                matches = self._literal_re_nocase.finditer(text)
+            for match in matches:
+                offset = match.start()
+                for category, term in self._hits[match.group(1).lower()]:
+                    yield offset, category, term
+
+        for category, pattern in self._patterns:
+            for match in pattern.finditer(text):
+                yield match.start(), category, pattern.pattern
+
+    def category_counts(self, text: str, distinct: bool = True) -> Dict[str, int]:
+        """
+        Hits per category: distinct terms present (distinct=True) or total
+        occurrences (distinct=False)
+        """
+        if distinct:
+            found = {}
+            for _, category, term in self.finditer(text):
+                found.setdefault(category, set()).add(term)
+            return {category: len(terms) for category, terms in found.items()}
+
+        counts = {}
+        for _, category, _ in self.finditer(text):
+            counts[category] = counts.get(category, 0) + 1
+        return counts
+
+    def span_terms(self, text: str, spans: List[Tuple[int, int]]) -> List[Dict[str, Set[str]]]:
+        """
+        Distinct terms per category for each (start, end) span of text, in
+        span order. Spans must be sorted and non-overlapping; a hit belongs to
+        the span its first character falls in.
+        """
+        starts = [start for start, _ in spans]
+        hits: List[Dict[str, Set[str]]] = [{} for _ in spans]
+        for offset, category, term in self.finditer(text):
+            index = bisect_right(starts, offset) - 1
+            if index >= 0 and offset < spans[index][1]:
+                hits[index].setdefault(category, set()).add(term)
+        return hits
@@ -0,0 +1,202 @@
+"""
+Hashed n-gram similarity
+Scores one query text against many candidate snippets in a single vectorized pass
+"""
+import re
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+WORD_RE = re.compile(r'\w+')
+HASH_BASE = np.uint64(1000003)
+
+
+class NormalizedText:
+    """
+    Lowercased words joined by single spaces, with the offset in the original
+    text of every normalized character so matches map back for highlighting
+    """
+
+    def __init__(self, text: str):
+        parts = []
+        offsets = []
+        for match in WORD_RE.finditer(text):
+            if parts:
+                parts.append(' ')
+                offsets.append(match.start())
+            word = match.group()
+            parts.append(word.lower() if len(word.lower()) == len(word) else word)
+            offsets.extend(range(match.start(), match.end()))
+        self.text = ''.join(parts)
+        self.offsets = np.array(offsets + [len(text)], dtype=np.int64)
+        if self.text:
+            codes = np.frombuffer(self.text.encode('utf-32-le'), dtype=np.uint32)
+            self.word_starts = np.concatenate(([0], np.flatnonzero(codes == ord(' ')) + 1)).astype(np.int64)
+        else:
+            self.word_starts = np.empty(0, dtype=np.int64)
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Original-text (start, end) for a normalized [start, end) range"""
+        # A separator maps to the next word's start, so trim them off the ends
+        while start < end - 1 and self.text[start] == ' ':
+            start += 1
+        while end - 1 > start and self.text[end - 1] == ' ':
+            end -= 1
+        return int(self.offsets[start]), int(self.offsets[end - 1]) + 1
+
+
+class SimilarityEngine:
+    """
+    Hashed n-gram set similarity between a query and candidate texts
+
+    Texts are normalized to lowercase words, cut into character n-grams
+    (analyzer='char') or word n-grams (analyzer='word'), and each n-gram is
+    hashed with a rolling polynomial hash computed over whole arrays into
+    num_features buckets. Scoring looks every candidate n-gram up in the
+    query's sorted feature array at once, so dozens of snippets cost one
+    numpy pass. Scores are on a 0-1 scale:
+
+    - jaccard: shared n-grams over all distinct n-grams of both texts
+    - containment: fraction of the candidate's n-grams found in the query
+    - coverage: fraction of the query's n-grams found in the candidate
+    - cosine: cosine of the n-gram count vectors
+    """
+
+    def __init__(self, analyzer: str = 'char', n: int = 5, num_features: int = 2 ** 20):
+        if analyzer not in ('char', 'word'):
+            raise ValueError(f"Unknown analyzer: {analyzer}")
+        self.analyzer = analyzer
+        self.n = n
+        self.num_features = num_features
+
+    def score(self, query: str, candidates: List[str], with_spans: bool = False) -> List[Dict[str, object]]:
+        """
+        Score each candidate against the query, in candidate order
+
+        With with_spans=True each result also has 'spans': matching regions as
+        {'candidate': (start, end), 'query': (start, end)} offsets into the
+        original texts, merged from runs of consecutive shared n-grams.
+        """
+        query_norm = NormalizedText(query)
+        query_grams, query_starts = self._grams(query_norm)
+        query_ids, query_counts = np.unique(query_grams, return_counts=True)
+
+        candidate_norms = [NormalizedText(candidate) for candidate in candidates]
+        per_candidate = [self._grams(norm) for norm in candidate_norms]
+        empty = {'jaccard': 0.0, 'containment': 0.0, 'coverage': 0.0, 'cosine': 0.0}
+        if not candidates or not query_ids.size:
+            return [dict(empty, spans=[]) if with_spans else dict(empty) for _ in candidates]
+
+        # Distinct (candidate, feature) pairs with their counts, as flat arrays
+        doc_ids, feature_ids, counts = [], [], []
+        for index, (grams, _) in enumerate(per_candidate):
+            ids, id_counts = np.unique(grams, return_counts=True)
+            doc_ids.append(np.full(ids.size, index, dtype=np.int64))
+            feature_ids.append(ids)
+            counts.append(id_counts)
+        doc_ids = np.concatenate(doc_ids)
+        feature_ids = np.concatenate(feature_ids)
+        counts = np.concatenate(counts).astype(np.float64)
+
+        positions = np.minimum(np.searchsorted(query_ids, feature_ids), query_ids.size - 1)
+        shared = query_ids[positions] == feature_ids
+
+        size = len(candidates)
+        candidate_sizes = np.bincount(doc_ids, minlength=size).astype(np.float64)
+        intersections = np.bincount(doc_ids[shared], minlength=size).astype(np.float64)
+        dots = np.bincount(doc_ids[shared], weights=counts[shared] * query_counts[positions[shared]], minlength=size)
+        candidate_norms_sq = np.bincount(doc_ids, weights=counts ** 2, minlength=size)
+        query_norm_value = np.sqrt((query_counts.astype(np.float64) ** 2).sum())
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            jaccard = np.nan_to_num(intersections / (query_ids.size + candidate_sizes - intersections))
+            containment = np.nan_to_num(intersections / candidate_sizes)
+            coverage = intersections / query_ids.size
+            cosine = np.nan_to_num(dots / (np.sqrt(candidate_norms_sq) * query_norm_value))
+
+        if with_spans:
+            query_order = np.argsort(query_grams, kind='stable')
+            query_sorted = query_grams[query_order]
+
+        results = []
+        for index in range(size):
+            result = {
+                'jaccard': round(float(jaccard[index]), 4),
+                'containment': round(float(containment[index]), 4),
+                'coverage': round(float(coverage[index]), 4),
+                'cosine': round(float(cosine[index]), 4)
+            }
+            if with_spans:
+                grams, starts = per_candidate[index]
+                result['spans'] = self._spans(query_norm, query_grams, query_sorted, query_order, query_starts,
+                                              candidate_norms[index], grams, starts)
+            results.append(result)
+        return results
+
+    def _grams(self, norm: NormalizedText) -> Tuple[np.ndarray, np.ndarray]:
+        """Hashed n-gram features and their normalized start offsets"""
+        if self.analyzer == 'char':
+            units = np.frombuffer(norm.text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+            starts = np.arange(max(0, units.size - self.n + 1), dtype=np.int64)
+        else:
+            words = norm.text.split(' ') if norm.text else []
+            units = np.array([zlib.crc32(word.encode('utf-8')) for word in words], dtype=np.uint64)
+            starts = norm.word_starts[:max(0, units.size - self.n + 1)]
+
+        count = units.size - self.n + 1
+        if count <= 0:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+        # Rolling polynomial hash of every window; uint64 arithmetic wraps
+        hashes = np.zeros(count, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for k in range(self.n):
+                hashes = hashes * HASH_BASE + units[k:k + count]
+        return hashes % np.uint64(self.num_features), starts
+
+    def _gram_end(self, norm: NormalizedText, start_index: int, starts: np.ndarray) -> int:
+        """Normalized end offset of the n-gram at start_index"""
+        if self.analyzer == 'char':
+            return int(starts[start_index]) + self.n
+        last_word = start_index + self.n - 1
+        next_start = norm.word_starts[last_word + 1] if last_word + 1 < norm.word_starts.size else len(norm.text) + 1
+        return int(next_start) - 1
+
+    def _spans(self, query_norm: NormalizedText, query_grams: np.ndarray, query_sorted: np.ndarray,
+               query_order: np.ndarray, query_starts: np.ndarray, candidate_norm: NormalizedText, grams: np.ndarray,
+               starts: np.ndarray) -> List[Dict[str, Tuple[int, int]]]:
+        if not grams.size or not query_sorted.size:
+            return []
+
+        # First query position of each candidate n-gram (the sort is stable);
+        # runs are anchored there and then followed along the query
+        positions = np.minimum(np.searchsorted(query_sorted, grams), query_sorted.size - 1)
+        shared = query_sorted[positions] == grams
+        first_query_index = query_order[positions]
+
+        # Single stray character n-grams are noise, not matched text
+        min_run = self.n if self.analyzer == 'char' else 1
+
+        spans = []
+        index = 0
+        while index < grams.size:
+            if not shared[index]:
+                index += 1
+                continue
+            run_start = index
+            query_start = query_end = int(first_query_index[index])
+            # Extend while the next n-gram also follows on in the query
+            while (index + 1 < grams.size and query_end + 1 < query_grams.size
+                   and query_grams[query_end + 1] == grams[index + 1]):
+                index += 1
+                query_end += 1
+            if index - run_start + 1 >= min_run:
+                spans.append({
+                    'candidate': candidate_norm.original_span(int(starts[run_start]),
+                                                              self._gram_end(candidate_norm, index, starts)),
+                    'query': query_norm.original_span(int(query_starts[query_start]),
+                                                      self._gram_end(query_norm, query_end, query_starts))
+                })
+            index += 1
+        return spans